@@ -5,26 +5,75 @@ Versão Final - Outubro 2025
 """
 
 import os
+import re
 import json
-import base64
 import logging
 import traceback
+from datetime import datetime
+from typing import Any, Dict, Optional
 from flask import Request, jsonify
-import requests
 import functions_framework
 
+from shared.config import configure_logging, lazy, settings
+from shared.request_log import bind, log_request
+from shared.metrics import REGISTRY, prometheus_response, span
+from shared.circuit_breaker import snapshot_all as circuit_snapshot
+from shared.agents import STAGE_IDS, agent_profile, stage_definition
+from shared.templates import TemplateCache, TemplateError
+from shared.projects import create_project_registry
+from shared.webhook_auth import ADMIN_TOKEN_HEADER, ADMIN_UNAUTHORIZED_RESPONSE, admin_token_matches
+
 # Logging
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Ambiente
+# GOOGLE_CREDENTIALS é decodificado sob demanda (settings.google_credentials_info)
 PROJECT_NAME = os.environ.get('PROJECT_NAME')
-DRIVE_FOLDER_ID = os.environ.get('DRIVE_FOLDER_ID')
-GOOGLE_CREDENTIALS = base64.b64decode(os.environ.get('GOOGLE_CREDENTIALS', ''))
+DRIVE_FOLDER_ID = settings.drive_folder_id
 CLASP_SCRIPT_ID = os.environ.get('CLASP_SCRIPT_ID', '')  # Se necessário
+ARTIFACTS_BUCKET = settings.artifacts_bucket
+DOCUMENTS_CONCURRENCY = int(os.environ.get('DOCUMENTS_CONCURRENCY', '9'))
+# /metrics e os detalhes do /health exigem X-Admin-Token
+ADMIN_SECRET = settings.admin_secret
+
+# Templates (symlink functions/apps_script_proxy/templates -> templates/)
+STAGE_TEMPLATE = 'linear/stage-issue-description.md'
+AGENT_PERSONALITIES = 'perplexity/agent-personalities.json'
+
+
+@lazy
+def get_drive_client():
+    from shared.drive import DriveClient
+    return DriveClient()
+
+
+@lazy
+def get_template_cache():
+    return TemplateCache()
+
+
+@lazy
+def get_gcs_client():
+    from shared.gcs import GCSClient
+    return GCSClient()
+
+
+@lazy
+def get_project_registry():
+    return create_project_registry()
+
+
+def project_folder(payload) -> str:
+    """
+    Pasta do Drive do projeto do payload (`project_name`) ou a pasta padrão
+    """
+    project_name = payload.get('project_name')
+    return get_project_registry().get(project_name).drive_folder_id if project_name else DRIVE_FOLDER_ID
 
 
 @functions_framework.http
+@log_request('apps_script_proxy')
 def apps_script_handler(request: Request):
     """
     Handler principal para automação Google Drive via Apps Script
@@ -33,13 +82,17 @@ def apps_script_handler(request: Request):
     if request.method == 'OPTIONS':
         return handle_cors()
     
-    # Health check
+    admin = admin_token_matches(ADMIN_SECRET, request.headers.get(ADMIN_TOKEN_HEADER))
+    
+    # Health check: pasta, latências e circuitos só com o token
     if request.path == '/health':
-        return jsonify({
-            'status': 'healthy',
-            'project': PROJECT_NAME,
-            'drive_folder': DRIVE_FOLDER_ID
-        }), 200
+        health = {'status': 'healthy', 'project': PROJECT_NAME}
+        if admin:
+            health.update(drive_folder=DRIVE_FOLDER_ID, latency=REGISTRY.summary(), circuits=circuit_snapshot())
+        return jsonify(health), 200
+    
+    if request.path == '/metrics':
+        return prometheus_response() if admin else ADMIN_UNAUTHORIZED_RESPONSE
     
     try:
         if request.method != 'POST':
@@ -52,7 +105,7 @@ def apps_script_handler(request: Request):
         action = data.get('action', 'unknown')
         payload = data.get('payload', {})
         
-        logger.info(f"📁 Apps Script action: {action}")
+        bind(action=action)
         
         # Processar diferentes ações
         if action == 'create_document':
@@ -63,12 +116,13 @@ def apps_script_handler(request: Request):
             return organize_files(payload)
         elif action == 'backup_data':
             return backup_data(payload)
+        elif action == 'create_documents':
+            return create_documents(payload)
         else:
             return jsonify({'error': f'Unknown action: {action}'}), 400
         
     except Exception as e:
-        logger.error(f"❌ Apps Script error: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Apps Script error: {str(e)}")
         
         return jsonify({
             'error': str(e),
@@ -87,38 +141,118 @@ def handle_cors():
     return ('', 204, headers)
 
 
+@span('create_document')
 def create_document(payload):
     """
     Cria documentos no Google Drive
     """
     doc_type = payload.get('type', 'document')
     title = payload.get('title', 'Untitled Document')
-    content = payload.get('content', '')
-    folder_id = payload.get('folder_id', DRIVE_FOLDER_ID)
+    folder_id = payload.get('folder_id') or project_folder(payload)
     
     logger.info(f"Creating {doc_type}: {title}")
     
     try:
-        # Aqui você implementaria a lógica real do Google Drive API
-        # Por enquanto, retornamos um mock
+        # Conteúdo direto ou renderizado a partir de um template do repositório
+        if payload.get('template'):
+            content = render_stage_template(payload['template'], payload.get('stage'),
+                                            payload.get('variables'))
+        else:
+            content = payload.get('content', '')
         
+        document = get_drive_client().create_file(title, content, folder_id)
         result = {
             'status': 'created',
-            'document_id': f"mock_doc_id_{hash(title)}",
+            'document_id': document['id'],
             'title': title,
             'type': doc_type,
             'folder_id': folder_id,
-            'url': f"https://docs.google.com/document/d/mock_doc_id_{hash(title)}/edit"
+            'url': document.get('webViewLink') or f"https://docs.google.com/document/d/{document['id']}/edit"
         }
         
         logger.info(f"✅ Document created: {result['document_id']}")
         return jsonify(result), 200
         
+    except TemplateError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"❌ Failed to create document: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@span('create_documents')
+def create_documents(payload):
+    """
+    Cria o conjunto de documentos dos estágios (L1-L9) de um projeto
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    template = payload.get('template', STAGE_TEMPLATE)
+    stages = payload.get('stages') or list(STAGE_IDS)
+    folder_id = payload.get('folder_id') or project_folder(payload)
+    variables = payload.get('variables')
+    
+    logger.info(f"Creating {len(stages)} stage documents from {template}")
+    
+    try:
+        # Renderiza tudo antes de chamar o Drive: erro de template não deixa conjunto parcial
+        documents = []
+        for stage_id in stages:
+            stage = stage_definition(stage_id, settings.pipeline_stages)
+            title = f"{stage_id}: {stage.get('title', stage_id)}"
+            documents.append((stage_id, title, render_stage_template(template, stage_id, variables)))
+    except TemplateError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def create(item):
+        stage_id, title, content = item
+        try:
+            document = get_drive_client().create_file(title, content, folder_id)
+            return {'stage': stage_id, 'status': 'created', 'document_id': document['id'], 'title': title}
+        except Exception as e:
+            return {'stage': stage_id, 'status': 'failed', 'title': title, 'error': str(e)}
+    
+    with ThreadPoolExecutor(max_workers=min(DOCUMENTS_CONCURRENCY, len(documents)) or 1) as executor:
+        results = list(executor.map(create, documents))
+    
+    failed = [r for r in results if r['status'] == 'failed']
+    logger.info(f"✅ Stage documents created: {len(results) - len(failed)}/{len(results)}")
+    return jsonify({
+        'status': 'created' if not failed else 'partially_created',
+        'folder_id': folder_id,
+        'template': template,
+        'documents': results,
+        'created': len(results) - len(failed),
+        'failed': len(failed),
+        'template_cache': get_template_cache().stats
+    }), 200 if not failed else 207
+
+
+def render_stage_template(template: str, stage_id: Optional[str] = None,
+                          variables: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Renderiza um template com o estágio, o agente responsável e os dados do projeto
+    """
+    cache = get_template_cache()
+    personalities = cache.load_json(AGENT_PERSONALITIES)['agents']
+    stages = settings.pipeline_stages or [stage_definition(s) for s in STAGE_IDS]
+    context = {
+        'project_name': PROJECT_NAME,
+        'drive_folder_id': DRIVE_FOLDER_ID,
+        'drive_url': f"https://drive.google.com/drive/folders/{DRIVE_FOLDER_ID}",
+        'creation_date': datetime.utcnow().strftime('%Y-%m-%d'),
+        'agents': {s: agent_profile(s, personalities) for s in STAGE_IDS},
+        'stages': stages,
+    }
+    if stage_id:
+        stage = stage_definition(stage_id, stages)
+        context['stage'] = stage
+        context['agent'] = agent_profile(stage.get('agent', stage_id), personalities)
+    context.update(variables or {})
+    return cache.render(template, context)
+
+
+@span('update_config')
 def update_config(payload):
     """
     Atualiza arquivos de configuração no Drive
@@ -145,56 +279,71 @@ def update_config(payload):
         return jsonify({'error': str(e)}), 500
 
 
+@span('organize_files')
 def organize_files(payload):
     """
     Organiza arquivos na estrutura de pastas
     """
-    source_folder = payload.get('source_folder', DRIVE_FOLDER_ID)
+    from shared.drive_organizer import organize_folder
+
+    source_folder = payload.get('source_folder') or project_folder(payload)
     organization_rules = payload.get('rules', {})
     
     logger.info(f"Organizing files in folder: {source_folder}")
     
+    if not source_folder:
+        return jsonify({'error': 'source_folder is required'}), 400
+    
     try:
-        # Mock implementation
-        result = {
-            'status': 'organized',
-            'source_folder': source_folder,
-            'files_processed': 0,
-            'folders_created': 0,
-            'rules_applied': len(organization_rules)
-        }
+        result = organize_folder(
+            get_drive_client(), source_folder, organization_rules,
+            use_defaults=payload.get('use_defaults', True),
+            dry_run=payload.get('dry_run', False)
+        )
         
-        logger.info(f"✅ Files organized: {result['files_processed']} files")
+        logger.info(f"✅ Files organized: {result['files_processed']} files "
+                    f"({result['batches']} batches, {result['folders_created']} folders created)")
         return jsonify(result), 200
         
+    except re.error as e:
+        return jsonify({'error': f'Invalid rule pattern: {e}'}), 400
     except Exception as e:
         logger.error(f"❌ Failed to organize files: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@span('backup_data')
 def backup_data(payload):
     """
-    Cria backup dos dados importantes
+    Backup da pasta do Drive para o GCS (full ou incremental via manifesto)
     """
+    from shared.drive_backup import BACKUP_TYPES, DriveBackup, split_backup_target
+
     backup_type = payload.get('backup_type', 'full')
     target_folder = payload.get('target_folder')
+    source_folder = payload.get('source_folder') or project_folder(payload)
     
     logger.info(f"Creating backup: {backup_type}")
     
+    if backup_type not in BACKUP_TYPES:
+        return jsonify({'error': f'Unknown backup_type: {backup_type}'}), 400
+    
+    bucket, prefix = split_backup_target(target_folder, f"drive-backups/{source_folder}")
+    bucket = bucket or payload.get('bucket') or ARTIFACTS_BUCKET
+    if not source_folder or not bucket:
+        return jsonify({'error': 'source_folder and bucket (ARTIFACTS_BUCKET) are required'}), 400
+    
     try:
-        # Mock implementation
-        result = {
-            'status': 'backup_created',
-            'backup_type': backup_type,
-            'target_folder': target_folder,
-            'backup_id': f"backup_{backup_type}_{hash(str(payload))}",
-            'timestamp': '2025-10-18T14:50:00Z',
-            'size_mb': 42  # Mock size
-        }
+        engine = DriveBackup(get_drive_client(), get_gcs_client(), bucket, prefix)
+        result = engine.run(source_folder, backup_type)
+        result['target_folder'] = target_folder
+        result['timestamp'] = datetime.utcnow().isoformat() + 'Z'
         
-        logger.info(f"✅ Backup created: {result['backup_id']}")
+        logger.info(f"✅ Backup created: {result['backup_id']} "
+                    f"({result['files_uploaded']} uploaded, {result['files_unchanged']} unchanged, "
+                    f"{result['size_mb']} MB)")
         return jsonify(result), 200
         
     except Exception as e:
         logger.error(f"❌ Failed to create backup: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
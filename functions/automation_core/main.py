@@ -7,29 +7,46 @@ Versão Final - Outubro 2025
 import os
 import json
 import logging
-import traceback
 from datetime import datetime
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from flask import Request, jsonify
 import functions_framework
 
+from shared.config import configure_logging, lazy, settings
+from shared.request_log import bind, log_request
+from shared.metrics import prometheus_response, span
+from shared.github_dispatch import get_scheduler as get_dispatch_scheduler
+from shared.projects import create_project_registry
+from shared.run_tracker import RunTracker, new_dispatch_id
+from shared.webhook_auth import ADMIN_TOKEN_HEADER, ADMIN_UNAUTHORIZED_RESPONSE, admin_token_matches
+
 # Logging
-logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Environment
 PROJECT_NAME = os.environ.get('PROJECT_NAME')
-LINEAR_API_KEY = os.environ.get('LINEAR_API_KEY')
-GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
-GITHUB_OWNER = os.environ.get('GITHUB_OWNER')
+LINEAR_API_KEY = settings.linear_api_key
+GITHUB_TOKEN = settings.github_token
+GITHUB_OWNER = settings.github_owner
 WEBHOOK_URL = os.environ.get('WEBHOOK_URL')
-DRIVE_FOLDER_ID = os.environ.get('DRIVE_FOLDER_ID')
+DRIVE_FOLDER_ID = settings.drive_folder_id
+# /metrics exige X-Admin-Token (mesmo token das rotas operacionais do webhook)
+ADMIN_SECRET = settings.admin_secret
+
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '8'))
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '100'))
+
+SYNC_STATE_PATH = os.environ.get('SYNC_STATE_PATH', '/tmp/adc-sync-state.sqlite3')
 
-LINEAR_API_URL = "https://api.linear.app/graphql"
-GITHUB_API_URL = "https://api.github.com"
+LINEAR_API_URL = os.environ.get('LINEAR_API_URL', "https://api.linear.app/graphql")
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', "https://api.github.com")
+
+WORKFLOW_FILE = "llm-pipeline-auto.yml"
 
 
 @functions_framework.http
+@log_request('automation_core')
 def automation_handler(request: Request):
     """
     Lógica principal de automação de pipeline
@@ -37,26 +54,33 @@ def automation_handler(request: Request):
     if request.method == 'OPTIONS':
         return cors_preflight()
     
+    if request.path == '/metrics':
+        if not admin_token_matches(ADMIN_SECRET, request.headers.get(ADMIN_TOKEN_HEADER)):
+            return ADMIN_UNAUTHORIZED_RESPONSE
+        return prometheus_response()
+    
     try:
         data = request.get_json(force=True)
         action = data.get('action')
         payload = data.get('payload', {})
         
-        logger.info(f"Automation Core Action: {action}")
+        bind(action=action)
         
-        if action == 'trigger_stage':
-            return trigger_stage(payload)
-        elif action == 'sync_status':
-            return sync_status(payload)
+        if action == 'batch':
+            body, status = run_batch(payload)
+        elif action in ACTIONS:
+            body, status = ACTIONS[action](payload)
         else:
-            return jsonify({'error': 'unknown action'}, 400)
+            return jsonify({'error': 'unknown action'}), 400
+        
+        return jsonify(body), status
     
     except Exception as e:
-        logger.error(f"Automation Core Error: {e}")
-        logger.error(traceback.format_exc())
-        return jsonify({'error': str(e)}, 500)
+        logger.exception(f"Automation Core Error: {e}")
+        return jsonify({'error': str(e)}), 500
 
 
+@span('trigger_stage')
 def trigger_stage(payload):
     """
     Dispara workflow GitHub para estágio específico
@@ -65,35 +89,264 @@ def trigger_stage(payload):
     project_name = payload.get('project_name', PROJECT_NAME)
     
     if not stage:
-        return jsonify({'error': 'stage required'}, 400)
-    
-    repo = f"{GITHUB_OWNER}/llm-app-{project_name.lower().replace('_', '-')}"
-    workflow = "llm-pipeline-auto.yml"
+        return {'error': 'stage required'}, 400
     
-    url = f"{GITHUB_API_URL}/repos/{repo}/actions/workflows/{workflow}/dispatches"
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    body = {
-        "ref": "main",
-        "inputs": {"stage": stage, "project_name": project_name}
+    repo = repo_for_project(project_name)
+    inputs = {
+        "stage": stage,
+        "project_name": project_name,
+        "triggered_by": "automation_core",
+        "timestamp": datetime.utcnow().isoformat(),
+        "dispatch_id": new_dispatch_id()
     }
     
-    resp = requests.post(url, json=body, headers=headers, timeout=10)
+    # Espaçado por token bucket; 403/429/5xx são repetidos com backoff
+    result = get_dispatch_scheduler().dispatch(repo, WORKFLOW_FILE, inputs, GITHUB_TOKEN)
     
-    if resp.status_code == 204:
-        return jsonify({'status': 'triggered', 'stage': stage}, 200)
+    if result.ok:
+        # 204 não traz o run: o tracker correlaciona pelo dispatch_id
+        get_run_tracker().track(repo, WORKFLOW_FILE, inputs['dispatch_id'], project_name, stage, inputs['timestamp'])
+        return {
+            'status': 'triggered',
+            'stage': stage,
+            'attempts': result.attempts,
+            'dispatch_id': inputs['dispatch_id']
+        }, 200
+    elif result.ambiguous:
+        # Resultado desconhecido (POST sem resposta): o tracker confirma se o run existe
+        get_run_tracker().track(repo, WORKFLOW_FILE, inputs['dispatch_id'], project_name, stage, inputs['timestamp'])
+        return {
+            'status': 'unconfirmed',
+            'stage': stage,
+            'details': result.error,
+            'dispatch_id': inputs['dispatch_id']
+        }, 202
+    elif result.retryable:
+        return {
+            'error': 'dispatch_deferred',
+            'details': result.error,
+            'retry_after': round(result.retry_after, 2)
+        }, 503
     else:
-        return jsonify({'error': 'dispatch_failed', 'details': resp.text}, 500)
+        return {'error': 'dispatch_failed', 'details': result.error}, 500
 
 
+@span('sync_status')
 def sync_status(payload):
     """
     Sincroniza status de issues entre Linear e GitHub
     """
-    # Placeholder para lógica de sincronização
-    return jsonify({'status': 'sync_complete'}, 200)
+    project_name = payload.get('project_name', PROJECT_NAME)
+    if not project_name:
+        return {'error': 'project_name required'}, 400
+    
+    # Ids do Linear do payload ou, na falta deles, do registry de projetos
+    project = get_project_registry().get(project_name)
+    team_id = payload.get('linear_team_id') or project.linear_team_id
+    linear_project_id = payload.get('linear_project_id') or project.linear_project_id
+    
+    linear_filter = {}
+    if team_id:
+        linear_filter['team'] = {'id': {'eq': team_id}}
+    if linear_project_id:
+        linear_filter['project'] = {'id': {'eq': linear_project_id}}
+    
+    repo = project.repo if GITHUB_OWNER else None
+    
+    from shared.linear import LinearError
+    from shared.status_sync import SyncError
+    
+    try:
+        result = get_sync_engine().sync(
+            project_name,
+            repo=repo,
+            linear_filter=linear_filter,
+            full=bool(payload.get('full', False))
+        )
+    except (SyncError, LinearError) as e:
+        logger.error(f"Sync failed for {project_name}: {e}")
+        return {'error': 'sync_failed', 'details': str(e)}, 502
+    
+    bind(sync_project=project_name, sync_changes=len(result['changes']), sync_ms=result['duration_ms'])
+    return result, 200
+
+
+@span('run_status')
+def run_status(payload):
+    """
+    Situação do workflow run de um dispatch (`dispatch_id`) ou do run mais
+    recente de um estágio (`stage`), a partir do poll compartilhado do repo
+    """
+    project_name = payload.get('project_name', PROJECT_NAME)
+    dispatch_id = payload.get('dispatch_id')
+    stage = payload.get('stage')
+    if not project_name:
+        return {'error': 'project_name required'}, 400
+    if not dispatch_id and not stage:
+        return {'error': 'dispatch_id or stage required'}, 400
+    
+    repo = repo_for_project(project_name)
+    tracker = get_run_tracker()
+    
+    if dispatch_id:
+        record = tracker.status(dispatch_id, repo, WORKFLOW_FILE, project=project_name)
+        if record is None:
+            return {'error': 'unknown dispatch_id'}, 404
+        record.pop('tracked_at', None)
+        bind(run_dispatch_id=dispatch_id, run_status=record['status'])
+        return {'dispatch': record, 'tracker': tracker.stats}, 200
+    
+    run = tracker.latest(repo, WORKFLOW_FILE, stage, project_name)
+    bind(run_stage=stage, run_status=run['status'] if run else None)
+    if run is None:
+        return {'error': 'no_recent_run', 'stage': stage, 'tracker': tracker.stats}, 404
+    return {'stage': stage, 'run': run, 'tracker': tracker.stats}, 200
+
+
+@lazy
+def get_run_tracker():
+    """
+    Tracker de workflow runs da instância; mudanças de status alimentam o
+    snapshot de estágios do sync_status
+    """
+    return RunTracker(GITHUB_TOKEN, GITHUB_API_URL, on_update=record_run_status)
+
+
+def record_run_status(record, run):
+    """
+    Callback do tracker: grava o run no snapshot do projeto
+    """
+    if record['project'] and record['stage']:
+        get_sync_engine().record_run(record['project'], record['stage'], run)
+    if record['status'] == 'completed':
+        logger.info(f"🏁 {record['project']} {record['stage']} run {record['run_id']}: {record['conclusion']}")
+
+
+@lazy
+def get_sync_engine():
+    """
+    Engine de sincronização (uma por instância, importada sob demanda)
+    """
+    from shared.linear import LinearClient
+    from shared.status_sync import StatusSyncEngine, SyncStateStore
+    
+    return StatusSyncEngine(
+        SyncStateStore(SYNC_STATE_PATH),
+        linear=LinearClient(LINEAR_API_KEY, LINEAR_API_URL),
+        github_token=GITHUB_TOKEN,
+        github_api_url=GITHUB_API_URL
+    )
+
+
+@lazy
+def get_project_registry():
+    """
+    Projetos da instância (PROJECTS_CONFIG), montado uma vez
+    """
+    return create_project_registry()
+
+
+def repo_for_project(project_name):
+    """
+    Repositório GitHub (owner/nome) de um projeto
+    """
+    return get_project_registry().get(project_name).repo
+
+
+def batch_coalesce_key(action, payload):
+    """
+    Chave de coalescência: dispatches para o mesmo repo/estágio executam uma vez
+    """
+    if action == 'trigger_stage':
+        project_name = payload.get('project_name', PROJECT_NAME) or ''
+        return (action, repo_for_project(project_name), payload.get('stage'))
+    return (action, json.dumps(payload, sort_keys=True, default=str))
+
+
+def run_batch(payload):
+    """
+    Executa várias operações trigger_stage/sync_status/run_status em paralelo
+    """
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return {'error': 'operations required'}, 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return {'error': f'too many operations (max {BATCH_MAX_OPERATIONS})'}, 400
+    
+    max_workers = payload.get('max_workers', BATCH_MAX_WORKERS)
+    if isinstance(max_workers, str) and max_workers.strip().isdigit():
+        max_workers = int(max_workers)
+    if isinstance(max_workers, bool) or not isinstance(max_workers, int) or max_workers < 1:
+        return {'error': 'max_workers must be a positive integer'}, 400
+    max_workers = min(max_workers, BATCH_MAX_WORKERS)
+    
+    # Agrupa operações idênticas; cada grupo executa uma única vez
+    groups = {}
+    item_keys = []
+    results = [None] * len(operations)
+    
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            operation = {}
+        action = operation.get('action')
+        op_payload = operation.get('payload') or {}
+        if action not in ACTIONS:
+            results[index] = {'index': index, 'action': action, 'status_code': 400,
+                              'result': {'error': 'unknown action'}}
+            item_keys.append(None)
+            continue
+        key = batch_coalesce_key(action, op_payload)
+        groups.setdefault(key, (action, op_payload))
+        item_keys.append(key)
+    
+    def execute(action, op_payload):
+        try:
+            return ACTIONS[action](op_payload)
+        except Exception as e:
+            logger.error(f"Batch operation {action} failed: {e}")
+            return {'error': str(e)}, 500
+    
+    group_results = {}
+    if groups:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+            futures = {
+                key: pool.submit(execute, action, op_payload)
+                for key, (action, op_payload) in groups.items()
+            }
+            for key, future in futures.items():
+                group_results[key] = future.result()
+    
+    seen = set()
+    for index, key in enumerate(item_keys):
+        if key is None:
+            continue
+        body, status = group_results[key]
+        results[index] = {
+            'index': index,
+            'action': groups[key][0],
+            'status_code': status,
+            'coalesced': key in seen,
+            'result': body
+        }
+        seen.add(key)
+    
+    failed = sum(1 for r in results if r['status_code'] >= 400)
+    bind(batch_operations=len(operations), batch_unique=len(groups), batch_failed=failed)
+    
+    return {
+        'status': 'batch_complete',
+        'total': len(operations),
+        'executed': len(groups),
+        'failed': failed,
+        'results': results
+    }, 200
+
+
+ACTIONS = {
+    'trigger_stage': trigger_stage,
+    'sync_status': sync_status,
+    'run_status': run_status
+}
 
 
 def cors_preflight():
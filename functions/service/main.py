@@ -0,0 +1,103 @@
+"""
+ADC-Agents-Team - Service
+Modo de deploy consolidado: as três funções num único app WSGI, com um só
+interpretador, pools HTTP, caches e métricas compartilhados
+
+Execução local:
+    gunicorn --chdir functions/service --workers 1 --threads 16 main:app
+"""
+
+import os
+import sys
+import logging
+import importlib.util
+from datetime import datetime
+from types import ModuleType
+from typing import Callable, Dict, Tuple
+
+from flask import Flask, Request, jsonify, request
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.environ.get('SERVICE_FUNCTIONS_DIR', os.path.dirname(SERVICE_DIR))
+
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
+
+from shared.config import configure_logging, settings  # noqa: E402
+from shared.circuit_breaker import snapshot_all as circuit_snapshot  # noqa: E402
+from shared.metrics import REGISTRY, prometheus_response  # noqa: E402
+from shared.webhook_auth import ADMIN_TOKEN_HEADER, ADMIN_UNAUTHORIZED_RESPONSE, admin_token_matches  # noqa: E402
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Prefixo → (diretório da função, entry point)
+MOUNTS: Dict[str, Tuple[str, str]] = {
+    '/webhook': ('webhook_handler', 'linear_webhook_handler'),
+    '/automation': ('automation_core', 'automation_handler'),
+    '/apps-script': ('apps_script_proxy', 'apps_script_handler'),
+}
+
+
+def load_function(function_dir: str) -> ModuleType:
+    """
+    Importa functions/<dir>/main.py com nome único; todos compartilham o
+    mesmo pacote `shared` (e portanto sessões HTTP, breakers e registries)
+    """
+    name = f"{function_dir}_main"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(FUNCTIONS_DIR, function_dir, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def mount(handler: Callable[[Request], object]) -> Flask:
+    """
+    App Flask que entrega qualquer path sob o prefixo ao handler da função
+    (o prefixo sai do PATH_INFO, então `/webhook/health` vira `/health`)
+    """
+    app = Flask(handler.__name__)
+
+    @app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'OPTIONS'])
+    @app.route('/<path:path>', methods=['GET', 'POST', 'OPTIONS'])
+    def entry(path):
+        return handler(request)
+
+    return app
+
+
+MODULES: Dict[str, ModuleType] = {prefix: load_function(d) for prefix, (d, _) in MOUNTS.items()}
+# Entry points por nome: chamadas internas entre funções são chamadas de função
+HANDLERS: Dict[str, Callable] = {
+    entry_point: getattr(MODULES[prefix], entry_point) for prefix, (_, entry_point) in MOUNTS.items()
+}
+
+root = Flask(__name__)
+
+
+@root.route('/health')
+def health():
+    return jsonify({
+        'status': 'healthy',
+        'mode': 'service',
+        'functions': {prefix: entry_point for prefix, (_, entry_point) in MOUNTS.items()},
+        'circuits': circuit_snapshot(),
+        'latency': REGISTRY.summary(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+
+@root.route('/metrics')
+def metrics():
+    if not admin_token_matches(settings.admin_secret, request.headers.get(ADMIN_TOKEN_HEADER)):
+        return ADMIN_UNAUTHORIZED_RESPONSE
+    return prometheus_response()
+
+
+app = DispatcherMiddleware(root, {
+    prefix: mount(HANDLERS[entry_point]) for prefix, (_, entry_point) in MOUNTS.items()
+})
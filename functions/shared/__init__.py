@@ -0,0 +1,7 @@
+"""
+ADC-Agents-Team - Shared
+Módulos compartilhados entre as Cloud Functions do pipeline.
+
+Cada função referencia este pacote via symlink (functions/<função>/shared),
+que o archive_file do Terraform segue ao empacotar o source.
+"""
@@ -0,0 +1,49 @@
+"""
+ADC-Agents-Team - Agents
+Agentes e estágios do pipeline usados em notificações e documentos
+"""
+
+from typing import Any, Dict, List, Optional
+
+STAGE_IDS = ('L1', 'L2', 'L3', 'L4', 'L5', 'L6', 'L7', 'L8', 'L9')
+
+AGENT_INFO = {
+    'L1': {'name': 'Alex Requirements', 'emoji': '🎯'},
+    'L2': {'name': 'Sam Architecture', 'emoji': '🏢️'},
+    'L3': {'name': 'Luna Design', 'emoji': '🎨'},
+    'L4': {'name': 'Morgan Backend', 'emoji': '⚙️'},
+    'L5': {'name': 'River Frontend', 'emoji': '💻'},
+    'L6': {'name': 'Quinn Testing', 'emoji': '🔍'},
+    'L7': {'name': 'Phoenix Deploy', 'emoji': '🚀'},
+    'L8': {'name': 'Sage Monitor', 'emoji': '📊'},
+    'L9': {'name': 'Echo Documentation', 'emoji': '📚'}
+}
+
+
+def agent_profile(stage_id: str, personalities: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Perfil completo do agente (agent-personalities.json) com AGENT_INFO como base
+    """
+    info = AGENT_INFO.get(stage_id, {})
+    profile = {'name': info.get('name', stage_id), 'avatar': info.get('emoji', '')}
+    profile.update((personalities or {}).get(stage_id, {}))
+    return profile
+
+
+def stage_definition(stage_id: str, stages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Definição do estágio (locals.pipeline_stages via PIPELINE_STAGES) ou um mínimo
+    """
+    for stage in stages or ():
+        if stage.get('id') == stage_id:
+            return stage
+    return {
+        'id': stage_id,
+        'title': f"Estágio {stage_id}",
+        'agent': stage_id,
+        'description': '',
+        'deliverables': [],
+        'acceptance_criteria': [],
+        'dependencies': [],
+        'resources': [],
+    }
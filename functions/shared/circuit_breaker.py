@@ -0,0 +1,184 @@
+"""
+ADC-Agents-Team - Circuit Breaker
+Circuit breaker por upstream (closed → open → half-open) com janela de
+taxa de falhas, usado pelo http_client
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_ENABLED = os.environ.get('CIRCUIT_BREAKER', 'true').lower() in ('1', 'true', 'yes')
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', '5'))
+CIRCUIT_WINDOW_SECONDS = float(os.environ.get('CIRCUIT_WINDOW_SECONDS', '30'))
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', '30'))
+CIRCUIT_HALF_OPEN_CALLS = int(os.environ.get('CIRCUIT_HALF_OPEN_CALLS', '1'))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada localmente: o upstream está com o circuito aberto"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit open for {name} (retry in {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Abre quando, na janela de `window_seconds`, há pelo menos `min_calls`
+    chamadas e a fração de falhas atinge `failure_rate`. Aberto, recusa
+    chamadas por `open_seconds`; depois deixa passar `half_open_calls`
+    sondas: sucesso fecha o circuito, falha reabre
+    """
+
+    def __init__(self, name: str, failure_rate: float = CIRCUIT_FAILURE_RATE,
+                 min_calls: int = CIRCUIT_MIN_CALLS, window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS, half_open_calls: int = CIRCUIT_HALF_OPEN_CALLS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (instante, falhou?) das chamadas dentro da janela
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._on_recover: List[Callable[[str], None]] = []
+        self.stats = {'trips': 0, 'rejected': 0, 'recoveries': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            _, failed = self._calls.popleft()
+            self._failures -= failed
+
+    def before_call(self) -> None:
+        """
+        Levanta CircuitOpenError se a chamada não deve ser feita
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            self.stats['rejected'] += 1
+            retry_after = max(0.0, self.open_seconds - (now - self._opened_at)) if state == OPEN else 1.0
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, success: bool) -> None:
+        now = self._clock()
+        recovered = False
+        with self._lock:
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                if success:
+                    self._state = CLOSED
+                    self._calls.clear()
+                    self._failures = 0
+                    self.stats['recoveries'] += 1
+                    recovered = True
+                else:
+                    self._trip(now)
+            elif state == CLOSED:
+                self._calls.append((now, not success))
+                self._failures += not success
+                self._prune(now)
+                if (not success and len(self._calls) >= self.min_calls
+                        and self._failures / len(self._calls) >= self.failure_rate):
+                    self._trip(now)
+        if recovered:
+            logger.warning(f"Circuit for {self.name} closed (upstream recovered)")
+            for callback in list(self._on_recover):
+                try:
+                    callback(self.name)
+                except Exception as e:
+                    logger.error(f"Circuit recovery callback failed: {e}")
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._failures = 0
+        self.stats['trips'] += 1
+        logger.warning(f"Circuit for {self.name} opened for {self.open_seconds:.0f}s")
+
+    def on_recover(self, callback: Callable[[str], None]) -> None:
+        """
+        Registra callback chamado quando o circuito volta a fechar
+        (ex.: reprocessar trabalho enfileirado)
+        """
+        if callback not in self._on_recover:
+            self._on_recover.append(callback)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            return {
+                'state': self._current_state(now),
+                'calls_in_window': len(self._calls),
+                'failures_in_window': self._failures,
+                **self.stats,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+_recover_callbacks: List[Callable[[str], None]] = []
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(name)
+                for callback in _recover_callbacks:
+                    breaker.on_recover(callback)
+    return breaker
+
+
+def on_any_recover(callback: Callable[[str], None]) -> None:
+    """
+    Callback de recuperação para todos os upstreams, inclusive os criados depois
+    """
+    with _breakers_lock:
+        if callback not in _recover_callbacks:
+            _recover_callbacks.append(callback)
+        for breaker in _breakers.values():
+            breaker.on_recover(callback)
+
+
+def snapshot_all() -> Dict[str, Dict[str, object]]:
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
+
@@ -0,0 +1,136 @@
+"""
+ADC-Agents-Team - Dispatch Coalescer
+Janela de coalescência por projeto: em rajadas de aprovações só o estágio
+mais avançado chega ao GitHub
+
+A pendência fica no estado do pipeline (`pending_dispatch`) e um evento
+atrasado na fila durável dispara o dispatch quando a janela vence, então nada
+se perde se a instância for reciclada ou ficar sem CPU depois da resposta.
+Os estágios aprovados só são concluídos depois do dispatch.
+"""
+
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from shared.event_queue import EventQueueBackend
+from shared.pipeline_state import PipelineStateStore
+
+logger = logging.getLogger(__name__)
+
+# 0 desativa: o dispatch acontece dentro do request, como antes
+DISPATCH_COALESCE_SECONDS = float(os.environ.get('DISPATCH_COALESCE_SECONDS', '0'))
+# Limite do adiamento quando novas transições continuam chegando
+DISPATCH_COALESCE_MAX_SECONDS = float(os.environ.get('DISPATCH_COALESCE_MAX_SECONDS', '60'))
+DISPATCH_COALESCE_MAX_RETRIES = int(os.environ.get('DISPATCH_COALESCE_MAX_RETRIES', '5'))
+# Reserva da pendência durante o dispatch (cobre espera do scheduler + POST)
+DISPATCH_COALESCE_LEASE_SECONDS = float(os.environ.get('DISPATCH_COALESCE_LEASE_SECONDS', '60'))
+
+# Tipo do evento interno na fila; não é aceito pela rota HTTP
+COALESCED_DISPATCH_EVENT = 'CoalescedDispatch'
+
+
+class DispatchNotDue(Exception):
+    """Pendência ainda na janela, em retry ou reservada por outra instância"""
+
+    def __init__(self, project: str, requeue_after: float):
+        super().__init__(f"Coalesced dispatch for {project} due in {requeue_after:.1f}s")
+        self.requeue_after = max(requeue_after, 0.0)
+
+
+class DispatchFailed(Exception):
+    """Dispatch recusado de forma permanente ou sem sucesso após os retries"""
+
+    dead_letter = True
+
+
+class DispatchCoalescer:
+    """
+    Debounce por projeto: cada transição adia o dispatch por `window`
+    segundos (no máximo `max_delay` desde a primeira) e substitui o estágio
+    pendente se for mais avançado
+
+    `dispatch(project, stage, pending)` retorna True no sucesso; False é
+    falha permanente. Exceções são reagendadas até `max_retries` vezes
+    (`requeue_after` da exceção, ex.: circuito aberto, ou backoff).
+    """
+
+    def __init__(self, state: PipelineStateStore, queue: EventQueueBackend,
+                 dispatch: Callable[[str, str, Dict[str, Any]], bool],
+                 window: float = DISPATCH_COALESCE_SECONDS, max_delay: float = DISPATCH_COALESCE_MAX_SECONDS,
+                 max_retries: int = DISPATCH_COALESCE_MAX_RETRIES,
+                 lease_seconds: float = DISPATCH_COALESCE_LEASE_SECONDS,
+                 wake: Optional[Callable[[], None]] = None):
+        self.state = state
+        self.queue = queue
+        self.dispatch = dispatch
+        self.window = window
+        self.max_delay = max(max_delay, window)
+        self.max_retries = max_retries
+        self.lease_seconds = lease_seconds
+        self.wake = wake
+        self.stats = {'scheduled': 0, 'superseded': 0, 'ignored': 0, 'dispatched': 0, 'failed': 0, 'retried': 0}
+
+    def submit(self, project: str, stage: str, next_stage: str, claim: str,
+               payload: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Converte a reserva de `stage` em pendência de dispatch de `next_stage`;
+        retorna (outcome, pending) com outcome 'scheduled', 'superseded' ou 'ignored'
+        """
+        outcome, pending = self.state.schedule_dispatch(
+            project, stage, next_stage, claim, self.window, self.max_delay, payload)
+        if outcome == 'scheduled':
+            # O evento da pendência reagenda a si mesmo se a janela for estendida
+            self.queue.put({'type': COALESCED_DISPATCH_EVENT, 'project': project},
+                           delay_seconds=pending['due_at'] - time.time())
+            if self.wake:
+                self.wake()
+        self.stats[outcome] += 1
+        return outcome, pending
+
+    def process(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Processa o evento da fila: dispara a pendência vencida ou levanta
+        DispatchNotDue (reenfileira) / DispatchFailed (dead letter)
+        """
+        project = event['project']
+        pending, wait = self.state.lease_dispatch(project, self.lease_seconds)
+        if pending is None:
+            if wait:
+                raise DispatchNotDue(project, wait)
+            return {'status': 'nothing_pending', 'project': project}
+
+        token = pending['lease']['token']
+        stage = pending['stage']
+        try:
+            triggered = self.dispatch(project, stage, pending)
+        except Exception as e:
+            if pending['attempts'] < self.max_retries:
+                retry_in = getattr(e, 'requeue_after', None) or min(max(self.window, 1.0) * 2 ** pending['attempts'], 300)
+                logger.warning(f"Coalesced dispatch of {stage} for {project} deferred {retry_in:.0f}s: {e}")
+                self.state.settle_dispatch(project, token, 'retry', retry_in)
+                self.stats['retried'] += 1
+                raise DispatchNotDue(project, retry_in) from e
+            logger.error(f"Coalesced dispatch of {stage} for {project} failed: {e}")
+            triggered = False
+
+        if not triggered:
+            self.state.settle_dispatch(project, token, 'failed')
+            self.stats['failed'] += 1
+            raise DispatchFailed(f"Coalesced dispatch of {stage} for {project} failed; "
+                                 f"stages {pending['lease']['stages']} left open")
+
+        remaining = self.state.settle_dispatch(project, token, 'dispatched')
+        self.stats['dispatched'] += 1
+        if remaining:
+            # Estágio mais avançado chegou durante o dispatch: o mesmo evento o dispara
+            raise DispatchNotDue(project, remaining['due_at'] - time.time())
+        return {'status': 'dispatched', 'project': project, 'stage': stage,
+                'completed_stages': pending['lease']['stages']}
+
+
+def create_dispatch_coalescer(state: PipelineStateStore, queue: EventQueueBackend,
+                              dispatch: Callable[[str, str, Dict[str, Any]], bool],
+                              wake: Optional[Callable[[], None]] = None) -> DispatchCoalescer:
+    return DispatchCoalescer(state, queue, dispatch, wake=wake)
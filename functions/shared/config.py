@@ -0,0 +1,212 @@
+"""
+ADC-Agents-Team - Config
+Configuração e clientes carregados sob demanda (cold start mais rápido)
+"""
+
+import os
+import json
+import base64
+import logging
+import importlib
+import threading
+from functools import cached_property, wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from shared.request_log import build_handler
+
+T = TypeVar('T')
+
+_logging_configured = False
+
+
+def configure_logging() -> None:
+    """
+    Configura o logging raiz uma única vez por processo: JSON estruturado,
+    amostragem e escrita em background (shared/request_log.py)
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    root = logging.getLogger()
+    # Como o basicConfig: respeita handlers já instalados pelo runtime
+    if not root.handlers:
+        root.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+        root.addHandler(build_handler())
+    _logging_configured = True
+
+
+def lazy(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Decorator: executa `factory` na primeira chamada e reaproveita o
+    resultado nas invocações seguintes da mesma instância
+    """
+    lock = threading.Lock()
+    holder: Dict[str, Any] = {}
+
+    @wraps(factory)
+    def getter() -> T:
+        if 'value' not in holder:
+            with lock:
+                if 'value' not in holder:
+                    holder['value'] = factory()
+        return holder['value']
+
+    getter.reset = holder.clear
+    return getter
+
+
+def lazy_import(module_name: str):
+    """
+    Importa um módulo apenas quando necessário
+    """
+    return importlib.import_module(module_name)
+
+
+class Settings:
+    """
+    Variáveis de ambiente avaliadas na primeira leitura e mantidas em cache
+    """
+
+    @staticmethod
+    def _env(name: str, default: str = '') -> str:
+        return os.environ.get(name, default)
+
+    @cached_property
+    def project_name(self) -> str:
+        return self._env('PROJECT_NAME', 'unknown')
+
+    @cached_property
+    def environment(self) -> str:
+        return self._env('ENVIRONMENT', 'production')
+
+    @cached_property
+    def github_token(self) -> str:
+        return self._env('GITHUB_TOKEN')
+
+    @cached_property
+    def github_owner(self) -> str:
+        return self._env('GITHUB_OWNER')
+
+    @cached_property
+    def linear_api_key(self) -> str:
+        return self._env('LINEAR_API_KEY')
+
+    @cached_property
+    def linear_webhook_secret(self) -> str:
+        return self._env('LINEAR_WEBHOOK_SECRET')
+
+    @cached_property
+    def admin_token(self) -> str:
+        return self._env('ADMIN_TOKEN')
+
+    @cached_property
+    def admin_secret(self) -> str:
+        """
+        Token das rotas operacionais: ADMIN_TOKEN ou, na falta dele, o secret do webhook
+        """
+        return self.admin_token or self.linear_webhook_secret
+
+    @cached_property
+    def drive_folder_id(self) -> str:
+        return self._env('DRIVE_FOLDER_ID')
+
+    @cached_property
+    def artifacts_bucket(self) -> str:
+        return self._env('ARTIFACTS_BUCKET')
+
+    @cached_property
+    def auto_approve_stages(self) -> frozenset:
+        return frozenset(s.strip() for s in self._env('AUTO_APPROVE_STAGES', 'L3,L5,L7,L8').split(',') if s.strip())
+
+    @cached_property
+    def google_credentials_info(self) -> Optional[Dict[str, Any]]:
+        """
+        Service account JSON (GOOGLE_CREDENTIALS em base64), decodificado
+        apenas quando alguma ação do Drive/GCS precisar dele
+        """
+        raw = self._env('GOOGLE_CREDENTIALS')
+        if not raw:
+            return None
+        return json.loads(base64.b64decode(raw))
+
+    @cached_property
+    def pipeline_stages(self) -> List[Dict[str, Any]]:
+        """
+        Definição dos estágios (locals.pipeline_stages serializado pelo Terraform)
+        """
+        raw = self._env('PIPELINE_STAGES')
+        return json.loads(raw) if raw else []
+
+    @cached_property
+    def google_access_token(self) -> str:
+        """
+        Token OAuth fixo (desenvolvimento local e fakes); dispensa a service account
+        """
+        return self._env('GOOGLE_ACCESS_TOKEN')
+
+    def reload(self) -> None:
+        """
+        Descarta os valores em cache (testes)
+        """
+        for name, value in type(self).__dict__.items():
+            if isinstance(value, cached_property):
+                self.__dict__.pop(name, None)
+
+
+settings = Settings()
+
+
+_credentials_cache: Dict[Tuple[str, ...], Any] = {}
+_credentials_lock = threading.Lock()
+
+
+def get_google_credentials(scopes: Tuple[str, ...]):
+    """
+    Credenciais da service account (google-auth importado sob demanda)
+    """
+    with _credentials_lock:
+        credentials = _credentials_cache.get(scopes)
+        if credentials is None:
+            info = settings.google_credentials_info
+            if info is None:
+                raise RuntimeError('GOOGLE_CREDENTIALS not configured')
+            service_account = lazy_import('google.oauth2.service_account')
+            credentials = service_account.Credentials.from_service_account_info(info, scopes=list(scopes))
+            _credentials_cache[scopes] = credentials
+        return credentials
+
+
+def get_access_token(scopes: Tuple[str, ...]) -> str:
+    """
+    Access token OAuth válido para os escopos (renovado quando expira)
+    """
+    if settings.google_access_token:
+        return settings.google_access_token
+    credentials = get_google_credentials(scopes)
+    with _credentials_lock:
+        if not credentials.valid:
+            transport = lazy_import('google.auth.transport.requests')
+            credentials.refresh(transport.Request())
+        return credentials.token
+
+
+@lazy
+def get_storage_client():
+    """
+    Cliente google-cloud-storage, importado apenas no primeiro uso
+    """
+    storage = lazy_import('google.cloud.storage')
+    info = settings.google_credentials_info
+    if info is None:
+        return storage.Client()
+    credentials = get_google_credentials(('https://www.googleapis.com/auth/devstorage.read_write',))
+    return storage.Client(project=info.get('project_id'), credentials=credentials)
+
+
+@lazy
+def get_cloud_logging_client():
+    """
+    Cliente google-cloud-logging, importado apenas no primeiro uso
+    """
+    cloud_logging = lazy_import('google.cloud.logging')
+    return cloud_logging.Client()
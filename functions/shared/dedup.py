@@ -0,0 +1,146 @@
+"""
+ADC-Agents-Team - Dedup Cache
+Cache de idempotência para entregas repetidas de webhooks
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class SQLiteDedupStore:
+    """
+    Camada persistente opcional (compartilhada entre instâncias que
+    montam o mesmo arquivo, ou entre reinícios da mesma instância)
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS dedup_keys (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)'
+        )
+
+    def add_if_absent(self, key: str, expires_at: float) -> bool:
+        """
+        Registra a chave; retorna False se ela já existia e não expirou
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute('DELETE FROM dedup_keys WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO dedup_keys (key, expires_at) VALUES (?, ?)',
+                (key, expires_at)
+            )
+            return cursor.rowcount == 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM dedup_keys WHERE key = ?', (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'DELETE FROM dedup_keys WHERE expires_at <= ?', (time.time(),)
+            ).rowcount
+
+
+class DedupCache:
+    """
+    Cache TTL + LRU em memória, com camada persistente opcional
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: float = 3600.0,
+        store: Optional[SQLiteDedupStore] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+
+    def check_and_mark(self, keys: Iterable[str]) -> bool:
+        """
+        Retorna True se alguma chave já foi vista; caso contrário marca todas
+        """
+        keys = [k for k in keys if k]
+        if not keys:
+            return False
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry > now:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return True
+                    del self._entries[key]
+
+            if self.store is not None:
+                for key in keys:
+                    if not self.store.add_if_absent(key, expires_at):
+                        self._remember(key, expires_at)
+                        self.hits += 1
+                        self.persistent_hits += 1
+                        return True
+
+            for key in keys:
+                self._remember(key, expires_at)
+            self.misses += 1
+            return False
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """
+        Remove chaves (ex.: processamento falhou e o retry deve passar)
+        """
+        with self._lock:
+            for key in keys:
+                if not key:
+                    continue
+                self._entries.pop(key, None)
+                if self.store is not None:
+                    self.store.discard(key)
+
+    def _remember(self, key: str, expires_at: float) -> None:
+        self._entries[key] = expires_at
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'persistent_hits': self.persistent_hits,
+            'evictions': self.evictions,
+            'size': len(self._entries)
+        }
+
+
+def create_dedup_cache() -> DedupCache:
+    """
+    Cria o cache a partir das variáveis de ambiente DEDUP_*
+    """
+    store_path = os.environ.get('DEDUP_STORE_PATH', '')
+    return DedupCache(
+        max_entries=int(os.environ.get('DEDUP_MAX_ENTRIES', '10000')),
+        ttl_seconds=float(os.environ.get('DEDUP_TTL_SECONDS', '3600')),
+        store=SQLiteDedupStore(store_path) if store_path else None
+    )
@@ -0,0 +1,225 @@
+"""
+ADC-Agents-Team - Drive Client
+Cliente REST do Google Drive v3 (listagem paginada, download em streaming)
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from shared import http_client
+from shared.config import get_access_token
+
+logger = logging.getLogger(__name__)
+
+DRIVE_API_URL = os.environ.get('DRIVE_API_URL', 'https://www.googleapis.com/drive/v3')
+DRIVE_UPLOAD_URL = os.environ.get('DRIVE_UPLOAD_URL', 'https://www.googleapis.com/upload/drive/v3')
+DRIVE_BATCH_URL = os.environ.get('DRIVE_BATCH_URL', 'https://www.googleapis.com/batch/drive/v3')
+DRIVE_SCOPES = ('https://www.googleapis.com/auth/drive',)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+GOOGLE_APPS_PREFIX = 'application/vnd.google-apps.'
+GOOGLE_DOC_MIME_TYPE = 'application/vnd.google-apps.document'
+
+# Formatos nativos do Google exportados para arquivos Office
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    'application/vnd.google-apps.document': (
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'),
+    'application/vnd.google-apps.spreadsheet': (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    'application/vnd.google-apps.presentation': (
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation', '.pptx'),
+    'application/vnd.google-apps.drawing': ('application/pdf', '.pdf'),
+}
+
+# Field mask: só os campos usados por backup/organização
+FILE_FIELDS = 'id,name,mimeType,parents,md5Checksum,modifiedTime,size'
+LIST_PAGE_SIZE = 1000
+# Limite de chamadas por request batch da API do Drive
+MAX_BATCH_SIZE = 100
+
+_STATUS_LINE = re.compile(rb'^HTTP/1\.[01] (\d{3})', re.MULTILINE)
+_CONTENT_ID = re.compile(rb'Content-ID:\s*<response-item(\d+)>', re.IGNORECASE)
+
+
+class DriveError(Exception):
+    """Erro retornado pela API do Drive"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class DriveClient:
+    """
+    Operações do Drive usadas pelo proxy, via sessão HTTP compartilhada
+    """
+
+    def __init__(self, token_provider: Optional[Callable[[], str]] = None, url: Optional[str] = None,
+                 batch_url: Optional[str] = None, upload_url: Optional[str] = None):
+        self.url = (url or DRIVE_API_URL).rstrip('/')
+        self.upload_url = (upload_url or DRIVE_UPLOAD_URL).rstrip('/')
+        self.batch_url = batch_url or DRIVE_BATCH_URL
+        self._api_path = urlsplit(self.url).path
+        self._token_provider = token_provider or (lambda: get_access_token(DRIVE_SCOPES))
+
+    def _headers(self) -> Dict[str, str]:
+        return {'Authorization': f"Bearer {self._token_provider()}"}
+
+    def _check(self, response, action: str) -> None:
+        if response.status_code >= 400:
+            raise DriveError(f"Drive {action} returned {response.status_code}: {response.text[:200]}",
+                             response.status_code)
+
+    def list_children(self, folder_id: str, fields: str = FILE_FIELDS,
+                      query: str = '') -> Iterator[Dict[str, Any]]:
+        """
+        Itera os filhos diretos da pasta, página a página (pageSize máximo)
+        """
+        params = {
+            'q': f"'{folder_id}' in parents and trashed = false" + (f" and {query}" if query else ''),
+            'pageSize': LIST_PAGE_SIZE,
+            'fields': f"nextPageToken,files({fields})",
+            'supportsAllDrives': 'true',
+            'includeItemsFromAllDrives': 'true',
+        }
+        while True:
+            response = http_client.get(f"{self.url}/files", params=params, headers=self._headers())
+            self._check(response, 'list')
+            body = response.json()
+            yield from body.get('files', [])
+            token = body.get('nextPageToken')
+            if not token:
+                return
+            params['pageToken'] = token
+
+    def walk(self, folder_id: str, fields: str = FILE_FIELDS) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Percorre a árvore em largura; retorna (caminho relativo da pasta, arquivo)
+        """
+        pending = deque([(folder_id, '')])
+        while pending:
+            current, path = pending.popleft()
+            for item in self.list_children(current, fields):
+                if item.get('mimeType') == FOLDER_MIME_TYPE:
+                    pending.append((item['id'], f"{path}{item['name']}/"))
+                else:
+                    yield path, item
+
+    def open_media(self, file: Dict[str, Any]):
+        """
+        Abre o conteúdo do arquivo em streaming (exporta formatos nativos)
+        """
+        mime_type = file.get('mimeType', '')
+        if mime_type in EXPORT_FORMATS:
+            url = f"{self.url}/files/{file['id']}/export"
+            params = {'mimeType': EXPORT_FORMATS[mime_type][0]}
+        else:
+            url = f"{self.url}/files/{file['id']}"
+            params = {'alt': 'media', 'supportsAllDrives': 'true'}
+        response = http_client.get(url, params=params, headers=self._headers(), stream=True)
+        if response.status_code >= 400:
+            try:
+                self._check(response, 'download')
+            finally:
+                response.close()
+        return response
+
+    def create_folder(self, name: str, parent_id: str) -> Dict[str, Any]:
+        response = http_client.post(
+            f"{self.url}/files",
+            params={'fields': 'id,name', 'supportsAllDrives': 'true'},
+            headers=self._headers(),
+            json={'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]}
+        )
+        self._check(response, 'create folder')
+        return response.json()
+
+    def create_file(self, name: str, content: str, folder_id: str, source_mime_type: str = 'text/markdown',
+                    mime_type: str = GOOGLE_DOC_MIME_TYPE) -> Dict[str, Any]:
+        """
+        Cria o arquivo num único upload multipart (metadados + conteúdo);
+        com `mime_type` de Google Docs o Drive converte o conteúdo
+        """
+        boundary = f"part_{uuid.uuid4().hex}"
+        metadata = json.dumps({'name': name, 'mimeType': mime_type, 'parents': [folder_id]})
+        body = (
+            f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n{metadata}\r\n"
+            f"--{boundary}\r\nContent-Type: {source_mime_type}; charset=UTF-8\r\n\r\n{content}\r\n"
+            f"--{boundary}--\r\n"
+        ).encode()
+        response = http_client.post(
+            f"{self.upload_url}/files",
+            params={'uploadType': 'multipart', 'fields': 'id,name,mimeType,webViewLink',
+                    'supportsAllDrives': 'true'},
+            headers={**self._headers(), 'Content-Type': f"multipart/related; boundary={boundary}"},
+            data=body
+        )
+        self._check(response, 'upload')
+        return response.json()
+
+    def batch_move(self, moves: List[Tuple[str, str, str]]) -> List[int]:
+        """
+        Move até MAX_BATCH_SIZE arquivos num único request multipart/mixed;
+        `moves` são (file_id, nova pasta, pasta atual). Retorna o status de cada item
+        """
+        if len(moves) > MAX_BATCH_SIZE:
+            raise ValueError(f"Drive batch accepts at most {MAX_BATCH_SIZE} calls")
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for index, (file_id, add_parent, remove_parent) in enumerate(moves):
+            query = urlencode({'addParents': add_parent, 'removeParents': remove_parent,
+                               'fields': 'id', 'supportsAllDrives': 'true'})
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <item{index}>\r\n\r\n"
+                f"PATCH {self._api_path}/files/{file_id}?{query} HTTP/1.1\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{{}}\r\n"
+            )
+        body = (''.join(parts) + f"--{boundary}--\r\n").encode()
+
+        response = http_client.post(
+            self.batch_url, data=body,
+            headers={**self._headers(), 'Content-Type': f"multipart/mixed; boundary={boundary}"}
+        )
+        self._check(response, 'batch')
+        return parse_batch_statuses(response.headers.get('Content-Type', ''), response.content, len(moves))
+
+
+def parse_batch_statuses(content_type: str, content: bytes, expected: int) -> List[int]:
+    """
+    Status HTTP de cada parte da resposta batch, na ordem dos itens enviados
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    statuses = [0] * expected
+    if not match:
+        return statuses
+    for position, part in enumerate(content.split(b'--' + match.group(1).encode())[1:]):
+        status = _STATUS_LINE.search(part)
+        if status is None:
+            continue
+        content_id = _CONTENT_ID.search(part)
+        index = int(content_id.group(1)) if content_id else position
+        if index < expected:
+            statuses[index] = int(status.group(1))
+    return statuses
+
+
+def is_backup_supported(file: Dict[str, Any]) -> bool:
+    """
+    Formatos nativos sem exportação (forms, atalhos, sites) ficam de fora
+    """
+    mime_type = file.get('mimeType', '')
+    return not mime_type.startswith(GOOGLE_APPS_PREFIX) or mime_type in EXPORT_FORMATS
+
+
+def export_extension(file: Dict[str, Any]) -> str:
+    return EXPORT_FORMATS.get(file.get('mimeType', ''), ('', ''))[1]
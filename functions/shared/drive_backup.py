@@ -0,0 +1,229 @@
+"""
+ADC-Agents-Team - Drive Backup
+Backup em streaming da árvore do Drive para o GCS (full ou incremental)
+
+Cada execução é um snapshot em `{prefix}/{backup_id}/` (arquivos + manifesto):
+o incremental só transfere arquivos alterados e copia os demais server-side
+do snapshot anterior. Arquivos apagados no Drive ficam fora do novo snapshot e
+somem junto com os snapshots antigos (lifecycle do bucket).
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.drive import DriveClient, export_extension, is_backup_supported
+from shared.gcs import GCSClient, align_chunk_size, md5_base64_to_hex
+
+logger = logging.getLogger(__name__)
+
+# Memória máxima em voo ~ BACKUP_CONCURRENCY * BACKUP_CHUNK_MB
+DEFAULT_CHUNK_SIZE = align_chunk_size(int(float(os.environ.get('BACKUP_CHUNK_MB', '8')) * 1024 * 1024))
+DEFAULT_CONCURRENCY = int(os.environ.get('BACKUP_CONCURRENCY', '4'))
+DEFAULT_MAX_SECONDS = float(os.environ.get('BACKUP_MAX_SECONDS', '240'))
+READ_SIZE = 1024 * 1024
+
+MANIFEST_NAME = 'manifest.json'
+BACKUP_TYPES = ('full', 'incremental')
+
+
+def load_manifest(gcs: GCSClient, bucket: str, prefix: str) -> Dict[str, Any]:
+    raw = gcs.download_bytes(bucket, f"{prefix}/{MANIFEST_NAME}")
+    if not raw:
+        return {'files': {}}
+    return json.loads(raw)
+
+
+def file_version(file: Dict[str, Any]) -> str:
+    """
+    Identidade do conteúdo: md5 para binários, modifiedTime para formatos nativos
+    """
+    return file.get('md5Checksum') or f"mtime:{file.get('modifiedTime', '')}"
+
+
+class DriveBackup:
+    """
+    Percorre a pasta do Drive e envia cada arquivo ao GCS em chunks,
+    com no máximo `concurrency` arquivos em voo
+    """
+
+    def __init__(self, drive: DriveClient, gcs: GCSClient, bucket: str, prefix: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+                 max_seconds: float = DEFAULT_MAX_SECONDS):
+        self.drive = drive
+        self.gcs = gcs
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.chunk_size = align_chunk_size(chunk_size)
+        self.concurrency = max(1, concurrency)
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+
+    def _object_name(self, backup_id: str, path: str, file: Dict[str, Any], used: Dict[str, str]) -> str:
+        name = f"{self.prefix}/{backup_id}/files/{path}{file['name']}{export_extension(file)}"
+        # Nomes duplicados são permitidos no Drive: desambigua pelo id
+        if used.setdefault(name, file['id']) != file['id']:
+            name = f"{name}.{file['id']}"
+        return name
+
+    def _stream_file(self, file: Dict[str, Any], object_name: str) -> int:
+        """
+        Download → upload resumable sem manter o arquivo inteiro em memória
+        """
+        response = self.drive.open_media(file)
+        upload = self.gcs.start_resumable(
+            self.bucket, object_name,
+            metadata={'drive_file_id': file['id'], 'drive_modified_time': file.get('modifiedTime', '')}
+        )
+        digest = hashlib.md5()
+        buffer = bytearray()
+        try:
+            for piece in response.iter_content(chunk_size=READ_SIZE):
+                digest.update(piece)
+                buffer += piece
+                # Só envia quando sobra algo: o último chunk carrega o tamanho total
+                while len(buffer) > self.chunk_size:
+                    upload.send(bytes(buffer[:self.chunk_size]))
+                    del buffer[:self.chunk_size]
+            resource = upload.send(bytes(buffer), final=True)
+        finally:
+            response.close()
+
+        expected = file.get('md5Checksum')
+        if expected and digest.hexdigest() != expected:
+            raise ValueError(f"md5 mismatch for {file['id']}: drive {expected}, read {digest.hexdigest()}")
+        stored = md5_base64_to_hex((resource or {}).get('md5Hash', ''))
+        if stored and stored != digest.hexdigest():
+            raise ValueError(f"md5 mismatch for {file['id']}: read {digest.hexdigest()}, gcs {stored}")
+        return upload.offset
+
+    @staticmethod
+    def _plan(file: Dict[str, Any], previous: Optional[Dict[str, Any]], full: bool) -> str:
+        """
+        'upload' (conteúdo novo/alterado) ou 'copy' (mesma versão: rewrite server-side)
+        """
+        if full or previous is None or previous.get('version') != file_version(file):
+            return 'upload'
+        return 'copy'
+
+    def run(self, folder_id: str, backup_type: str = 'incremental') -> Dict[str, Any]:
+        if backup_type not in BACKUP_TYPES:
+            raise ValueError(f"Unknown backup_type: {backup_type}")
+
+        started = time.monotonic()
+        deadline = started + self.max_seconds
+        backup_id = f"{backup_type}_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}"
+        full = backup_type == 'full'
+
+        previous_files = load_manifest(self.gcs, self.bucket, self.prefix).get('files', {})
+        files: Dict[str, Dict[str, Any]] = {}
+        counts = {'scanned': 0, 'uploaded': 0, 'unchanged': 0, 'skipped': 0, 'failed': 0}
+        failures: List[Dict[str, str]] = []
+        bytes_uploaded = 0
+        seen = set()
+        used_names: Dict[str, str] = {}
+        truncated = False
+
+        # Semáforo limita tarefas pendentes: a listagem não corre à frente dos uploads
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+
+        def process(file: Dict[str, Any], object_name: str, action: str, entry: Dict[str, Any]) -> None:
+            nonlocal bytes_uploaded
+            try:
+                if action == 'upload':
+                    size = self._stream_file(file, object_name)
+                else:
+                    self.gcs.copy(self.bucket, previous_files[file['id']]['object'], object_name)
+                    size = 0
+                with self._lock:
+                    files[file['id']] = entry
+                    counts['uploaded' if action == 'upload' else 'unchanged'] += 1
+                    bytes_uploaded += size
+            except Exception as e:
+                logger.warning(f"Backup of {file['id']} ({file.get('name')}) failed: {e}")
+                with self._lock:
+                    counts['failed'] += 1
+                    failures.append({'id': file['id'], 'name': file.get('name', ''), 'error': str(e)[:200]})
+                    # Mantém a cópia do snapshot anterior no manifesto: o próximo incremental tenta de novo
+                    if file['id'] in previous_files:
+                        files[file['id']] = previous_files[file['id']]
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='drive-backup') as executor:
+            for path, file in self.drive.walk(folder_id):
+                if time.monotonic() > deadline:
+                    truncated = True
+                    break
+                counts['scanned'] += 1
+                seen.add(file['id'])
+                if not is_backup_supported(file):
+                    counts['skipped'] += 1
+                    continue
+
+                object_name = self._object_name(backup_id, path, file, used_names)
+                action = self._plan(file, previous_files.get(file['id']), full)
+                entry = {
+                    'object': object_name,
+                    'version': file_version(file),
+                    'modifiedTime': file.get('modifiedTime'),
+                    'size': int(file.get('size') or 0),
+                }
+
+                slots.acquire()
+                executor.submit(process, file, object_name, action, entry)
+
+        if truncated:
+            # Execução parcial: arquivos não visitados continuam no manifesto
+            for file_id, entry in previous_files.items():
+                if file_id not in seen:
+                    files.setdefault(file_id, entry)
+        removed = 0 if truncated else len(set(previous_files) - seen)
+
+        manifest = {
+            'folder_id': folder_id,
+            'updated_at': datetime.utcnow().isoformat() + 'Z',
+            'last_backup': {'backup_id': backup_id, 'backup_type': backup_type, 'complete': not truncated},
+            'files': files
+        }
+        body = json.dumps(manifest, separators=(',', ':')).encode()
+        # Manifesto do snapshot (restauração pontual) e o da raiz, base do próximo incremental
+        snapshot_manifest = f"{self.prefix}/{backup_id}/{MANIFEST_NAME}"
+        self.gcs.upload_bytes(self.bucket, snapshot_manifest, body)
+        self.gcs.upload_bytes(self.bucket, f"{self.prefix}/{MANIFEST_NAME}", body)
+
+        return {
+            'status': 'backup_partial' if truncated or counts['failed'] else 'backup_created',
+            'backup_type': backup_type,
+            'backup_id': backup_id,
+            'bucket': self.bucket,
+            'prefix': self.prefix,
+            'manifest': snapshot_manifest,
+            'files_scanned': counts['scanned'],
+            'files_uploaded': counts['uploaded'],
+            'files_unchanged': counts['unchanged'],
+            'files_skipped': counts['skipped'],
+            'files_removed': removed,
+            'files_failed': counts['failed'],
+            'failures': failures[:20],
+            'bytes_uploaded': bytes_uploaded,
+            'size_mb': round(bytes_uploaded / (1024 * 1024), 2),
+            'truncated': truncated,
+            'duration_ms': int((time.monotonic() - started) * 1000)
+        }
+
+
+def split_backup_target(target: str, default_prefix: str) -> Tuple[Optional[str], str]:
+    """
+    `gs://bucket/prefix` → (bucket, prefix); outros valores viram só o prefixo
+    """
+    if target and target.startswith('gs://'):
+        bucket, _, prefix = target[len('gs://'):].partition('/')
+        return bucket, prefix or default_prefix
+    return None, target or default_prefix
@@ -0,0 +1,249 @@
+"""
+ADC-Agents-Team - Drive Organizer
+Organiza artefatos da pasta do projeto por regras pré-compiladas
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.drive import FOLDER_MIME_TYPE, MAX_BATCH_SIZE, DriveClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.environ.get('ORGANIZE_CONCURRENCY', '4'))
+RETRYABLE_STATUSES = {0, 403, 429, 500, 502, 503, 504}
+
+# Estrutura criada pelo Terraform (locals.drive_folder_structure)
+DEFAULT_STAGE_FOLDERS = {
+    'L1': 'L1-L3_Planning/L1-Requirements',
+    'L2': 'L1-L3_Planning/L2-Architecture',
+    'L3': 'L1-L3_Planning/L3-Design',
+    'L4': 'L4-L6_Development/L4-Backend',
+    'L5': 'L4-L6_Development/L5-Frontend',
+    'L6': 'L4-L6_Development/L6-Testing',
+    'L7': 'L7-L9_Deploy/L7-Deploy',
+    'L8': 'L7-L9_Deploy/L8-Monitoring',
+    'L9': 'L7-L9_Deploy/L9-Documentation',
+}
+
+DEFAULT_EXTENSION_FOLDERS = {
+    '.png': 'Assets/Images', '.jpg': 'Assets/Images', '.jpeg': 'Assets/Images',
+    '.svg': 'Assets/Images', '.gif': 'Assets/Images',
+    '.mp4': 'Assets/Videos', '.mov': 'Assets/Videos', '.webm': 'Assets/Videos',
+    '.csv': 'Assets/Exports',
+    '.log': 'Automation/Logs',
+    '.tfstate': 'Automation/Terraform-State',
+}
+
+# "L3: Título", "L3 - Título", "L3_titulo"...
+STAGE_PREFIX = re.compile(r'^\s*\[?(L\d+)\]?\s*[:\-_ ]')
+
+
+class RuleIndex:
+    """
+    Regras compiladas uma vez: stage e extensão viram lookups em dict,
+    regexes viram uma única alternação (primeira regra que casa vence)
+
+    Ordem de precedência: regex > estágio > extensão > mime type
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None, use_defaults: bool = True):
+        rules = rules or {}
+        self.stages: Dict[str, str] = dict(DEFAULT_STAGE_FOLDERS) if use_defaults else {}
+        self.stages.update({k.upper(): v for k, v in (rules.get('stage') or {}).items()})
+
+        self.extensions: Dict[str, str] = dict(DEFAULT_EXTENSION_FOLDERS) if use_defaults else {}
+        self.extensions.update({self._normalize_extension(k): v for k, v in (rules.get('extension') or {}).items()})
+
+        self.mime_types: Dict[str, str] = dict(rules.get('mime_type') or {})
+
+        self.regex_targets: List[str] = []
+        self._regex: Optional[re.Pattern] = None
+        self._regex_list: List[Tuple[re.Pattern, str]] = []
+        self._compile_regexes(rules.get('regex') or {})
+
+    @staticmethod
+    def _normalize_extension(extension: str) -> str:
+        extension = extension.lower()
+        return extension if extension.startswith('.') else f".{extension}"
+
+    def _compile_regexes(self, regexes) -> None:
+        # Aceita {"padrão": "destino"} ou [{"pattern": ..., "target": ...}]
+        if isinstance(regexes, dict):
+            regexes = [{'pattern': p, 'target': t} for p, t in regexes.items()]
+        patterns = []
+        for rule in regexes:
+            compiled = re.compile(rule['pattern'], re.IGNORECASE)
+            self._regex_list.append((compiled, rule['target']))
+            self.regex_targets.append(rule['target'])
+            patterns.append(f"(?P<r{len(patterns)}>.*?(?:{rule['pattern']}))")
+        # Padrões com grupos próprios (backreferences numeradas) não podem ser
+        # combinados: nesse caso são testados um a um
+        if patterns and not any(compiled.groups for compiled, _ in self._regex_list):
+            self._regex = re.compile('|'.join(patterns), re.IGNORECASE | re.DOTALL)
+
+    def __len__(self) -> int:
+        return len(self.stages) + len(self.extensions) + len(self.mime_types) + len(self.regex_targets)
+
+    def match(self, file: Dict[str, Any]) -> Optional[str]:
+        """
+        Pasta de destino (caminho relativo) ou None
+        """
+        name = file.get('name', '')
+
+        if self._regex is not None:
+            found = self._regex.match(name)
+            if found:
+                return self.regex_targets[int(found.lastgroup[1:])]
+        else:
+            for pattern, target in self._regex_list:
+                if pattern.search(name):
+                    return target
+
+        stage = STAGE_PREFIX.match(name)
+        if stage:
+            target = self.stages.get(stage.group(1).upper())
+            if target:
+                return target
+
+        lower = name.lower()
+        dot = lower.rfind('.')
+        if dot > 0:
+            # Sufixo composto primeiro (".tar.gz"), depois o simples
+            second = lower.rfind('.', 0, dot)
+            if second > 0 and lower[second:] in self.extensions:
+                return self.extensions[lower[second:]]
+            if lower[dot:] in self.extensions:
+                return self.extensions[lower[dot:]]
+
+        return self.mime_types.get(file.get('mimeType', ''))
+
+
+class FolderResolver:
+    """
+    Resolve caminhos relativos à pasta raiz em ids, listando cada pasta
+    pai uma única vez e criando as que faltarem
+    """
+
+    def __init__(self, drive: DriveClient, root_id: str, create_missing: bool = True):
+        self.drive = drive
+        self.root_id = root_id
+        self.create_missing = create_missing
+        self.folders_created = 0
+        self._children: Dict[str, Dict[str, str]] = {}
+
+    def _child_folders(self, parent_id: str) -> Dict[str, str]:
+        if parent_id not in self._children:
+            self._children[parent_id] = {
+                item['name']: item['id']
+                for item in self.drive.list_children(parent_id, fields='id,name',
+                                                     query=f"mimeType = '{FOLDER_MIME_TYPE}'")
+            }
+        return self._children[parent_id]
+
+    def resolve(self, path: str) -> Optional[str]:
+        current = self.root_id
+        for segment in (s for s in path.split('/') if s):
+            children = self._child_folders(current)
+            folder_id = children.get(segment)
+            if folder_id is None:
+                if not self.create_missing:
+                    return None
+                folder_id = self.drive.create_folder(segment, current)['id']
+                children[segment] = folder_id
+                self.folders_created += 1
+            current = folder_id
+        return current
+
+
+def organize_folder(drive: DriveClient, source_folder: str, rules: Optional[Dict[str, Any]] = None,
+                    use_defaults: bool = True, dry_run: bool = False,
+                    concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Move os arquivos soltos na raiz da pasta para o destino da regra
+    correspondente, em requests batch de até MAX_BATCH_SIZE movimentos
+    """
+    started = time.monotonic()
+    index = RuleIndex(rules, use_defaults)
+    resolver = FolderResolver(drive, source_folder, create_missing=not dry_run)
+
+    counts = {'scanned': 0, 'matched': 0, 'moved': 0, 'unmatched': 0, 'failed': 0}
+    by_target: Dict[str, int] = {}
+    pending: List[Tuple[str, str, str]] = []
+    target_ids: Dict[str, Optional[str]] = {}
+
+    for file in drive.list_children(source_folder, fields='id,name,mimeType',
+                                    query=f"mimeType != '{FOLDER_MIME_TYPE}'"):
+        counts['scanned'] += 1
+        target = index.match(file)
+        if target is None:
+            counts['unmatched'] += 1
+            continue
+        counts['matched'] += 1
+        by_target[target] = by_target.get(target, 0) + 1
+        if dry_run:
+            continue
+        if target not in target_ids:
+            target_ids[target] = resolver.resolve(target)
+        folder_id = target_ids[target]
+        if folder_id and folder_id != source_folder:
+            pending.append((file['id'], folder_id, source_folder))
+
+    failures: List[str] = []
+    batches = 0
+    lock = threading.Lock()
+
+    def run_batch(moves: List[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+        nonlocal batches
+        try:
+            statuses = drive.batch_move(moves)
+        except Exception as e:
+            logger.warning(f"Drive batch of {len(moves)} moves failed: {e}")
+            statuses = [0] * len(moves)
+        retry = []
+        with lock:
+            batches += 1
+            for move, status in zip(moves, statuses):
+                if 200 <= status < 300:
+                    counts['moved'] += 1
+                elif status in RETRYABLE_STATUSES:
+                    retry.append(move)
+                else:
+                    counts['failed'] += 1
+                    failures.append(f"{move[0]}: HTTP {status}")
+        return retry
+
+    # Uma rodada de retry para itens com rate limit/erro transitório
+    for attempt in range(2):
+        if not pending:
+            break
+        if attempt:
+            time.sleep(1.0)
+        chunks = [pending[i:i + MAX_BATCH_SIZE] for i in range(0, len(pending), MAX_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='drive-organize') as executor:
+            pending = [move for retry in executor.map(run_batch, chunks) for move in retry]
+
+    if pending:
+        counts['failed'] += len(pending)
+        failures.extend(f"{move[0]}: retries exhausted" for move in pending)
+
+    return {
+        'status': 'dry_run' if dry_run else ('organized' if not counts['failed'] else 'partially_organized'),
+        'source_folder': source_folder,
+        'files_scanned': counts['scanned'],
+        'files_matched': counts['matched'],
+        'files_processed': counts['moved'],
+        'files_unmatched': counts['unmatched'],
+        'files_failed': counts['failed'],
+        'failures': failures[:20],
+        'folders_created': resolver.folders_created,
+        'rules_applied': len(index),
+        'moves_by_target': by_target,
+        'batches': batches,
+        'duration_ms': int((time.monotonic() - started) * 1000)
+    }
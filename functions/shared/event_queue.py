@@ -0,0 +1,331 @@
+"""
+ADC-Agents-Team - Event Queue
+Fila durável de eventos para o modo ack-then-process dos webhooks
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.path.join('/tmp', 'adc-event-queue.sqlite3')
+
+# Id opaco do evento: inteiro no SQLite, id do documento no Firestore
+EventId = Union[int, str]
+
+
+class EventQueueBackend:
+    """
+    Interface dos backends de fila
+
+    Um evento reservado por `claim` fica invisível até `ack` (remove),
+    `nack` (volta para a fila com backoff) ou até o lease expirar.
+    """
+
+    def put(self, payload: Dict[str, Any], delay_seconds: float = 0.0) -> EventId:
+        raise NotImplementedError
+
+    def claim(self, batch_size: int, lease_seconds: float) -> List[Tuple[EventId, Dict[str, Any], int]]:
+        raise NotImplementedError
+
+    def ack(self, event_ids: List[EventId]) -> None:
+        raise NotImplementedError
+
+    def nack(self, event_id: EventId, delay_seconds: float, dead: bool = False,
+             refund_attempt: bool = False) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class SQLiteEventQueue(EventQueueBackend):
+    """
+    Backend SQLite (arquivo local), usado em testes e instâncias únicas
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_events_ready ON events (status, available_at, id)'
+        )
+
+    def put(self, payload: Dict[str, Any], delay_seconds: float = 0.0) -> int:
+        now = time.time()
+        body = json.dumps(payload, separators=(',', ':'))
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO events (payload, available_at, created_at) VALUES (?, ?, ?)',
+                (body, now + max(delay_seconds, 0.0), now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, batch_size: int, lease_seconds: float) -> List[Tuple[int, Dict[str, Any], int]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload, attempts FROM events "
+                    "WHERE status = 'pending' AND available_at <= ? ORDER BY id LIMIT ?",
+                    (now, batch_size)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        'UPDATE events SET available_at = ?, attempts = attempts + 1 WHERE id = ?',
+                        [(now + lease_seconds, row[0]) for row in rows]
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [(row[0], json.loads(row[1]), row[2] + 1) for row in rows]
+
+    def ack(self, event_ids: List[int]) -> None:
+        if not event_ids:
+            return
+        with self._lock:
+            self._conn.executemany('DELETE FROM events WHERE id = ?', [(i,) for i in event_ids])
+
+    def nack(self, event_id: int, delay_seconds: float, dead: bool = False,
+             refund_attempt: bool = False) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE events SET status = ?, available_at = ?, attempts = MAX(attempts - ?, 0) WHERE id = ?',
+                ('dead' if dead else 'pending', time.time() + delay_seconds, int(refund_attempt), event_id)
+            )
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM events WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM events WHERE status = 'dead' ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class FirestoreEventQueue(EventQueueBackend):
+    """
+    Backend Firestore (um documento por evento), compartilhado entre as
+    instâncias: eventos aceitos com 202 sobrevivem à reciclagem da instância
+    e qualquer instância os drena
+
+    `claim` grava o lease com precondição de updateTime, então duas
+    instâncias nunca reservam o mesmo evento; consultas usam os índices
+    (status, available_at) e (status, created_at) criados pelo Terraform.
+    """
+
+    def __init__(self, client, collection: str):
+        self.client = client
+        self.collection = collection
+
+    def put(self, payload: Dict[str, Any], delay_seconds: float = 0.0) -> str:
+        now = time.time()
+        # Prefixo temporal mantém os ids na ordem de chegada (logs e dead letters)
+        event_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        write = self.client.update_write(self.collection, event_id, {
+            'payload': json.dumps(payload, separators=(',', ':')),
+            'status': 'pending',
+            'attempts': 0,
+            'available_at': now + max(delay_seconds, 0.0),
+            'created_at': now
+        }, exists=False)
+        if self.client.commit([write]) is None:
+            raise RuntimeError(f"Event {event_id} already exists")
+        return event_id
+
+    def claim(self, batch_size: int, lease_seconds: float) -> List[Tuple[str, Dict[str, Any], int]]:
+        now = time.time()
+        docs = self.client.query(
+            self.collection,
+            [('status', 'EQUAL', 'pending'), ('available_at', 'LESS_THAN_OR_EQUAL', now)],
+            order_by='available_at', limit=batch_size
+        )
+        claimed = []
+        for doc in docs:
+            attempts = doc['fields']['attempts'] + 1
+            write = self.client.update_write(
+                self.collection, doc['id'], {'available_at': now + lease_seconds, 'attempts': attempts},
+                mask=['available_at', 'attempts'], update_time=doc['update_time']
+            )
+            # Precondição falhou: outra instância reservou o evento primeiro
+            if self.client.commit([write]) is not None:
+                claimed.append((doc['id'], json.loads(doc['fields']['payload']), attempts))
+        return claimed
+
+    def ack(self, event_ids: List[str]) -> None:
+        if event_ids:
+            self.client.commit([self.client.delete_write(self.collection, event_id) for event_id in event_ids])
+
+    def nack(self, event_id: str, delay_seconds: float, dead: bool = False,
+             refund_attempt: bool = False) -> None:
+        write = self.client.update_write(
+            self.collection, event_id,
+            {'status': 'dead' if dead else 'pending', 'available_at': time.time() + delay_seconds},
+            mask=['status', 'available_at'], exists=True,
+            increments={'attempts': -1} if refund_attempt else None
+        )
+        self.client.commit([write])
+
+    def size(self) -> int:
+        return self.client.count(self.collection, [('status', 'EQUAL', 'pending')])
+
+    def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        docs = self.client.query(self.collection, [('status', 'EQUAL', 'dead')], order_by='created_at', limit=limit)
+        return [json.loads(doc['fields']['payload']) for doc in docs]
+
+
+def create_event_queue(url: Optional[str] = None) -> EventQueueBackend:
+    """
+    Cria o backend a partir de uma URL: `firestore://<projeto>/<coleção>`
+    (compartilhado entre instâncias), `sqlite:///caminho` ou caminho simples
+    (local à instância)
+    """
+    url = url or os.environ.get('EVENT_QUEUE_URL', '') or DEFAULT_QUEUE_PATH
+
+    if url.startswith('firestore://'):
+        from shared.firestore import create_firestore_client
+        return FirestoreEventQueue(*create_firestore_client(url))
+    if url.startswith('sqlite://'):
+        return SQLiteEventQueue(url[len('sqlite://'):] or ':memory:')
+    if '://' in url:
+        raise ValueError(f"Unsupported event queue backend: {url}")
+    return SQLiteEventQueue(url)
+
+
+class EventQueueWorker:
+    """
+    Consome a fila em lotes e aplica `process` a cada evento
+
+    `process` deve levantar exceção para falhas que precisam de retry.
+    Exceções com `requeue_after` (upstream indisponível) reagendam o evento
+    sem contar tentativa; com `dead_letter` (falha permanente) vão direto
+    para a dead letter.
+    """
+
+    def __init__(
+        self,
+        queue: EventQueueBackend,
+        process: Callable[[Dict[str, Any]], Any],
+        batch_size: int = 25,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 5,
+        poll_interval: float = 1.0
+    ):
+        self.queue = queue
+        self.process = process
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def process_batch(self) -> Dict[str, int]:
+        """
+        Processa um único lote e retorna contadores
+        """
+        stats = {'claimed': 0, 'processed': 0, 'failed': 0, 'dead': 0, 'deferred': 0}
+        batch = self.queue.claim(self.batch_size, self.lease_seconds)
+        stats['claimed'] = len(batch)
+
+        done = []
+        for event_id, payload, attempts in batch:
+            try:
+                self.process(payload)
+                done.append(event_id)
+                stats['processed'] += 1
+            except Exception as e:
+                requeue_after = getattr(e, 'requeue_after', None)
+                if requeue_after is not None:
+                    self.queue.nack(event_id, requeue_after, refund_attempt=True)
+                    stats['deferred'] += 1
+                    continue
+                dead = attempts >= self.max_attempts or getattr(e, 'dead_letter', False)
+                delay = min(2 ** attempts, 300)
+                logger.error(f"Queued event {event_id} failed (attempt {attempts}): {e}")
+                self.queue.nack(event_id, delay, dead=dead)
+                stats['dead' if dead else 'failed'] += 1
+
+        self.queue.ack(done)
+        return stats
+
+    def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """
+        Processa lotes até a fila esvaziar (ou até `max_batches`)
+        """
+        totals = {'batches': 0, 'claimed': 0, 'processed': 0, 'failed': 0, 'dead': 0, 'deferred': 0}
+        while max_batches is None or totals['batches'] < max_batches:
+            stats = self.process_batch()
+            if not stats['claimed']:
+                break
+            totals['batches'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+        return totals
+
+    def wake(self) -> None:
+        """
+        Sinaliza nova entrada; inicia a thread de background se necessário
+        """
+        self.start()
+        self._wakeup.set()
+
+    def start(self) -> None:
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='event-queue-worker', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Event queue worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
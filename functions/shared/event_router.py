@@ -0,0 +1,90 @@
+"""
+ADC-Agents-Team - Event Router
+Roteamento dos eventos do Linear por (type, action) com pré-filtro no corpo bruto
+"""
+
+import os
+import re
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# auto: orjson quando instalado | orjson | json
+JSON_DECODER = os.environ.get('JSON_DECODER', 'auto')
+
+ANY_ACTION = '*'
+
+# Pares "type"/"action" com valor string, em qualquer nível do JSON
+_PEEK = re.compile(rb'"(type|action)"\s*:\s*"((?:[^"\\]|\\.){0,64})"')
+
+Handler = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], int]]
+
+
+def _load_decoder() -> Tuple[str, Callable[[bytes], Any]]:
+    if JSON_DECODER in ('auto', 'orjson'):
+        try:
+            import orjson
+            return 'orjson', orjson.loads
+        except ImportError:
+            if JSON_DECODER == 'orjson':
+                logger.warning("orjson not installed, falling back to json")
+    return 'json', json.loads
+
+
+# orjson.JSONDecodeError é subclasse de ValueError, como a do json
+DECODER_NAME, loads = _load_decoder()
+
+
+class EventRouter:
+    """
+    Tabela (type, action) → handler; `action='*'` aceita qualquer ação do tipo
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self.stats = {'routed': 0, 'unrouted': 0, 'rejected_early': 0}
+
+    def route(self, event_type: str, action: str = ANY_ACTION) -> Callable[[Handler], Handler]:
+        def register(handler: Handler) -> Handler:
+            self._routes[(event_type, action)] = handler
+            return handler
+        return register
+
+    def resolve(self, event_type: str, action: str) -> Optional[Handler]:
+        return self._routes.get((event_type, action)) or self._routes.get((event_type, ANY_ACTION))
+
+    def routes(self) -> Dict[str, str]:
+        return {f"{t}/{a}": handler.__name__ for (t, a), handler in self._routes.items()}
+
+    def is_unhandled(self, raw_body: bytes) -> bool:
+        """
+        Pré-filtro sem decodificar o JSON: True só quando nenhuma combinação
+        dos valores de `type`/`action` encontrados no corpo tem rota.
+        Conservador: os campos aninhados (ex.: state.type) só geram candidatos
+        extras, então um evento roteável nunca é descartado aqui
+        """
+        types, actions = set(), set()
+        for key, value in _PEEK.findall(raw_body):
+            if b'\\' in value:
+                # Valor com escape (ex.: \u0075): só o parse completo sabe o texto
+                return False
+            (types if key == b'type' else actions).add(value.decode())
+        if not types:
+            # Sem "type" legível: o parse completo decide
+            return False
+        for event_type in types:
+            for action in actions or ('unknown',):
+                if self.resolve(event_type, action) is not None:
+                    return False
+        self.stats['rejected_early'] += 1
+        return True
+
+    def dispatch(self, data: Dict[str, Any], default: Handler) -> Tuple[Dict[str, Any], int]:
+        handler = self.resolve(data.get('type', 'unknown'), data.get('action', 'unknown'))
+        if handler is None:
+            self.stats['unrouted'] += 1
+            return default(data)
+        self.stats['routed'] += 1
+        return handler(data)
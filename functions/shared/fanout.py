@@ -0,0 +1,78 @@
+"""
+ADC-Agents-Team - Side-Effect Fan-out
+Efeitos colaterais independentes executados em paralelo, com prazo total e
+relatório por efeito (falhas parciais não derrubam os demais)
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', '8'))
+# Prazo (s) para todos os efeitos de uma aprovação
+FANOUT_DEADLINE = float(os.environ.get('FANOUT_DEADLINE', '8'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+    return _executor
+
+
+def _timed(function: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def fan_out(effects: Dict[str, Callable[[], Any]], deadline: float = FANOUT_DEADLINE,
+            propagate: Tuple[type, ...] = ()) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Executa `effects` (nome → callable sem argumentos) em paralelo e espera
+    até `deadline` segundos. Retorna (relatório por efeito, resultados dos
+    que concluíram). Efeitos ainda rodando no prazo ficam como 'timeout' e
+    terminam em background. Exceções dos tipos em `propagate` são
+    relançadas depois que todos terminarem ou o prazo vencer
+    """
+    executor = _get_executor()
+    # Cada efeito roda no contexto do request: bind()/span() continuam valendo
+    futures = {
+        executor.submit(contextvars.copy_context().run, _timed, function): name
+        for name, function in effects.items()
+    }
+    wait(futures, timeout=deadline)
+
+    report: Dict[str, Dict[str, Any]] = {}
+    results: Dict[str, Any] = {}
+    pending_error: Optional[BaseException] = None
+    for future, name in futures.items():
+        if not future.done():
+            report[name] = {'status': 'timeout'}
+            logger.warning(f"Side effect {name} still running after {deadline:.1f}s")
+            continue
+        error = future.exception()
+        if error is not None:
+            report[name] = {'status': 'failed', 'error': str(error)}
+            if isinstance(error, propagate) and pending_error is None:
+                pending_error = error
+            else:
+                logger.error(f"Side effect {name} failed: {error}")
+            continue
+        results[name], elapsed = future.result()
+        report[name] = {'status': 'ok', 'ms': round(elapsed * 1000, 1)}
+
+    if pending_error is not None:
+        raise pending_error
+    return report, results
@@ -0,0 +1,231 @@
+"""
+ADC-Agents-Team - Firestore Client
+Cliente REST do Firestore para os estados compartilhados entre instâncias
+(fila de eventos e estado do pipeline)
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from shared import http_client
+from shared.config import get_access_token
+
+FIRESTORE_API_URL = os.environ.get('FIRESTORE_API_URL', 'https://firestore.googleapis.com/v1')
+FIRESTORE_SCOPES = ('https://www.googleapis.com/auth/datastore',)
+
+# Precondição (exists/updateTime) não atendida: outra instância gravou antes
+PRECONDITION_STATUSES = frozenset({'FAILED_PRECONDITION', 'ALREADY_EXISTS', 'NOT_FOUND', 'ABORTED'})
+
+
+class FirestoreError(Exception):
+    """Erro retornado pela API do Firestore"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """
+    Valor Python -> Value tipado da API REST
+    """
+    if value is None:
+        return {'nullValue': None}
+    if isinstance(value, bool):
+        return {'booleanValue': value}
+    if isinstance(value, int):
+        return {'integerValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, str):
+        return {'stringValue': value}
+    if isinstance(value, dict):
+        return {'mapValue': {'fields': encode_fields(value)}}
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [encode_value(v) for v in value]}}
+    raise TypeError(f"Unsupported Firestore value: {type(value).__name__}")
+
+
+def decode_value(value: Dict[str, Any]) -> Any:
+    """
+    Value tipado da API REST -> valor Python
+    """
+    if 'integerValue' in value:
+        return int(value['integerValue'])
+    if 'mapValue' in value:
+        return decode_fields(value['mapValue'].get('fields', {}))
+    if 'arrayValue' in value:
+        return [decode_value(v) for v in value['arrayValue'].get('values', [])]
+    for key in ('stringValue', 'doubleValue', 'booleanValue', 'timestampValue'):
+        if key in value:
+            return value[key]
+    return None
+
+
+def encode_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: encode_value(value) for key, value in data.items()}
+
+
+def decode_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: decode_value(value) for key, value in fields.items()}
+
+
+def parse_firestore_url(url: str) -> Tuple[str, str]:
+    """
+    `firestore://<projeto>/<coleção>` -> (projeto, coleção)
+    """
+    project_id, _, collection = url[len('firestore://'):].partition('/')
+    if not project_id or not collection or '/' in collection:
+        raise ValueError(f"Invalid Firestore URL (expected firestore://<project>/<collection>): {url}")
+    return project_id, collection
+
+
+class FirestoreClient:
+    """
+    Operações do Firestore usadas pelos backends compartilhados: leitura de
+    documento, commit com precondições, consultas e contagem
+
+    Documentos são retornados como {'id', 'fields', 'update_time'}; o
+    `update_time` é a precondição dos compare-and-set.
+    """
+
+    def __init__(self, project_id: str, database: str = '(default)',
+                 token_provider: Optional[Callable[[], str]] = None, url: Optional[str] = None):
+        self.url = (url or FIRESTORE_API_URL).rstrip('/')
+        self.database = f"projects/{project_id}/databases/{database}"
+        self.root = f"{self.database}/documents"
+        self._token_provider = token_provider or (lambda: get_access_token(FIRESTORE_SCOPES))
+
+    def _headers(self) -> Dict[str, str]:
+        return {'Authorization': f"Bearer {self._token_provider()}"}
+
+    def document_name(self, collection: str, doc_id: str) -> str:
+        return f"{self.root}/{collection}/{doc_id}"
+
+    @staticmethod
+    def _document(raw: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': raw['name'].rsplit('/', 1)[1],
+            'fields': decode_fields(raw.get('fields', {})),
+            'update_time': raw.get('updateTime')
+        }
+
+    @staticmethod
+    def _error(operation: str, response) -> FirestoreError:
+        return FirestoreError(f"Firestore {operation} returned {response.status_code}: {response.text[:200]}",
+                              response.status_code)
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Documento ou None se não existir
+        """
+        response = http_client.get(f"{self.url}/{self.root}/{collection}/{quote(doc_id, safe='')}",
+                                   headers=self._headers())
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise self._error('get', response)
+        return self._document(response.json())
+
+    def update_write(self, collection: str, doc_id: str, fields: Dict[str, Any],
+                     mask: Optional[List[str]] = None, exists: Optional[bool] = None,
+                     update_time: Optional[str] = None,
+                     increments: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Write de criação/atualização para `commit`; `mask` limita os campos
+        gravados, `exists`/`update_time` viram a precondição do documento
+        """
+        write: Dict[str, Any] = {
+            'update': {'name': self.document_name(collection, doc_id), 'fields': encode_fields(fields)}
+        }
+        if mask is not None:
+            write['updateMask'] = {'fieldPaths': mask}
+        if update_time is not None:
+            write['currentDocument'] = {'updateTime': update_time}
+        elif exists is not None:
+            write['currentDocument'] = {'exists': exists}
+        if increments:
+            write['updateTransforms'] = [
+                {'fieldPath': field, 'increment': encode_value(amount)} for field, amount in increments.items()
+            ]
+        return write
+
+    def delete_write(self, collection: str, doc_id: str) -> Dict[str, Any]:
+        return {'delete': self.document_name(collection, doc_id)}
+
+    def commit(self, writes: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Aplica os writes atomicamente; retorna os writeResults ou None se
+        alguma precondição falhou
+        """
+        response = http_client.post(f"{self.url}/{self.root}:commit", headers=self._headers(),
+                                    json={'writes': writes})
+        if response.status_code == 200:
+            return response.json().get('writeResults', [])
+        if response.status_code in (400, 404, 409):
+            try:
+                status = response.json().get('error', {}).get('status')
+            except ValueError:
+                status = None
+            if status in PRECONDITION_STATUSES:
+                return None
+        raise self._error('commit', response)
+
+    def _structured_query(self, collection: str, where: List[Tuple[str, str, Any]],
+                          order_by: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        filters = [
+            {'fieldFilter': {'field': {'fieldPath': field}, 'op': op, 'value': encode_value(value)}}
+            for field, op, value in where
+        ]
+        query: Dict[str, Any] = {'from': [{'collectionId': collection}]}
+        if len(filters) == 1:
+            query['where'] = filters[0]
+        elif filters:
+            query['where'] = {'compositeFilter': {'op': 'AND', 'filters': filters}}
+        if order_by:
+            query['orderBy'] = [{'field': {'fieldPath': order_by}, 'direction': 'ASCENDING'}]
+        if limit:
+            query['limit'] = limit
+        return query
+
+    def query(self, collection: str, where: List[Tuple[str, str, Any]],
+              order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Documentos da coleção que atendem a todos os filtros `(campo, op, valor)`
+        (ops da API: EQUAL, LESS_THAN_OR_EQUAL, ...)
+        """
+        response = http_client.post(
+            f"{self.url}/{self.root}:runQuery", headers=self._headers(),
+            json={'structuredQuery': self._structured_query(collection, where, order_by, limit)}
+        )
+        if response.status_code != 200:
+            raise self._error('runQuery', response)
+        return [self._document(item['document']) for item in response.json() if item.get('document')]
+
+    def count(self, collection: str, where: List[Tuple[str, str, Any]]) -> int:
+        """
+        Contagem server-side (aggregation query): nenhum documento é transferido
+        """
+        response = http_client.post(
+            f"{self.url}/{self.root}:runAggregationQuery", headers=self._headers(),
+            json={'structuredAggregationQuery': {
+                'structuredQuery': self._structured_query(collection, where),
+                'aggregations': [{'alias': 'total', 'count': {}}]
+            }}
+        )
+        if response.status_code != 200:
+            raise self._error('runAggregationQuery', response)
+        for item in response.json():
+            fields = (item.get('result') or {}).get('aggregateFields')
+            if fields:
+                return decode_value(fields['total'])
+        return 0
+
+
+def create_firestore_client(url: str) -> Tuple[FirestoreClient, str]:
+    """
+    Cliente e coleção a partir de `firestore://<projeto>/<coleção>`
+    """
+    project_id, collection = parse_firestore_url(url)
+    return FirestoreClient(project_id), collection
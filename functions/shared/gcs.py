@@ -0,0 +1,189 @@
+"""
+ADC-Agents-Team - GCS Client
+Cliente REST do Cloud Storage com upload resumable em chunks
+"""
+
+import os
+import time
+import base64
+import logging
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import quote
+
+from shared import http_client
+from shared.config import get_access_token
+
+logger = logging.getLogger(__name__)
+
+GCS_API_URL = os.environ.get('GCS_API_URL', 'https://storage.googleapis.com')
+GCS_SCOPES = ('https://www.googleapis.com/auth/devstorage.read_write',)
+
+# Chunks de upload resumable precisam ser múltiplos de 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+MAX_CHUNK_RETRIES = 3
+
+
+class GCSError(Exception):
+    """Erro retornado pela API do Cloud Storage"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def align_chunk_size(size: int) -> int:
+    return max(CHUNK_ALIGNMENT, (size + CHUNK_ALIGNMENT - 1) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT)
+
+
+def md5_base64_to_hex(value: str) -> str:
+    return base64.b64decode(value).hex() if value else ''
+
+
+class ResumableUpload:
+    """
+    Sessão de upload resumable: cada chunk é enviado com Content-Range e,
+    em caso de falha, o offset confirmado pelo servidor é consultado antes
+    de reenviar
+    """
+
+    def __init__(self, session_url: str, name: str):
+        self.session_url = session_url
+        self.name = name
+        self.offset = 0
+
+    def _put(self, data: bytes, total: Optional[int]):
+        end = self.offset + len(data) - 1
+        total_label = str(total) if total is not None else '*'
+        content_range = f"bytes {self.offset}-{end}/{total_label}" if data else f"bytes */{total_label}"
+        return http_client.request(
+            'PUT', self.session_url, data=data,
+            headers={'Content-Range': content_range, 'Content-Length': str(len(data))}
+        )
+
+    def _query_offset(self) -> Optional[int]:
+        """
+        Offset persistido pelo servidor; None quando o upload já terminou
+        """
+        response = http_client.request('PUT', self.session_url, data=b'',
+                                       headers={'Content-Range': 'bytes */*', 'Content-Length': '0'})
+        if response.status_code in (200, 201):
+            return None
+        if response.status_code != 308:
+            raise GCSError(f"GCS upload status returned {response.status_code}", response.status_code)
+        received = response.headers.get('Range')
+        return int(received.rsplit('-', 1)[1]) + 1 if received else 0
+
+    def send(self, data: bytes, final: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Envia um chunk; no chunk final retorna o recurso criado
+        """
+        for attempt in range(MAX_CHUNK_RETRIES + 1):
+            total = self.offset + len(data) if final else None
+            try:
+                response = self._put(data, total)
+            except Exception as e:
+                response, error = None, str(e)
+            else:
+                if final and response.status_code in (200, 201):
+                    self.offset = total
+                    return response.json()
+                if not final and response.status_code == 308:
+                    self.offset += len(data)
+                    return None
+                error = f"{response.status_code}: {response.text[:200]}"
+                if response.status_code < 500 and response.status_code not in (308, 408, 429):
+                    raise GCSError(f"GCS upload of {self.name} failed ({error})", response.status_code)
+
+            if attempt == MAX_CHUNK_RETRIES:
+                raise GCSError(f"GCS upload of {self.name} failed after retries ({error})")
+            time.sleep(0.5 * (2 ** attempt))
+            # Parte do chunk pode ter sido persistida: descarta o que o servidor já tem
+            confirmed = self._query_offset()
+            if confirmed is None:
+                raise GCSError(f"GCS upload of {self.name} finalized unexpectedly")
+            data = data[confirmed - self.offset:]
+            self.offset = confirmed
+        return None
+
+
+class GCSClient:
+    """
+    Operações do Cloud Storage usadas pelo backup
+    """
+
+    def __init__(self, token_provider: Optional[Callable[[], str]] = None, url: Optional[str] = None):
+        self.url = (url or GCS_API_URL).rstrip('/')
+        self._token_provider = token_provider or (lambda: get_access_token(GCS_SCOPES))
+
+    def _headers(self) -> Dict[str, str]:
+        return {'Authorization': f"Bearer {self._token_provider()}"}
+
+    def _object_url(self, bucket: str, name: str) -> str:
+        return f"{self.url}/storage/v1/b/{bucket}/o/{quote(name, safe='')}"
+
+    def start_resumable(self, bucket: str, name: str, content_type: str = 'application/octet-stream',
+                        metadata: Optional[Dict[str, str]] = None) -> ResumableUpload:
+        body: Dict[str, Any] = {'name': name, 'contentType': content_type}
+        if metadata:
+            body['metadata'] = metadata
+        # Iniciar a sessão é seguro de repetir: sessões abandonadas expiram sozinhas
+        for attempt in range(MAX_CHUNK_RETRIES + 1):
+            response = http_client.post(
+                f"{self.url}/upload/storage/v1/b/{bucket}/o",
+                params={'uploadType': 'resumable', 'name': name},
+                headers={**self._headers(), 'X-Upload-Content-Type': content_type},
+                json=body
+            )
+            if response.status_code < 500 and response.status_code != 429:
+                break
+            if attempt < MAX_CHUNK_RETRIES:
+                time.sleep(0.5 * (2 ** attempt))
+        if response.status_code != 200 or 'Location' not in response.headers:
+            raise GCSError(f"GCS resumable init returned {response.status_code}: {response.text[:200]}",
+                           response.status_code)
+        return ResumableUpload(response.headers['Location'], name)
+
+    def upload_bytes(self, bucket: str, name: str, data: bytes,
+                     content_type: str = 'application/json') -> Dict[str, Any]:
+        """
+        Upload simples para objetos pequenos (manifestos)
+        """
+        response = http_client.post(
+            f"{self.url}/upload/storage/v1/b/{bucket}/o",
+            params={'uploadType': 'media', 'name': name},
+            headers={**self._headers(), 'Content-Type': content_type},
+            data=data
+        )
+        if response.status_code not in (200, 201):
+            raise GCSError(f"GCS upload returned {response.status_code}: {response.text[:200]}",
+                           response.status_code)
+        return response.json()
+
+    def download_bytes(self, bucket: str, name: str) -> Optional[bytes]:
+        """
+        Conteúdo de um objeto pequeno; None se não existir
+        """
+        response = http_client.get(self._object_url(bucket, name), params={'alt': 'media'},
+                                   headers=self._headers())
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise GCSError(f"GCS download returned {response.status_code}: {response.text[:200]}",
+                           response.status_code)
+        return response.content
+
+    def copy(self, bucket: str, source: str, destination: str) -> Dict[str, Any]:
+        """
+        Cópia server-side (rewrite): nenhum byte passa pela função
+        """
+        url = f"{self._object_url(bucket, source)}/rewriteTo/b/{bucket}/o/{quote(destination, safe='')}"
+        params: Dict[str, str] = {}
+        while True:
+            response = http_client.post(url, params=params, headers=self._headers(), json={})
+            if response.status_code != 200:
+                raise GCSError(f"GCS rewrite returned {response.status_code}: {response.text[:200]}",
+                               response.status_code)
+            body = response.json()
+            if body.get('done'):
+                return body.get('resource', {})
+            params['rewriteToken'] = body['rewriteToken']
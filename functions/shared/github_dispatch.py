@@ -0,0 +1,339 @@
+"""
+ADC-Agents-Team - GitHub Dispatch Scheduler
+Dispara workflow_dispatch respeitando rate limits do GitHub
+"""
+
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from shared import http_client
+from shared.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+# Limites secundários do GitHub para requests que criam conteúdo
+DEFAULT_RATE = float(os.environ.get('GITHUB_DISPATCH_RATE', '1.0'))      # dispatches/s
+DEFAULT_BURST = float(os.environ.get('GITHUB_DISPATCH_BURST', '10'))
+DEFAULT_MAX_WAIT = float(os.environ.get('GITHUB_DISPATCH_MAX_WAIT', '30'))  # s por dispatch
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get('GITHUB_DISPATCH_MAX_ATTEMPTS', '5'))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Inputs do template original do llm-pipeline-auto.yml; workflows que não
+# declaram os novos (previous_stage, triggered_by, timestamp, dispatch_id)
+# respondem 422 e recebem o dispatch só com estes
+LEGACY_WORKFLOW_INPUTS = ('stage', 'project_name', 'auto_triggered')
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+class DispatchResult:
+    """
+    Resultado de um dispatch após retries
+    """
+
+    def __init__(self, ok: bool, status_code: Optional[int], attempts: int,
+                 retryable: bool = False, error: str = '', retry_after: float = 0.0,
+                 circuit_open: bool = False, ambiguous: bool = False):
+        self.ok = ok
+        self.status_code = status_code
+        self.attempts = attempts
+        self.retryable = retryable
+        self.error = error
+        self.retry_after = retry_after
+        self.circuit_open = circuit_open
+        # POST enviado sem resposta (ex.: read timeout): o GitHub pode ter
+        # criado o run, então não é repetido; confirmar pelo dispatch_id
+        self.ambiguous = ambiguous
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ok': self.ok,
+            'status_code': self.status_code,
+            'attempts': self.attempts,
+            'retryable': self.retryable,
+            'error': self.error,
+            'retry_after': round(self.retry_after, 2),
+            'circuit_open': self.circuit_open,
+            'ambiguous': self.ambiguous
+        }
+
+
+class DispatchDeferred(Exception):
+    """
+    Dispatch não concluído por falha transitória; o evento deve ser reprocessado
+    """
+
+    def __init__(self, message: str, result: DispatchResult):
+        super().__init__(message)
+        self.result = result
+        # Circuito aberto: a fila reagenda sem consumir tentativa (ver EventQueueWorker)
+        self.requeue_after = max(result.retry_after, 1.0) if result.circuit_open else None
+
+
+class TokenBucket:
+    """
+    Token bucket com pausa explícita (Retry-After / reset do rate limit)
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserva um token e retorna quanto tempo esperar antes de usá-lo
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.paused_until - now)
+
+    def refund(self) -> None:
+        """
+        Devolve um token reservado e não usado (dispatch abortado antes do envio)
+        """
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _jittered_backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    return random.uniform(base / 2, min(cap, base * (2 ** attempt)))
+
+
+def _is_connect_error(error: Exception) -> bool:
+    """
+    Falha antes do request sair (DNS, conexão recusada, timeout de conexão,
+    handshake TLS): repetir não duplica o dispatch
+    """
+    if isinstance(error, (requests.exceptions.ConnectTimeout, requests.exceptions.SSLError,
+                          requests.exceptions.ProxyError)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = error.args[0] if error.args else None
+        return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
+    return False
+
+
+def _rate_limit_wait(response) -> Optional[float]:
+    """
+    Tempo de espera indicado pelos headers de rate limit, se houver
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset:
+            return max(0.0, float(reset) - time.time()) + 1.0
+
+    # Limite secundário sem Retry-After: GitHub recomenda aguardar ~1 minuto
+    if response.status_code in (403, 429) and 'rate limit' in response.text.lower():
+        return SECONDARY_LIMIT_WAIT
+    return None
+
+
+class DispatchScheduler:
+    """
+    Espaça dispatches por token/repo e repete falhas transitórias
+    com backoff em vez de descartar a transição de estágio; erros de rede
+    só são repetidos se o POST não chegou a ser enviado
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST,
+                 max_wait: float = DEFAULT_MAX_WAIT, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 max_workers: int = 4):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        # Montados uma vez por repo/workflow e por token, não a cada dispatch
+        self._urls: Dict[Tuple[str, str], str] = {}
+        self._credentials: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        # (repo, workflow) que só aceitam LEGACY_WORKFLOW_INPUTS
+        self._legacy_workflows = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self.stats = {'dispatched': 0, 'failed': 0, 'retries': 0, 'rate_limited': 0, 'circuit_open': 0,
+                      'legacy_inputs': 0, 'ambiguous': 0}
+
+    def dispatch_url(self, repo: str, workflow: str) -> str:
+        url = self._urls.get((repo, workflow))
+        if url is None:
+            url = self._urls[(repo, workflow)] = f"{GITHUB_API_URL}/repos/{repo}/actions/workflows/{workflow}/dispatches"
+        return url
+
+    def _credentials_for(self, token: str) -> Tuple[str, Dict[str, str]]:
+        """
+        (id do token para os buckets, headers prontos)
+        """
+        credentials = self._credentials.get(token)
+        if credentials is None:
+            credentials = self._credentials[token] = (hashlib.sha1(token.encode()).hexdigest()[:12], {
+                'Authorization': f"Bearer {token}",
+                'Accept': 'application/vnd.github.v3+json',
+                'Content-Type': 'application/json'
+            })
+        return credentials
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def _buckets_for(self, token_id: str, repo: str) -> Tuple[TokenBucket, TokenBucket]:
+        with self._lock:
+            token_bucket = self._token_buckets.get(token_id)
+            if token_bucket is None:
+                token_bucket = self._token_buckets[token_id] = TokenBucket(self.rate, self.burst)
+            repo_bucket = self._buckets.get((token_id, repo))
+            if repo_bucket is None:
+                repo_bucket = self._buckets[(token_id, repo)] = TokenBucket(self.rate, self.burst)
+        return token_bucket, repo_bucket
+
+    def dispatch(self, repo: str, workflow: str, inputs: Dict[str, Any], token: str,
+                 ref: str = 'main', max_wait: Optional[float] = None) -> DispatchResult:
+        """
+        Dispara o workflow, aguardando rate limit e repetindo até `max_wait`;
+        um 422 com inputs além de LEGACY_WORKFLOW_INPUTS é repetido só com
+        eles (workflow ainda no template antigo) e o repo fica lembrado
+        """
+        url = self.dispatch_url(repo, workflow)
+        token_id, headers = self._credentials_for(token)
+        legacy_inputs = {name: value for name, value in inputs.items() if name in LEGACY_WORKFLOW_INPUTS}
+        can_fall_back = len(legacy_inputs) < len(inputs)
+        use_legacy = can_fall_back and (repo, workflow) in self._legacy_workflows
+        body = {'ref': ref, 'inputs': legacy_inputs if use_legacy else inputs}
+
+        token_bucket, repo_bucket = self._buckets_for(token_id, repo)
+        deadline = time.monotonic() + (self.max_wait if max_wait is None else max_wait)
+        attempt = 0
+        last_status, last_error, retry_after = None, '', 0.0
+
+        while attempt < self.max_attempts:
+            wait = max(token_bucket.reserve(), repo_bucket.reserve())
+            if time.monotonic() + wait > deadline:
+                # O token não será usado: devolve para não atrasar os próximos dispatches
+                token_bucket.refund()
+                repo_bucket.refund()
+                retry_after = wait
+                break
+            if wait > 0:
+                time.sleep(wait)
+
+            attempt += 1
+            try:
+                response = http_client.post(url, json=body, headers=headers)
+            except CircuitOpenError as e:
+                # GitHub fora do ar: falha rápida, sem esperar backoff até o deadline
+                # (o request nem saiu, então o token volta aos buckets)
+                token_bucket.refund()
+                repo_bucket.refund()
+                self._count('circuit_open')
+                return DispatchResult(False, None, attempt, retryable=True,
+                                      error=str(e), retry_after=e.retry_after, circuit_open=True)
+            except Exception as e:
+                if not _is_connect_error(e):
+                    # Read timeout / conexão caída com o POST em voo: um retry
+                    # poderia disparar o workflow duas vezes
+                    self._count('ambiguous')
+                    logger.warning(f"Dispatch to {repo} has unknown outcome: {e}")
+                    return DispatchResult(False, None, attempt, error=f"ambiguous: {e}", ambiguous=True)
+                last_status, last_error = None, str(e)
+                delay = _jittered_backoff(attempt)
+            else:
+                last_status = response.status_code
+                if response.status_code == 204:
+                    self._count('dispatched')
+                    if body['inputs'] is legacy_inputs and not use_legacy:
+                        with self._lock:
+                            self._legacy_workflows.add((repo, workflow))
+                    return DispatchResult(True, 204, attempt)
+
+                last_error = response.text[:500]
+                if response.status_code == 422 and can_fall_back and body['inputs'] is not legacy_inputs:
+                    logger.warning(f"Workflow {workflow} in {repo} rejected inputs ({last_error}); "
+                                   f"retrying with {', '.join(legacy_inputs)} only")
+                    self._count('legacy_inputs')
+                    body = {'ref': ref, 'inputs': legacy_inputs}
+                    continue
+                limit_wait = _rate_limit_wait(response)
+                if limit_wait is not None:
+                    # Rate limit: pausa o token inteiro, não só este repo
+                    self._count('rate_limited')
+                    token_bucket.pause(limit_wait)
+                    delay = limit_wait + random.uniform(0, 1.0)
+                elif response.status_code in RETRYABLE_STATUSES:
+                    delay = _jittered_backoff(attempt)
+                else:
+                    self._count('failed')
+                    return DispatchResult(False, response.status_code, attempt, error=last_error)
+
+            if time.monotonic() + delay > deadline:
+                retry_after = delay
+                break
+            self._count('retries')
+            logger.warning(f"Dispatch to {repo} failed ({last_status}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        self._count('failed')
+        return DispatchResult(False, last_status, attempt, retryable=True,
+                              error=last_error or 'deadline exceeded', retry_after=retry_after)
+
+    def submit(self, repo: str, workflow: str, inputs: Dict[str, Any], token: str,
+               ref: str = 'main', max_wait: Optional[float] = None) -> 'Future[DispatchResult]':
+        """
+        Enfileira o dispatch para execução em background
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix='github-dispatch'
+                )
+        return self._executor.submit(self.dispatch, repo, workflow, inputs, token, ref, max_wait)
+
+
+_scheduler: Optional[DispatchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> DispatchScheduler:
+    """
+    Scheduler compartilhado pela instância
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = DispatchScheduler()
+    return _scheduler
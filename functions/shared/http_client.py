@@ -0,0 +1,148 @@
+"""
+ADC-Agents-Team - HTTP Client
+Sessões HTTP com pool e keep-alive compartilhadas entre invocações
+"""
+
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from shared.circuit_breaker import CIRCUIT_ENABLED, CircuitOpenError, get_breaker
+
+# requests/urllib3 são importados no primeiro request: caminhos que não
+# fazem chamadas externas (health, eventos ignorados) não pagam esse custo
+if TYPE_CHECKING:
+    import requests
+
+
+class HostPolicy:
+    """
+    Política por host: timeouts, tamanho do pool e orçamento de retries
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        pool_size: int = 10,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        retry_statuses: Tuple[int, ...] = (502, 503, 504),
+        circuit_breaker: bool = True
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = retry_statuses
+        self.circuit_breaker = circuit_breaker
+
+    def build_retry(self):
+        from urllib3.util.retry import Retry
+
+        # Erros de conexão são sempre seguros de repetir (request não enviado);
+        # status/leitura só para métodos idempotentes (POST fica de fora).
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+
+DEFAULT_POLICY = HostPolicy()
+
+HOST_POLICIES: Dict[str, HostPolicy] = {
+    'api.github.com': HostPolicy(read_timeout=10.0, pool_size=10, retries=2),
+    'api.linear.app': HostPolicy(read_timeout=10.0, pool_size=10, retries=2),
+    'www.googleapis.com': HostPolicy(read_timeout=30.0, pool_size=16, retries=3),
+    'storage.googleapis.com': HostPolicy(read_timeout=60.0, pool_size=16, retries=3),
+    # Fila e estado do pipeline: cada request do webhook faz poucas operações curtas
+    'firestore.googleapis.com': HostPolicy(read_timeout=10.0, pool_size=16, retries=2),
+    # Notificações já são best-effort em background: sem breaker
+    'hooks.slack.com': HostPolicy(read_timeout=5.0, pool_size=4, retries=1, circuit_breaker=False),
+}
+
+_sessions: Dict[str, 'requests.Session'] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_policy(host: str) -> HostPolicy:
+    return HOST_POLICIES.get(host, DEFAULT_POLICY)
+
+
+def get_session(host: str) -> 'requests.Session':
+    """
+    Retorna a sessão do host, criando-a na primeira chamada da instância
+    """
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            policy = get_policy(host)
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=policy.pool_size,
+                max_retries=policy.build_retry()
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+    return session
+
+
+# Respostas que indicam upstream degradado (429 é limite de taxa, não falha)
+CIRCUIT_FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+
+
+def request(method: str, url: str, timeout: Optional[object] = None, **kwargs) -> 'requests.Response':
+    """
+    Executa o request na sessão do host com o timeout da política.
+    Com o circuito do host aberto, levanta CircuitOpenError sem tocar a rede
+    """
+    host = urlsplit(url).hostname or ''
+    policy = get_policy(host)
+    if timeout is None:
+        timeout = policy.timeout
+    if not (CIRCUIT_ENABLED and policy.circuit_breaker):
+        return get_session(host).request(method, url, timeout=timeout, **kwargs)
+
+    breaker = get_breaker(host)
+    breaker.before_call()
+    try:
+        response = get_session(host).request(method, url, timeout=timeout, **kwargs)
+    except Exception:
+        breaker.record(False)
+        raise
+    breaker.record(response.status_code not in CIRCUIT_FAILURE_STATUSES)
+    return response
+
+
+def get(url: str, **kwargs) -> 'requests.Response':
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> 'requests.Response':
+    return request('POST', url, **kwargs)
+
+
+def close_all() -> None:
+    """
+    Fecha todas as sessões (testes e shutdown)
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,331 @@
+"""
+ADC-Agents-Team - Linear Client
+Cliente GraphQL para a API do Linear, com batching de lookups por request,
+cache TTL das entidades estáveis e controle do rate limit por complexidade
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared import http_client
+
+logger = logging.getLogger(__name__)
+
+LINEAR_API_URL = os.environ.get('LINEAR_API_URL', 'https://api.linear.app/graphql')
+# Times, estados e labels quase nunca mudam: cache por instância
+LINEAR_CACHE_TTL = float(os.environ.get('LINEAR_CACHE_TTL', '600'))
+LINEAR_CACHE_MAX_ENTRIES = int(os.environ.get('LINEAR_CACHE_MAX_ENTRIES', '2000'))
+# Pontos de complexidade mantidos em reserva antes de segurar novas queries
+LINEAR_COMPLEXITY_RESERVE = int(os.environ.get('LINEAR_COMPLEXITY_RESERVE', '5000'))
+# Espera máxima (s) pelo reset do limite; acima disso a query falha na hora
+LINEAR_RATE_LIMIT_MAX_WAIT = float(os.environ.get('LINEAR_RATE_LIMIT_MAX_WAIT', '2'))
+
+# Campos buscados por tipo de entidade (nome do campo raiz → seleção)
+ENTITY_FIELDS = {
+    'issue': ('id identifier title updatedAt state { id name type position } team { id key name } '
+              'labels { nodes { id name color } }'),
+    'team': 'id key name',
+    'workflowState': 'id name type position',
+    'issueLabel': 'id name color',
+}
+COMMENT_MUTATION = ('mutation CommentCreate($issueId: String!, $body: String!) '
+                    '{ commentCreate(input: {issueId: $issueId, body: $body}) { success } }')
+
+# Entidades que podem ser reaproveitadas entre requests
+CACHEABLE_ENTITIES = frozenset({'team', 'workflowState', 'issueLabel'})
+
+
+class LinearError(Exception):
+    """Erro retornado pela API do Linear"""
+
+
+class LinearRateLimited(LinearError):
+    """Orçamento de complexidade (ou de requests) esgotado até o reset"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitTracker:
+    """
+    Acompanha os headers X-RateLimit-* do Linear: antes de cada query
+    decide se é preciso esperar o reset da janela
+    """
+
+    def __init__(self, reserve: int = LINEAR_COMPLEXITY_RESERVE, max_wait: float = LINEAR_RATE_LIMIT_MAX_WAIT):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.complexity_remaining: Optional[int] = None
+        self.requests_remaining: Optional[int] = None
+        self.reset_at = 0.0  # epoch (s)
+        self.last_complexity: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {'waits': 0, 'rejected': 0, 'complexity_used': 0}
+
+    def update(self, headers: Dict[str, str]) -> None:
+        with self._lock:
+            complexity = _int_header(headers, 'X-Complexity')
+            if complexity is not None:
+                self.last_complexity = complexity
+                self.stats['complexity_used'] += complexity
+            remaining = _int_header(headers, 'X-RateLimit-Complexity-Remaining')
+            if remaining is not None:
+                self.complexity_remaining = remaining
+            requests_remaining = _int_header(headers, 'X-RateLimit-Requests-Remaining')
+            if requests_remaining is not None:
+                self.requests_remaining = requests_remaining
+            # Resets vêm em epoch ms; vale o mais distante das duas janelas
+            resets = [_int_header(headers, name) for name in
+                      ('X-RateLimit-Complexity-Reset', 'X-RateLimit-Requests-Reset')]
+            resets = [r / 1000 for r in resets if r]
+            if resets:
+                self.reset_at = max(resets)
+
+    def exhaust(self, retry_after: float) -> None:
+        """
+        Resposta RATELIMITED: nada passa até o reset
+        """
+        with self._lock:
+            self.complexity_remaining = 0
+            self.reset_at = max(self.reset_at, time.time() + retry_after)
+
+    def wait_time(self) -> float:
+        with self._lock:
+            now = time.time()
+            if self.reset_at <= now:
+                return 0.0
+            low_complexity = (self.complexity_remaining is not None
+                              and self.complexity_remaining < max(self.reserve, self.last_complexity or 0))
+            no_requests = self.requests_remaining is not None and self.requests_remaining <= 0
+            return self.reset_at - now if low_complexity or no_requests else 0.0
+
+    def acquire(self) -> None:
+        """
+        Espera o reset (até `max_wait`) ou levanta LinearRateLimited
+        """
+        wait = self.wait_time()
+        if not wait:
+            return
+        if wait > self.max_wait:
+            self.stats['rejected'] += 1
+            raise LinearRateLimited(f"Linear rate limit exhausted (reset in {wait:.1f}s)", wait)
+        self.stats['waits'] += 1
+        time.sleep(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'complexity_remaining': self.complexity_remaining,
+            'requests_remaining': self.requests_remaining,
+            'reset_in': round(max(0.0, self.reset_at - time.time()), 1),
+            **self.stats,
+        }
+
+
+def _int_header(headers: Dict[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class EntityCache:
+    """
+    Cache TTL + LRU de entidades por (tipo, id), compartilhado entre requests
+    """
+
+    def __init__(self, ttl_seconds: float = LINEAR_CACHE_TTL, max_entries: int = LINEAR_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        key = (kind, entity_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, kind: str, entity_id: str, value: Dict[str, Any]) -> None:
+        key = (kind, entity_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+ENTITY_CACHE = EntityCache()
+
+
+class LinearClient:
+    """
+    Cliente mínimo para queries GraphQL do Linear
+    """
+
+    def __init__(self, api_key: Optional[str] = None, url: Optional[str] = None,
+                 rate_limit: Optional[RateLimitTracker] = None):
+        self.api_key = api_key if api_key is not None else os.environ.get('LINEAR_API_KEY', '')
+        self.url = url or LINEAR_API_URL
+        self.rate_limit = rate_limit or RATE_LIMIT
+        self._headers = {
+            'Authorization': self.api_key,
+            'Content-Type': 'application/json'
+        }
+        self.stats = {'queries': 0, 'rate_limited': 0}
+
+    def query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Executa uma query e retorna o campo `data`
+        """
+        self.rate_limit.acquire()
+        self.stats['queries'] += 1
+        response = http_client.post(
+            self.url,
+            json={'query': query, 'variables': variables or {}},
+            headers=self._headers
+        )
+        self.rate_limit.update(response.headers)
+
+        body = response.json() if response.status_code in (200, 400) else {}
+        errors = body.get('errors') or []
+        if any((e.get('extensions') or {}).get('code') == 'RATELIMITED' for e in errors):
+            self.stats['rate_limited'] += 1
+            retry_after = max(1.0, self.rate_limit.reset_at - time.time())
+            self.rate_limit.exhaust(retry_after)
+            raise LinearRateLimited(f"Linear rate limited (reset in {retry_after:.1f}s)", retry_after)
+        if response.status_code != 200:
+            raise LinearError(f"Linear API returned {response.status_code}: {response.text[:200]}")
+        if errors:
+            raise LinearError(errors[0].get('message', 'unknown error'))
+        return body.get('data') or {}
+
+    def create_comment(self, issue_id: str, body: str) -> bool:
+        data = self.query(COMMENT_MUTATION, {'issueId': issue_id, 'body': body})
+        return bool((data.get('commentCreate') or {}).get('success'))
+
+    def loader(self, cache: Optional[EntityCache] = None) -> 'LinearLoader':
+        return LinearLoader(self, ENTITY_CACHE if cache is None else cache)
+
+
+# Um orçamento por chave de API; as funções da instância compartilham
+RATE_LIMIT = RateLimitTracker()
+
+
+class LinearRef:
+    """
+    Resultado de um `load`: resolvido no primeiro `get()` de qualquer ref
+    do mesmo loader, junto com todos os lookups enfileirados até ali
+    """
+
+    __slots__ = ('_loader', 'kind', 'id', '_value', '_resolved')
+
+    def __init__(self, loader: 'LinearLoader', kind: str, entity_id: str):
+        self._loader = loader
+        self.kind = kind
+        self.id = entity_id
+        self._value: Optional[Dict[str, Any]] = None
+        self._resolved = False
+
+    def resolve(self, value: Optional[Dict[str, Any]]) -> None:
+        self._value = value
+        self._resolved = True
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        if not self._resolved:
+            self._loader.dispatch()
+        return self._value
+
+
+class LinearLoader:
+    """
+    Batching estilo DataLoader, um por request: `load(kind, id)` só
+    enfileira; `dispatch()` junta todos os lookups pendentes numa única query
+    com aliases (`e0: issue(id: $v0) {...}`), sem duplicar ids. Entidades
+    estáveis vêm do EntityCache sem tocar a rede
+    """
+
+    def __init__(self, client: LinearClient, cache: EntityCache = ENTITY_CACHE):
+        self.client = client
+        self.cache = cache
+        self._refs: Dict[Tuple[str, str], LinearRef] = {}
+        self._queue: List[LinearRef] = []
+        self.round_trips = 0
+
+    def load(self, kind: str, entity_id: str) -> LinearRef:
+        if kind not in ENTITY_FIELDS:
+            raise ValueError(f"Unknown Linear entity: {kind}")
+        key = (kind, entity_id)
+        ref = self._refs.get(key)
+        if ref is not None:
+            return ref
+        ref = self._refs[key] = LinearRef(self, kind, entity_id)
+        cached = self.cache.get(kind, entity_id) if kind in CACHEABLE_ENTITIES else None
+        if cached is not None:
+            ref.resolve(cached)
+        else:
+            self._queue.append(ref)
+        return ref
+
+    def load_many(self, kind: str, entity_ids: List[str]) -> List[LinearRef]:
+        return [self.load(kind, entity_id) for entity_id in entity_ids]
+
+    def dispatch(self) -> int:
+        """
+        Executa os lookups pendentes numa única chamada; retorna quantos
+        """
+        pending, self._queue = self._queue, []
+        if not pending:
+            return 0
+        declarations, selections, variables = [], [], {}
+        for index, ref in enumerate(pending):
+            declarations.append(f"$v{index}: String!")
+            selections.append(f"e{index}: {ref.kind}(id: $v{index}) {{ {ENTITY_FIELDS[ref.kind]} }}")
+            variables[f"v{index}"] = ref.id
+        query = f"query Batch({', '.join(declarations)}) {{ {' '.join(selections)} }}"
+
+        self.round_trips += 1
+        try:
+            data = self.client.query(query, variables)
+        except Exception:
+            # Falha do lote: os refs voltam para a fila e o próximo get() tenta de novo
+            self._queue = pending + self._queue
+            raise
+        for index, ref in enumerate(pending):
+            value = data.get(f"e{index}")
+            ref.resolve(value)
+            if value is not None and ref.kind in CACHEABLE_ENTITIES:
+                self.cache.set(ref.kind, ref.id, value)
+            # Entidades estáveis embutidas na issue também aquecem o cache
+            if value is not None and ref.kind == 'issue':
+                self._prime(value)
+        return len(pending)
+
+    def _prime(self, issue: Dict[str, Any]) -> None:
+        for kind, value in (('team', issue.get('team')), ('workflowState', issue.get('state'))):
+            if value and value.get('id'):
+                self.cache.set(kind, value['id'], value)
+        for label in (issue.get('labels') or {}).get('nodes', []):
+            if label.get('id'):
+                self.cache.set('issueLabel', label['id'], label)
+
+
+def stats() -> Dict[str, Any]:
+    return {'cache': ENTITY_CACHE.stats(), 'rate_limit': RATE_LIMIT.snapshot()}
@@ -0,0 +1,226 @@
+"""
+ADC-Agents-Team - Metrics
+Spans de tempo por fase, histogramas em memória e exposição no formato
+texto do Prometheus
+"""
+
+import time
+import bisect
+import threading
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shared import request_log
+from shared.circuit_breaker import STATE_VALUES, snapshot_all as circuit_snapshot
+
+# Limites (segundos) dos buckets cumulativos
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (nome, tipo, help, [(labels, valor)]) calculados no momento do scrape
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Histogram:
+    """
+    Contagens por bucket + soma; `observe` é um bisect e um incremento
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimativa pelo limite superior do bucket (como histogram_quantile)
+        """
+        counts, count, _ = self.snapshot()
+        if not count:
+            return None
+        target, seen = q * count, 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class Registry:
+    """
+    Histogramas por (nome, labels), criados no primeiro uso
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], List[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str = '', **labels: str) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        family = self._histograms.get(name)
+        histogram = family.get(key) if family is not None else None
+        if histogram is None:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                histogram = family.setdefault(key, Histogram())
+                if help_text:
+                    self._help.setdefault(name, help_text)
+        return histogram
+
+    def add_collector(self, collector: Callable[[], List[Sample]]) -> None:
+        """
+        Gauges/counters lidos de outro módulo a cada scrape
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        count/média/p50/p95 por série, em ms (para /health)
+        """
+        result = {}
+        for name, family in sorted(self._histograms.items()):
+            for labels, histogram in sorted(family.items()):
+                _, count, total = histogram.snapshot()
+                if not count:
+                    continue
+                label = ','.join(v for _, v in labels)
+                result[f"{name}{{{label}}}" if label else name] = {
+                    'count': count,
+                    'avg_ms': round(total / count * 1000, 2),
+                    'p50_ms': round(histogram.quantile(0.5) * 1000, 2),
+                    'p95_ms': round(histogram.quantile(0.95) * 1000, 2),
+                }
+        return result
+
+    def render(self) -> str:
+        """
+        Formato de exposição texto do Prometheus (version 0.0.4)
+        """
+        lines = []
+        for name, family in sorted(self._histograms.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(family.items()):
+                counts, count, total = histogram.snapshot()
+                base = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{base + "," if base else ""}le="{le}"}} {cumulative}')
+                suffix = f"{{{base}}}" if base else ''
+                lines.append(f"{name}_sum{suffix} {total:.6f}")
+                lines.append(f"{name}_count{suffix} {count}")
+        for collector in self._collectors:
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    base = ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()))
+                    lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = Registry()
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SPAN_METRIC = 'adc_span_duration_seconds'
+REQUEST_METRIC = 'adc_request_duration_seconds'
+
+
+class span:
+    """
+    Mede uma fase: context manager (`with span('parse'):`) ou decorator
+    (`@span('github_dispatch')`). A duração vai para o histograma da fase
+    e para `timings_ms` da linha de log do request
+    """
+
+    __slots__ = ('name', '_started', '_histogram')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._histogram = REGISTRY.histogram(SPAN_METRIC, 'Duração das fases instrumentadas', span=name)
+
+    def __enter__(self) -> 'span':
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._started
+        self._histogram.observe(elapsed)
+        context = request_log.current()
+        if context is not None:
+            timings = context.fields.setdefault('timings_ms', {})
+            timings[self.name] = round(timings.get(self.name, 0.0) + elapsed * 1000, 2)
+
+    def __call__(self, function: Callable) -> Callable:
+        histogram, name = self._histogram, self.name
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            # Estado por chamada: o mesmo decorator é usado por várias threads
+            with _Timer(name, histogram):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+class _Timer(span):
+    __slots__ = ()
+
+    def __init__(self, name: str, histogram: Histogram):
+        self.name = name
+        self._histogram = histogram
+
+
+def observe_request(function: str, status: int, seconds: float) -> None:
+    REGISTRY.histogram(REQUEST_METRIC, 'Duração dos requests por função e status',
+                       function=function, status=f"{status // 100}xx").observe(seconds)
+
+
+request_log.add_observer(observe_request)
+
+
+def collect_circuits() -> List[Sample]:
+    circuits = circuit_snapshot()
+    return [
+        ('adc_circuit_state', 'gauge', 'Estado do circuito por upstream (0 closed, 1 half_open, 2 open)',
+         [({'upstream': name}, STATE_VALUES[c['state']]) for name, c in circuits.items()]),
+        ('adc_circuit_trips_total', 'counter', 'Aberturas do circuito por upstream',
+         [({'upstream': name}, c['trips']) for name, c in circuits.items()]),
+        ('adc_circuit_rejected_total', 'counter', 'Chamadas recusadas com o circuito aberto',
+         [({'upstream': name}, c['rejected']) for name, c in circuits.items()]),
+    ]
+
+
+REGISTRY.add_collector(collect_circuits)
+
+
+def prometheus_response() -> Tuple[str, int, Dict[str, str]]:
+    return REGISTRY.render(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
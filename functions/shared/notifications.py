@@ -0,0 +1,226 @@
+"""
+ADC-Agents-Team - Notifications
+Dispatcher assíncrono de notificações com coalescência por janela
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from shared import http_client
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima (s) do flush ao fim de cada request
+NOTIFICATION_FLUSH_SECONDS = float(os.environ.get('NOTIFICATION_FLUSH_SECONDS', '3'))
+
+LEVEL_EMOJI = {
+    'success': '✅',
+    'info': 'ℹ️',
+    'warning': '⚠️',
+    'error': '❌'
+}
+
+
+class NotificationSink:
+    """
+    Destino de notificações; recebe lotes já coalescidos
+    """
+
+    name = 'sink'
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+
+class StubSink(NotificationSink):
+    """
+    Sink local: apenas registra os lotes (desenvolvimento e testes)
+    """
+
+    name = 'stub'
+
+    def __init__(self, keep: int = 100):
+        self.keep = keep
+        self.batches: List[List[Dict[str, Any]]] = []
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        self.batches.append(batch)
+        del self.batches[:-self.keep]
+        logger.info(f"Notification batch ({len(batch)}): " + '; '.join(n['title'] for n in batch))
+
+
+class SlackSink(NotificationSink):
+    """
+    Incoming webhook do Slack: um lote vira uma única mensagem
+    """
+
+    name = 'slack'
+
+    def __init__(self, webhook_url: str):
+        self.webhook_url = webhook_url
+
+    @staticmethod
+    def format_batch(batch: List[Dict[str, Any]]) -> str:
+        if len(batch) == 1:
+            item = batch[0]
+            return f"{LEVEL_EMOJI.get(item['level'], '')} *{item['title']}*\n{item['message']}"
+
+        lines = [f"*{len(batch)} atualizações do pipeline*"]
+        for item in batch:
+            lines.append(f"{LEVEL_EMOJI.get(item['level'], '•')} *{item['title']}* — {item['message']}")
+        return '\n'.join(lines)
+
+    def send(self, batch: List[Dict[str, Any]]) -> None:
+        response = http_client.post(self.webhook_url, json={'text': self.format_batch(batch)})
+        if response.status_code >= 400:
+            raise RuntimeError(f"Slack webhook returned {response.status_code}")
+
+
+class NotificationDispatcher:
+    """
+    Fila em processo + thread de flush em background
+
+    `notify` nunca bloqueia: notificações recebidas dentro de `window_seconds`
+    são agrupadas e enviadas como um lote para cada sink. `flush` fecha a
+    janela em curso e espera o envio.
+    """
+
+    def __init__(self, sinks: List[NotificationSink], window_seconds: float = 2.0,
+                 max_batch: int = 20, max_queue: int = 1000):
+        self.sinks = sinks
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self.stats = {'queued': 0, 'sent': 0, 'batches': 0, 'dropped': 0, 'errors': 0}
+
+    def notify(self, title: str, message: str, level: str = 'info', **extra) -> bool:
+        item = {
+            'title': title,
+            'message': message,
+            'level': level,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        item.update(extra)
+        with self._idle:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                return False
+            self._pending += 1
+        self.stats['queued'] += 1
+        self._ensure_thread()
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Envia já o que está na fila, sem esperar a janela de coalescência, e
+        aguarda até `timeout` s; False se o envio não terminou a tempo
+        """
+        with self._idle:
+            if not self._pending:
+                return True
+            self._ensure_thread()
+        try:
+            # Sentinela: encerra a janela em curso
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+            self._thread.start()
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        first = self._queue.get()
+        while first is None:
+            # Flush sem janela aberta: nada a fechar
+            first = self._queue.get()
+        batch = [first]
+        # Erros saem imediatamente; o resto espera a janela de coalescência
+        deadline = time.monotonic() + (0 if first['level'] == 'error' else self.window_seconds)
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            for sink in self.sinks:
+                try:
+                    sink.send(batch)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"Notification sink {sink.name} failed: {e}")
+            with self._idle:
+                self.stats['sent'] += len(batch)
+                self.stats['batches'] += 1
+                self._pending -= len(batch)
+                self._idle.notify_all()
+
+
+def create_notification_dispatcher() -> NotificationDispatcher:
+    """
+    Monta os sinks a partir do ambiente (SLACK_WEBHOOK_URL); sem
+    configuração usa o StubSink
+    """
+    sinks: List[NotificationSink] = []
+    slack_url = os.environ.get('SLACK_WEBHOOK_URL', '')
+    if slack_url:
+        sinks.append(SlackSink(slack_url))
+    if not sinks:
+        sinks.append(StubSink())
+
+    return NotificationDispatcher(
+        sinks,
+        window_seconds=float(os.environ.get('NOTIFICATION_WINDOW_SECONDS', '2')),
+        max_batch=int(os.environ.get('NOTIFICATION_MAX_BATCH', '20'))
+    )
+
+
+def flush_after(get_dispatcher: Callable[[], NotificationDispatcher],
+                timeout: float = NOTIFICATION_FLUSH_SECONDS):
+    """
+    Decorator de handler HTTP: envia as notificações enfileiradas antes da
+    resposta (no máximo `timeout` s). Em Cloud Functions a CPU é cortada
+    depois da resposta e a thread de envio pode nunca mais rodar
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                dispatcher = get_dispatcher()
+                if dispatcher.pending and not dispatcher.flush(timeout):
+                    logger.warning(f"⚠️ {dispatcher.pending} notifications still pending after {timeout}s flush")
+        return wrapper
+    return decorator
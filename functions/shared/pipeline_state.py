@@ -0,0 +1,492 @@
+"""
+ADC-Agents-Team - Pipeline State
+Estado persistente do pipeline por projeto (estágio atual, conclusões, aprovações)
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+STAGE_SEQUENCE = ['L1', 'L2', 'L3', 'L4', 'L5', 'L6', 'L7', 'L8', 'L9']
+
+# Lookup O(1) do próximo estágio
+NEXT_STAGE: Dict[str, Optional[str]] = {
+    stage: (STAGE_SEQUENCE[i + 1] if i + 1 < len(STAGE_SEQUENCE) else None)
+    for i, stage in enumerate(STAGE_SEQUENCE)
+}
+
+DEFAULT_STATE_PATH = os.path.join('/tmp', 'adc-pipeline-state.sqlite3')
+
+# Validade (s) da reserva de um estágio; cobre o dispatch com retries e os efeitos da aprovação
+DEFAULT_CLAIM_TTL = float(os.environ.get('PIPELINE_CLAIM_TTL', '120'))
+
+
+def new_state(project: str) -> Dict[str, Any]:
+    return {
+        'project': project,
+        'current_stage': None,
+        'completed': {},           # estágio -> timestamp de conclusão
+        'pending_approval': None,  # estágio aguardando aprovação manual
+        'claims': {},              # estágio -> {token, expires_at} durante a transição
+        'pending_dispatch': None,  # dispatch coalescido aguardando a janela (shared/coalescer.py)
+        'failed_dispatch': None,   # último dispatch coalescido descartado por falha
+        'version': 0,
+        'updated_at': None
+    }
+
+
+def _rank(stage: str) -> int:
+    return STAGE_SEQUENCE.index(stage)
+
+
+def _is_stale(state: Dict[str, Any], stage: str) -> bool:
+    """
+    Dispatch de `stage` não faz mais sentido: o estágio já foi concluído ou
+    o pipeline já passou dele (ex.: aprovação manual durante a janela)
+    """
+    current = state.get('current_stage')
+    return stage in state['completed'] or (current is not None and _rank(stage) < _rank(current))
+
+
+def _drop_stale_dispatch(state: Dict[str, Any], now: str) -> bool:
+    """
+    Descarta a pendência coalescida que ficou para trás, concluindo os
+    estágios aprovados que ela cobria; retorna True se descartou
+    """
+    pending = state.get('pending_dispatch')
+    if not pending or not _is_stale(state, pending['stage']):
+        return False
+    for stage in pending['stages']:
+        state['completed'].setdefault(stage, now)
+    state['pending_dispatch'] = None
+    return True
+
+
+class PipelineStateBackend:
+    """
+    Interface do backend persistente
+
+    `compare_and_set` grava apenas se a versão armazenada for `expected_version`
+    """
+
+    def load(self, project: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def compare_and_set(self, project: str, expected_version: int, state: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+
+class SQLitePipelineStateBackend(PipelineStateBackend):
+    """
+    Backend SQLite (arquivo local)
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pipeline_state (
+                project TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                state TEXT NOT NULL
+            )
+            """
+        )
+
+    def load(self, project: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT state FROM pipeline_state WHERE project = ?', (project,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def compare_and_set(self, project: str, expected_version: int, state: Dict[str, Any]) -> bool:
+        body = json.dumps(state, separators=(',', ':'))
+        with self._lock:
+            if expected_version == 0:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO pipeline_state (project, version, state) VALUES (?, ?, ?)',
+                    (project, state['version'], body)
+                )
+            else:
+                cursor = self._conn.execute(
+                    'UPDATE pipeline_state SET version = ?, state = ? WHERE project = ? AND version = ?',
+                    (state['version'], body, project, expected_version)
+                )
+            return cursor.rowcount == 1
+
+
+class FirestorePipelineStateBackend(PipelineStateBackend):
+    """
+    Backend Firestore (um documento por projeto), compartilhado entre as
+    instâncias: claims e compare-and-set valem para o serviço inteiro
+
+    O compare-and-set grava com precondição no updateTime do documento lido
+    com a versão esperada (a última leitura é lembrada para poupar um GET).
+    """
+
+    def __init__(self, client, collection: str):
+        self.client = client
+        self.collection = collection
+        self._seen: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, project: str) -> Optional[Dict[str, Any]]:
+        doc = self.client.get(self.collection, project)
+        if doc is None:
+            return None
+        state = json.loads(doc['fields']['state'])
+        with self._lock:
+            self._seen[project] = (state['version'], doc['update_time'])
+        return state
+
+    def load(self, project: str) -> Optional[Dict[str, Any]]:
+        return self._read(project)
+
+    def compare_and_set(self, project: str, expected_version: int, state: Dict[str, Any]) -> bool:
+        fields = {'state': json.dumps(state, separators=(',', ':')), 'version': state['version']}
+        if expected_version == 0:
+            write = self.client.update_write(self.collection, project, fields, exists=False)
+        else:
+            with self._lock:
+                seen = self._seen.get(project)
+            if not seen or seen[0] != expected_version:
+                self._read(project)
+                with self._lock:
+                    seen = self._seen.get(project)
+                if not seen or seen[0] != expected_version:
+                    return False
+            write = self.client.update_write(self.collection, project, fields, update_time=seen[1])
+
+        results = self.client.commit([write])
+        if results is None:
+            with self._lock:
+                self._seen.pop(project, None)
+            return False
+        with self._lock:
+            self._seen[project] = (state['version'], results[0]['updateTime'])
+        return True
+
+
+class PipelineStateStore:
+    """
+    Cache em memória na frente do backend persistente
+
+    Transições usam compare-and-set: em conflito (outra instância gravou
+    antes) o estado é recarregado e a transição reavaliada.
+    """
+
+    def __init__(self, backend: PipelineStateBackend, cache_ttl: float = 30.0, max_retries: int = 5):
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self.max_retries = max_retries
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, project: str) -> Dict[str, Any]:
+        """
+        Estado do projeto (cópia), servido do cache quando fresco
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(project)
+        if cached and cached[0] > now:
+            return json.loads(json.dumps(cached[1]))
+
+        state = self.backend.load(project) or new_state(project)
+        self._remember(project, state)
+        return json.loads(json.dumps(state))
+
+    def _remember(self, project: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._cache[project] = (time.monotonic() + self.cache_ttl, state)
+
+    def _invalidate(self, project: str) -> None:
+        with self._lock:
+            self._cache.pop(project, None)
+
+    def claim_stage(self, project: str, stage: str, ttl: float = DEFAULT_CLAIM_TTL) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Reserva a transição de `stage` (compare-and-set) antes dos efeitos
+        colaterais: entregas concorrentes do mesmo Done não disparam duas vezes
+
+        Retorna (token, state); token None se o estágio já está concluído ou
+        reservado por outra entrega (reserva vencida pode ser retomada).
+        """
+        fresh = False
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            if stage in state['completed']:
+                return None, state
+            claims = state.setdefault('claims', {})
+            current = claims.get(stage)
+            if (current and current['expires_at'] > time.time()) or \
+                    stage in (state.get('pending_dispatch') or {}).get('stages', []):
+                if fresh:
+                    return None, state
+                # Reserva vista no cache pode já ter sido liberada por outra instância
+                self._invalidate(project)
+                fresh = True
+                continue
+
+            expected = state['version']
+            token = uuid.uuid4().hex
+            claims[stage] = {'token': token, 'expires_at': time.time() + ttl}
+            state['version'] = expected + 1
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return token, json.loads(json.dumps(state))
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def release_stage(self, project: str, stage: str, token: str) -> bool:
+        """
+        Desfaz a reserva (transição falhou e será reprocessada)
+        """
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            claims = state.setdefault('claims', {})
+            if (claims.get(stage) or {}).get('token') != token:
+                return False
+
+            expected = state['version']
+            del claims[stage]
+            state['version'] = expected + 1
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return True
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def schedule_dispatch(self, project: str, stage: str, next_stage: str, claim: str,
+                          window: float, max_delay: float,
+                          payload: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Troca a reserva de `stage` por uma pendência de dispatch coalescido:
+        a pendência guarda o estágio mais avançado a disparar e os estágios
+        aprovados que ele cobre, concluídos só depois do dispatch
+
+        Retorna (outcome, pending); outcome 'scheduled' (nova pendência),
+        'superseded' (substituiu um estágio anterior) ou 'ignored' (já há
+        estágio igual ou mais avançado pendente, ou `next_stage` já ficou
+        para trás: `stage` é concluído na hora e pending pode ser None).
+        """
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            now = time.time()
+            _drop_stale_dispatch(state, datetime.utcnow().isoformat())
+            pending = state.get('pending_dispatch')
+            if _is_stale(state, next_stage):
+                state['completed'].setdefault(stage, datetime.utcnow().isoformat())
+                outcome = 'ignored'
+            elif pending is None:
+                pending = {
+                    'stage': next_stage, 'payload': payload or {}, 'stages': [],
+                    'first_at': now, 'due_at': now + window, 'attempts': 0, 'lease': None
+                }
+                outcome = 'scheduled'
+            elif _rank(next_stage) > _rank(pending['stage']):
+                pending.update(stage=next_stage, payload=payload or {}, attempts=0,
+                               due_at=min(now + window, pending['first_at'] + max_delay))
+                outcome = 'superseded'
+            else:
+                outcome = 'ignored'
+            if pending is not None and stage not in state['completed'] and stage not in pending['stages']:
+                pending['stages'].append(stage)
+
+            expected = state['version']
+            state['pending_dispatch'] = pending
+            claims = state.setdefault('claims', {})
+            if (claims.get(stage) or {}).get('token') == claim:
+                del claims[stage]
+            state['version'] = expected + 1
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return outcome, json.loads(json.dumps(pending)) if pending else None
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def lease_dispatch(self, project: str, lease_seconds: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Reserva a pendência vencida para disparar (uma instância por vez)
+
+        Retorna (pending, 0) com `pending['lease']['token']`, ou (None, espera)
+        se a pendência ainda está na janela ou em dispatch por outra
+        instância; (None, 0) se não há pendência (ou ela ficou para trás e
+        foi descartada).
+        """
+        # Leitura fresca: um cache antigo sem pendência descartaria o evento da fila
+        self._invalidate(project)
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            pending = state.get('pending_dispatch')
+            if pending is None:
+                return None, 0.0
+
+            expected = state['version']
+            if _drop_stale_dispatch(state, datetime.utcnow().isoformat()):
+                state['version'] = expected + 1
+                if self.backend.compare_and_set(project, expected, state):
+                    self._remember(project, state)
+                    return None, 0.0
+                self._invalidate(project)
+                continue
+
+            now = time.time()
+            lease = pending.get('lease')
+            if lease and lease['expires_at'] > now:
+                return None, lease['expires_at'] - now
+            if pending['due_at'] > now:
+                return None, pending['due_at'] - now
+
+            pending['lease'] = {
+                'token': uuid.uuid4().hex, 'expires_at': now + lease_seconds,
+                'stage': pending['stage'], 'stages': list(pending['stages'])
+            }
+            state['version'] = expected + 1
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return json.loads(json.dumps(pending)), 0.0
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def settle_dispatch(self, project: str, token: str, outcome: str,
+                        retry_in: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        Registra o resultado do dispatch reservado por `lease_dispatch`
+
+        'dispatched' conclui os estágios cobertos; 'retry' devolve a pendência
+        para daqui a `retry_in` s; 'failed' descarta a pendência (estágios
+        continuam abertos para reaprovação) e a guarda em `failed_dispatch`.
+        Se um estágio mais avançado chegou durante o dispatch, ele continua
+        pendente. O estágio atual nunca retrocede e uma aprovação manual
+        pendente mais avançada é mantida. Retorna a pendência restante (ou None).
+        """
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            pending = state.get('pending_dispatch')
+            lease = (pending or {}).get('lease') or {}
+            if lease.get('token') != token:
+                # Reserva vencida e retomada por outra instância
+                return pending
+
+            expected = state['version']
+            now = datetime.utcnow().isoformat()
+            if outcome == 'retry':
+                pending.update(lease=None, attempts=pending['attempts'] + 1, due_at=time.time() + retry_in)
+            else:
+                superseded = pending['stage'] != lease['stage']
+                covered = lease['stages'] if superseded else pending['stages']
+                if outcome == 'dispatched':
+                    for stage in covered:
+                        state['completed'].setdefault(stage, now)
+                    current = state['current_stage']
+                    if current is None or _rank(lease['stage']) >= _rank(current):
+                        state['current_stage'] = lease['stage']
+                    waiting = state['pending_approval']
+                    if waiting is not None and _rank(waiting) <= _rank(lease['stage']):
+                        state['pending_approval'] = None
+                    state['updated_at'] = now
+                else:
+                    state['failed_dispatch'] = {
+                        'stage': lease['stage'], 'stages': covered,
+                        'attempts': pending['attempts'] + 1, 'failed_at': now
+                    }
+                remaining = [s for s in pending['stages'] if s not in covered]
+                pending = dict(pending, stages=remaining, lease=None) if superseded else None
+            state['pending_dispatch'] = pending
+            state['version'] = expected + 1
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return json.loads(json.dumps(pending)) if pending else None
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def complete_stage(self, project: str, stage: str, awaiting_approval: bool = False) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Marca `stage` como concluído e avança o estágio atual; uma pendência
+        coalescida que ficou para trás é descartada
+
+        Retorna (changed, state); changed=False se o estágio já constava
+        como concluído (transição redundante).
+        """
+        for _ in range(self.max_retries):
+            state = self.get(project)
+            if stage in state['completed']:
+                return False, state
+
+            expected = state['version']
+            next_stage = NEXT_STAGE.get(stage)
+            state['completed'][stage] = datetime.utcnow().isoformat()
+            current = state['current_stage']
+            if current is None or next_stage is None or _rank(next_stage) >= _rank(current):
+                # Conclusão atrasada de um estágio anterior não faz o pipeline retroceder
+                state['current_stage'] = next_stage
+                state['pending_approval'] = next_stage if awaiting_approval else None
+            state.setdefault('claims', {}).pop(stage, None)
+            _drop_stale_dispatch(state, state['completed'][stage])
+            state['version'] = expected + 1
+            state['updated_at'] = state['completed'][stage]
+
+            if self.backend.compare_and_set(project, expected, state):
+                self._remember(project, state)
+                return True, json.loads(json.dumps(state))
+            self._invalidate(project)
+
+        raise RuntimeError(f"Pipeline state for {project} is under contention")
+
+    def status(self, project: str) -> Dict[str, Any]:
+        """
+        Resumo para consultas de status sem chamar o Linear
+        """
+        state = self.get(project)
+        return {
+            'project': project,
+            'current_stage': state['current_stage'],
+            'completed_stages': [s for s in STAGE_SEQUENCE if s in state['completed']],
+            'completed_at': state['completed'],
+            'pending_approval': state['pending_approval'],
+            'pending_dispatch': state.get('pending_dispatch'),
+            'failed_dispatch': state.get('failed_dispatch'),
+            'pipeline_completed': all(s in state['completed'] for s in STAGE_SEQUENCE),
+            'version': state['version']
+        }
+
+
+def create_pipeline_state_store(url: Optional[str] = None) -> PipelineStateStore:
+    """
+    Cria o store a partir de PIPELINE_STATE_URL: `firestore://<projeto>/<coleção>`
+    (compartilhado entre instâncias), `sqlite:///caminho` ou caminho (local à instância)
+    """
+    url = url or os.environ.get('PIPELINE_STATE_URL', '') or DEFAULT_STATE_PATH
+    if url.startswith('firestore://'):
+        from shared.firestore import create_firestore_client
+        backend: PipelineStateBackend = FirestorePipelineStateBackend(*create_firestore_client(url))
+    elif url.startswith('sqlite://'):
+        backend = SQLitePipelineStateBackend(url[len('sqlite://'):] or ':memory:')
+    elif '://' in url:
+        raise ValueError(f"Unsupported pipeline state backend: {url}")
+    else:
+        backend = SQLitePipelineStateBackend(url)
+    return PipelineStateStore(
+        backend,
+        cache_ttl=float(os.environ.get('PIPELINE_STATE_CACHE_TTL', '30'))
+    )
@@ -0,0 +1,152 @@
+"""
+ADC-Agents-Team - Project Registry
+Projetos atendidos pela instância: repo, pasta do Drive e estágios com
+auto-aprovação, indexados por nome e pelos ids de time/projeto do Linear
+"""
+
+import os
+import json
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Project:
+    """
+    Configuração resolvida de um pipeline (imutável após o warm start)
+    """
+
+    __slots__ = ('name', 'repo', 'drive_folder_id', 'auto_approve_stages', 'linear_team_id', 'linear_project_id')
+
+    def __init__(self, name: str, repo: str, drive_folder_id: str = '',
+                 auto_approve_stages: Iterable[str] = (), linear_team_id: str = '', linear_project_id: str = ''):
+        self.name = name
+        self.repo = repo
+        self.drive_folder_id = drive_folder_id
+        self.auto_approve_stages: FrozenSet[str] = frozenset(auto_approve_stages)
+        self.linear_team_id = linear_team_id
+        self.linear_project_id = linear_project_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'repo': self.repo,
+            'drive_folder_id': self.drive_folder_id,
+            'auto_approve_stages': sorted(self.auto_approve_stages),
+            'linear_team_id': self.linear_team_id,
+            'linear_project_id': self.linear_project_id,
+        }
+
+
+def default_repo(owner: str, project_name: str) -> str:
+    """
+    Convenção de nome do repositório de um projeto (owner/llm-app-<nome>)
+    """
+    return f"{owner}/llm-app-{project_name.lower().replace('_', '-')}"
+
+
+class ProjectRegistry:
+    """
+    Índices montados uma vez por instância: o roteamento de um evento é um
+    lookup em dict (id do projeto Linear → id do time → projeto padrão)
+    """
+
+    def __init__(self, projects: List[Project], default: Project, owner: str = ''):
+        self.default = default
+        self.owner = owner
+        self._by_name: Dict[str, Project] = {}
+        self._by_linear_project: Dict[str, Project] = {}
+        self._by_linear_team: Dict[str, Project] = {}
+        for project in [default] + projects:
+            self._by_name[project.name] = project
+            if project.linear_project_id:
+                self._by_linear_project[project.linear_project_id] = project
+            # Time compartilhado por vários projetos: o primeiro declarado responde pelo time
+            if project.linear_team_id:
+                self._by_linear_team.setdefault(project.linear_team_id, project)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get(self, name: str) -> Project:
+        """
+        Projeto pelo nome; nomes não registrados usam a convenção padrão
+        (com os estágios de auto-aprovação do projeto padrão)
+        """
+        project = self._by_name.get(name)
+        if project is None:
+            project = Project(name, default_repo(self.owner, name), self.default.drive_folder_id,
+                              self.default.auto_approve_stages)
+        return project
+
+    def resolve(self, linear_project_id: Optional[str] = None, linear_team_id: Optional[str] = None) -> Project:
+        """
+        Projeto de um evento do Linear
+        """
+        if linear_project_id:
+            project = self._by_linear_project.get(linear_project_id)
+            if project is not None:
+                return project
+        if linear_team_id:
+            project = self._by_linear_team.get(linear_team_id)
+            if project is not None:
+                return project
+        return self.default
+
+    def names(self) -> List[str]:
+        return sorted(self._by_name)
+
+
+def load_projects_config(raw: str) -> List[Dict[str, Any]]:
+    """
+    PROJECTS_CONFIG: JSON inline (lista de projetos) ou caminho para um arquivo JSON
+    """
+    raw = raw.strip()
+    if not raw:
+        return []
+    if not raw.startswith('['):
+        with open(raw, encoding='utf-8') as f:
+            raw = f.read()
+    entries = json.loads(raw)
+    if not isinstance(entries, list):
+        raise ValueError('PROJECTS_CONFIG must be a JSON list')
+    return entries
+
+
+def build_registry(default_name: str, owner: str, drive_folder_id: str, auto_approve_stages: Iterable[str],
+                   config: str = '') -> ProjectRegistry:
+    default = Project(default_name, default_repo(owner, default_name), drive_folder_id, auto_approve_stages)
+    projects = []
+    for entry in load_projects_config(config):
+        name = entry['name']
+        stages = entry.get('auto_approve_stages')
+        if isinstance(stages, str):
+            stages = [s.strip() for s in stages.split(',') if s.strip()]
+        projects.append(Project(
+            name,
+            entry.get('repo') or default_repo(owner, name),
+            entry.get('drive_folder_id') or drive_folder_id,
+            default.auto_approve_stages if stages is None else stages,
+            entry.get('linear_team_id', ''),
+            entry.get('linear_project_id', ''),
+        ))
+    registry = ProjectRegistry(projects, default, owner)
+    logger.info(f"Project registry loaded with {len(registry)} projects")
+    return registry
+
+
+def create_project_registry() -> ProjectRegistry:
+    """
+    Registry a partir das variáveis de ambiente (PROJECT_NAME, GITHUB_OWNER,
+    DRIVE_FOLDER_ID, AUTO_APPROVE_STAGES e PROJECTS_CONFIG)
+    """
+    return build_registry(
+        settings.project_name,
+        settings.github_owner,
+        settings.drive_folder_id,
+        settings.auto_approve_stages,
+        os.environ.get('PROJECTS_CONFIG', '')
+    )
@@ -0,0 +1,244 @@
+"""
+ADC-Agents-Team - Request Log
+Logging estruturado: uma linha JSON por request com campos avaliados sob
+demanda, amostragem dos logs informativos e escrita fora do caminho do request
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import contextvars
+import logging.handlers
+from functools import wraps
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+LOG_OUTPUT = os.environ.get('LOG_OUTPUT', 'json')  # json | text
+# Fração dos requests cujos logs INFO/DEBUG são emitidos (WARNING+ e a linha
+# de resumo do request nunca são amostrados)
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1'))
+LOG_ASYNC = os.environ.get('LOG_ASYNC', 'true').lower() in ('1', 'true', 'yes')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Nível próprio: a linha de resumo sai mesmo com LOG_LEVEL=WARNING
+request_logger = logging.getLogger('request')
+request_logger.setLevel(logging.INFO)
+
+
+class RequestContext:
+    """
+    Campos acumulados durante um request; valores callables só são
+    avaliados quando a linha é formatada
+    """
+
+    __slots__ = ('function', 'fields', 'sampled', 'started')
+
+    def __init__(self, function: str, sampled: bool):
+        self.function = function
+        self.fields: Dict[str, Any] = {}
+        self.sampled = sampled
+        self.started = time.perf_counter()
+
+
+_current: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar('request_log', default=None)
+
+# Callbacks (função, status, segundos) chamados ao fim de cada request (ex.: métricas)
+_observers: List[Callable[[str, int, float], None]] = []
+
+
+def add_observer(callback: Callable[[str, int, float], None]) -> None:
+    if callback not in _observers:
+        _observers.append(callback)
+
+
+def bind(**fields: Any) -> None:
+    """
+    Adiciona campos à linha do request atual (no-op fora de um request)
+    """
+    context = _current.get()
+    if context is not None:
+        context.fields.update(fields)
+
+
+def current() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def _resolve(value: Any) -> Any:
+    if callable(value):
+        try:
+            return value()
+        except Exception as e:
+            return f"<error: {e}>"
+    return value
+
+
+def response_status(result: Any) -> int:
+    """
+    Status de qualquer retorno aceito pelo Flask (tupla, Response ou corpo)
+    """
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[1], int):
+        return result[1]
+    return getattr(result, 'status_code', 200)
+
+
+def log_request(function: str, sample_rate: Optional[float] = None) -> Callable:
+    """
+    Decorator do entry point HTTP: abre o contexto do request e, ao final,
+    emite uma única linha com método, path, status, duração e campos ligados
+    """
+    rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def decorator(handler: Callable) -> Callable:
+        @wraps(handler)
+        def wrapper(request, *args, **kwargs):
+            context = RequestContext(function, rate >= 1 or random.random() < rate)
+            token = _current.set(context)
+            status = 500
+            try:
+                result = handler(request, *args, **kwargs)
+                status = response_status(result)
+                return result
+            finally:
+                _current.reset(token)
+                elapsed = time.perf_counter() - context.started
+                for observer in _observers:
+                    observer(function, status, elapsed)
+                request_logger.log(
+                    logging.ERROR if status >= 500 else logging.INFO,
+                    '%s %s %s', request.method, request.path, status,
+                    extra={'fields': {
+                        'function': function,
+                        'method': request.method,
+                        'path': request.path,
+                        'status': status,
+                        'duration_ms': round(elapsed * 1000, 2),
+                        **context.fields,
+                    }, 'always': True}
+                )
+        return wrapper
+    return decorator
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Descarta INFO/DEBUG de requests fora da amostra antes de enfileirar;
+    fora de um request aplica a taxa por registro
+    """
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1 or getattr(record, 'always', False):
+            return True
+        context = _current.get()
+        keep = context.sampled if context is not None else random.random() < self.rate
+        if not keep:
+            self.dropped += 1
+        return keep
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Uma linha JSON por registro, no formato estruturado do Cloud Logging
+    (`severity`, `message` e campos extras no mesmo objeto)
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'severity': record.levelname,
+            'message': record.getMessage(),
+            'logger': record.name,
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            payload.update({key: _resolve(value) for key, value in fields.items()})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que descarta (e conta) registros com a fila cheia em vez
+    de bloquear o request
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Campos lazy são resolvidos na thread de escrita: só a mensagem é fixada aqui
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_filters: list = []
+_queue_handlers: list = []
+
+
+def build_handler(output: str = LOG_OUTPUT, use_queue: bool = LOG_ASYNC,
+                  sample_rate: float = LOG_SAMPLE_RATE) -> logging.Handler:
+    """
+    Handler raiz: formatação e I/O numa thread de escrita (QueueListener)
+    """
+    global _listener
+    stream = logging.StreamHandler(sys.stdout if output == 'json' else sys.stderr)
+    stream.setFormatter(JsonFormatter() if output == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    sampling = SamplingFilter(sample_rate)
+    _filters.append(sampling)
+    if not use_queue:
+        stream.addFilter(sampling)
+        return stream
+
+    handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(sampling)
+    _queue_handlers.append(handler)
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush)
+    return handler
+
+
+def flush() -> None:
+    """
+    Esvazia a fila de logs (fim do processo ou antes de congelar a instância)
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stats() -> Dict[str, int]:
+    return {
+        'sampled_out': sum(f.dropped for f in _filters),
+        'queue_dropped': sum(h.dropped for h in _queue_handlers),
+        'queue_pending': sum(h.queue.qsize() for h in _queue_handlers),
+    }
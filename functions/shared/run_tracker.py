@@ -0,0 +1,338 @@
+"""
+ADC-Agents-Team - Workflow Run Tracker
+Correlaciona dispatches (204 sem id de run) com os workflow runs do GitHub
+
+Cada dispatch envia um `dispatch_id` que o workflow põe no run-name; um único
+GET condicional (ETag) dos runs recentes por repo/workflow e por intervalo
+atende todos os dispatches pendentes daquele repo, em vez de um poll por dispatch.
+"""
+
+import os
+import re
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from shared import http_client
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+# Intervalo mínimo (s) entre dois polls do mesmo repo/workflow
+RUN_POLL_INTERVAL = float(os.environ.get('RUN_POLL_INTERVAL', '15'))
+# Dispatch sem run correspondente depois disso (s) vira 'not_found'
+RUN_MATCH_TIMEOUT = float(os.environ.get('RUN_MATCH_TIMEOUT', '600'))
+RUN_POLL_PAGE_SIZE = int(os.environ.get('RUN_POLL_PAGE_SIZE', '50'))
+RUN_TRACKER_MAX_ENTRIES = int(os.environ.get('RUN_TRACKER_MAX_ENTRIES', '1000'))
+
+# Diferença de relógio tolerada entre o `timestamp` do dispatch e o created_at do run
+CLOCK_SKEW = timedelta(seconds=30)
+
+DISPATCH_ID_PATTERN = re.compile(r'\[([0-9a-f]{12})\]')
+RUN_STAGE_PATTERN = re.compile(r'\b(L\d+)\b')
+
+TERMINAL_STATUSES = frozenset({'completed', 'not_found'})
+
+
+def new_dispatch_id() -> str:
+    """
+    Id curto enviado como input `dispatch_id` (aparece no run-name como `[id]`)
+    """
+    return uuid.uuid4().hex[:12]
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """
+    ISO 8601 (com ou sem 'Z') → datetime UTC sem fuso
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.replace(tzinfo=None) - parsed.utcoffset()
+    return parsed
+
+
+class _RepoPoll:
+    """
+    Cache do último poll de um repo/workflow (ETag + runs recentes)
+    """
+
+    __slots__ = ('etag', 'polled_at', 'runs', 'lock')
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.polled_at = 0.0
+        self.runs: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+
+class RunTracker:
+    """
+    Dispatches pendentes por id; runs casados pelo `[dispatch_id]` do título
+    ou, em workflows sem esse input, por estágio/projeto e created_at
+    """
+
+    def __init__(self, token: Optional[str], api_url: str = GITHUB_API_URL,
+                 poll_interval: float = RUN_POLL_INTERVAL, match_timeout: float = RUN_MATCH_TIMEOUT,
+                 page_size: int = RUN_POLL_PAGE_SIZE, max_entries: int = RUN_TRACKER_MAX_ENTRIES,
+                 on_update: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None):
+        self.api_url = api_url.rstrip('/')
+        self.poll_interval = poll_interval
+        self.match_timeout = match_timeout
+        self.page_size = page_size
+        self.max_entries = max_entries
+        # Chamado com (registro, run) quando o run de um dispatch muda de status
+        self.on_update = on_update
+        self._headers = {
+            'Authorization': f"Bearer {token}",
+            'Accept': 'application/vnd.github.v3+json'
+        } if token else None
+        self._records: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._polls: Dict[Tuple[str, str], _RepoPoll] = {}
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+        self.stats = {'tracked': 0, 'polls': 0, 'not_modified': 0, 'poll_errors': 0,
+                      'matched': 0, 'completed': 0, 'not_found': 0}
+
+    def track(self, repo: str, workflow: str, dispatch_id: str, project: Optional[str] = None,
+              stage: Optional[str] = None, dispatched_at: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registra um dispatch aceito (204); o poller em background passa a procurar o run
+        """
+        record = {
+            'dispatch_id': dispatch_id,
+            'repo': repo,
+            'workflow': workflow,
+            'project': project,
+            'stage': stage,
+            'dispatched_at': datetime.utcnow().isoformat() if dispatched_at is None else dispatched_at,
+            'tracked_at': time.monotonic(),
+            'status': 'pending',
+            'conclusion': None,
+            'run_id': None,
+            'html_url': None,
+            'updated_at': None,
+        }
+        with self._lock:
+            self._records[dispatch_id] = record
+            self._records.move_to_end(dispatch_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+            self.stats['tracked'] += 1
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll_loop, name='run-tracker', daemon=True)
+                self._poller.start()
+        return dict(record)
+
+    def status(self, dispatch_id: str, repo: Optional[str] = None, workflow: Optional[str] = None,
+               project: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Situação do run de um dispatch, usando o poll em cache se ainda estiver
+        no intervalo. Dispatches feitos por outra instância (webhook) são
+        procurados pelo id quando `repo`/`workflow` são informados e só passam
+        a ser acompanhados se um run com o id existir (id desconhecido → None)
+        """
+        with self._lock:
+            record = self._records.get(dispatch_id)
+        if record is None:
+            if not repo or not workflow:
+                return None
+            runs = self.refresh(repo, workflow)
+            if not any(self._dispatch_id(run) == dispatch_id for run in runs):
+                return None
+            # Sem horário do dispatch: só o id no título casa
+            self.track(repo, workflow, dispatch_id, project, dispatched_at='')
+            self._match(repo, workflow, runs)
+        else:
+            if record['status'] in TERMINAL_STATUSES:
+                return dict(record)
+            self.refresh(record['repo'], record['workflow'])
+        with self._lock:
+            record = self._records.get(dispatch_id)
+            return dict(record) if record else None
+
+    def latest(self, repo: str, workflow: str, stage: str, project: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Run mais recente de um estágio entre os runs do último poll
+        """
+        runs = self.refresh(repo, workflow)
+        for run in runs:
+            title = run.get('display_title') or run.get('name') or ''
+            match = RUN_STAGE_PATTERN.search(title)
+            if match and match.group(1) == stage and (not project or project in title):
+                return self._run_fields(run)
+        return None
+
+    def refresh(self, repo: str, workflow: str, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Runs recentes do repo/workflow; no máximo um GET por intervalo, compartilhado
+        entre todos os chamadores (304 mantém a lista anterior)
+        """
+        with self._lock:
+            poll = self._polls.get((repo, workflow))
+            if poll is None:
+                poll = self._polls[(repo, workflow)] = _RepoPoll()
+
+        with poll.lock:
+            if force or time.monotonic() - poll.polled_at >= self.poll_interval:
+                self._poll(repo, workflow, poll)
+            runs = poll.runs
+        self._match(repo, workflow, runs)
+        return runs
+
+    def _poll(self, repo: str, workflow: str, poll: _RepoPoll) -> None:
+        if not self._headers:
+            return
+        url = f"{self.api_url}/repos/{repo}/actions/workflows/{workflow}/runs"
+        headers = dict(self._headers)
+        if poll.etag:
+            headers['If-None-Match'] = poll.etag
+        poll.polled_at = time.monotonic()
+        self.stats['polls'] += 1
+        try:
+            response = http_client.get(url, params={'event': 'workflow_dispatch', 'per_page': self.page_size},
+                                       headers=headers)
+        except Exception as e:
+            self.stats['poll_errors'] += 1
+            logger.warning(f"Workflow runs poll for {repo} failed: {e}")
+            return
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            return
+        if response.status_code != 200:
+            self.stats['poll_errors'] += 1
+            logger.warning(f"Workflow runs poll for {repo} returned {response.status_code}")
+            return
+        poll.etag = response.headers.get('ETag')
+        poll.runs = response.json().get('workflow_runs', [])
+
+    def _match(self, repo: str, workflow: str, runs: List[Dict[str, Any]]) -> None:
+        """
+        Aplica os runs aos dispatches pendentes do repo/workflow
+        """
+        updates = []
+        now = time.monotonic()
+        with self._lock:
+            pending = [r for r in self._records.values()
+                       if r['repo'] == repo and r['workflow'] == workflow and r['status'] not in TERMINAL_STATUSES]
+            if not pending:
+                return
+            by_id = {r['dispatch_id']: r for r in pending}
+            claimed = {r['run_id'] for r in self._records.values() if r['run_id'] is not None}
+            unmatched = []
+
+            # Mais antigos primeiro: no fallback, cada dispatch fica com o primeiro run criado depois dele
+            for run in sorted(runs, key=lambda r: r.get('created_at') or ''):
+                dispatch_id = self._dispatch_id(run)
+                record = by_id.get(dispatch_id) if dispatch_id else None
+                if record is None:
+                    if not dispatch_id and run.get('id') not in claimed:
+                        unmatched.append(run)
+                    continue
+                if self._update(record, run):
+                    updates.append((record, run))
+                claimed.add(run.get('id'))
+
+            for record in pending:
+                if record['run_id'] is None and record['dispatched_at']:
+                    run = self._fallback(record, unmatched, claimed)
+                    if run is not None:
+                        claimed.add(run.get('id'))
+                        if self._update(record, run):
+                            updates.append((record, run))
+                if record['run_id'] is None and now - record['tracked_at'] > self.match_timeout:
+                    record['status'] = 'not_found'
+                    self.stats['not_found'] += 1
+                    logger.warning(f"No workflow run found for dispatch {record['dispatch_id']} "
+                                   f"({repo} {record['stage']})")
+            updates = [(dict(record), run) for record, run in updates]
+
+        for record, run in updates:
+            if self.on_update is not None:
+                try:
+                    self.on_update(record, run)
+                except Exception as e:
+                    logger.error(f"Run status callback failed for {record['dispatch_id']}: {e}")
+
+    @staticmethod
+    def _dispatch_id(run: Dict[str, Any]) -> Optional[str]:
+        match = DISPATCH_ID_PATTERN.search(run.get('display_title') or run.get('name') or '')
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _fallback(record: Dict[str, Any], runs: List[Dict[str, Any]], claimed: set) -> Optional[Dict[str, Any]]:
+        dispatched_at = _parse_time(record['dispatched_at'])
+        if dispatched_at is None:
+            return None
+        for run in runs:
+            if run.get('id') in claimed:
+                continue
+            created_at = _parse_time(run.get('created_at'))
+            if created_at is None or created_at < dispatched_at - CLOCK_SKEW:
+                continue
+            title = run.get('display_title') or run.get('name') or ''
+            match = RUN_STAGE_PATTERN.search(title)
+            if record['stage'] and (not match or match.group(1) != record['stage']):
+                continue
+            if record['project'] and record['project'] not in title:
+                continue
+            return run
+        return None
+
+    def _update(self, record: Dict[str, Any], run: Dict[str, Any]) -> bool:
+        """
+        Copia o estado do run para o registro (chamado com o lock); True se mudou
+        """
+        fields = self._run_fields(run)
+        if record['run_id'] is None:
+            self.stats['matched'] += 1
+            if record['stage'] is None:
+                match = RUN_STAGE_PATTERN.search(run.get('display_title') or '')
+                record['stage'] = match.group(1) if match else None
+        if all(record.get(key) == value for key, value in fields.items()):
+            return False
+        record.update(fields)
+        if record['status'] == 'completed':
+            self.stats['completed'] += 1
+        return True
+
+    @staticmethod
+    def _run_fields(run: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'run_id': run.get('id'),
+            'status': run.get('status') or 'queued',
+            'conclusion': run.get('conclusion'),
+            'html_url': run.get('html_url'),
+            'updated_at': run.get('updated_at'),
+        }
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for r in self._records.values() if r['status'] not in TERMINAL_STATUSES)
+
+    def _poll_loop(self) -> None:
+        """
+        Enquanto houver dispatches pendentes, um refresh por repo/workflow a cada intervalo
+        """
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                targets = {(r['repo'], r['workflow']) for r in self._records.values()
+                           if r['status'] not in TERMINAL_STATUSES}
+                if not targets:
+                    self._poller = None
+                    return
+            for repo, workflow in targets:
+                try:
+                    self.refresh(repo, workflow)
+                except Exception as e:
+                    logger.error(f"Run tracker refresh for {repo} failed: {e}")
@@ -0,0 +1,389 @@
+"""
+ADC-Agents-Team - Status Sync
+Sincronização incremental de status entre Linear e GitHub
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared import http_client
+from shared.linear import LinearClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.path.join('/tmp', 'adc-sync-state.sqlite3')
+
+LINEAR_STAGE_PATTERN = re.compile(r'(L\d+):')
+RUN_STAGE_PATTERN = re.compile(r'\b(L\d+)\b')
+
+DONE_STATES = {'Done', 'Completed', 'Approved'}
+
+# Páginas de workflow runs lidas por sync (100 runs cada) antes de parar
+SYNC_RUN_MAX_PAGES = int(os.environ.get('SYNC_RUN_MAX_PAGES', '10'))
+
+# Uma ETag por fonte (a da primeira página): chaves com `since`/`page`
+# cresceriam a cada avanço do watermark
+ETAG_SOURCES = ('github_issues', 'workflow_runs')
+
+LINEAR_ISSUES_QUERY = """
+query SyncIssues($filter: IssueFilter, $after: String) {
+  issues(first: 100, after: $after, orderBy: updatedAt, filter: $filter) {
+    nodes { id identifier title updatedAt state { name type } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+
+class SyncError(Exception):
+    """Falha ao consultar uma das fontes da sincronização"""
+
+
+class SyncStateStore:
+    """
+    Armazena watermarks, ETags e snapshot por projeto (SQLite)
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)',
+                (key, json.dumps(value, separators=(',', ':')))
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM sync_state WHERE key = ?', (key,))
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {
+        'linear': {'cursor': None, 'ids': []},
+        'github_issues': {'cursor': None, 'ids': []},
+        'workflow_runs': {'cursor': None},
+        'etags': {},
+        'snapshot': {}
+    }
+
+
+def _advance_cursor(watermark: Dict[str, Any], records: List[Tuple[str, str]]) -> None:
+    """
+    Avança o watermark (updatedAt) guardando os ids no timestamp limite,
+    já que as consultas usam comparação inclusiva (>=)
+    """
+    for record_id, updated_at in records:
+        if not updated_at:
+            continue
+        if watermark['cursor'] is None or updated_at > watermark['cursor']:
+            watermark['cursor'] = updated_at
+            watermark['ids'] = [record_id]
+        elif updated_at == watermark['cursor'] and record_id not in watermark['ids']:
+            watermark['ids'].append(record_id)
+
+
+class StatusSyncEngine:
+    """
+    Busca apenas registros alterados desde o último watermark e
+    aplica o diff sobre o snapshot de estágios do projeto
+    """
+
+    def __init__(
+        self,
+        store: SyncStateStore,
+        linear: Optional[LinearClient] = None,
+        github_token: Optional[str] = None,
+        github_api_url: str = 'https://api.github.com',
+        workflow: str = 'llm-pipeline-auto.yml'
+    ):
+        self.store = store
+        self.linear = linear
+        self.github_api_url = github_api_url.rstrip('/')
+        self.workflow = workflow
+        self._github_headers = {
+            'Authorization': f"Bearer {github_token}",
+            'Accept': 'application/vnd.github.v3+json'
+        } if github_token else None
+        # sync e record_run (thread do run tracker) fazem read-modify-write do
+        # mesmo `sync:{projeto}`: um lock por chave evita perder atualizações
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._key_locks_lock = threading.Lock()
+
+    def _key_lock(self, state_key: str) -> threading.Lock:
+        with self._key_locks_lock:
+            lock = self._key_locks.get(state_key)
+            if lock is None:
+                lock = self._key_locks[state_key] = threading.Lock()
+            return lock
+
+    def sync(
+        self,
+        project_key: str,
+        repo: Optional[str] = None,
+        linear_filter: Optional[Dict[str, Any]] = None,
+        full: bool = False
+    ) -> Dict[str, Any]:
+        with self._key_lock(f"sync:{project_key}"):
+            return self._sync(project_key, repo, linear_filter, full)
+
+    def _sync(self, project_key: str, repo: Optional[str], linear_filter: Optional[Dict[str, Any]],
+              full: bool) -> Dict[str, Any]:
+        started = time.monotonic()
+        state_key = f"sync:{project_key}"
+        state = None if full else self.store.get(state_key)
+        state = state or _empty_state()
+        # Estados gravados antes da ETag por fonte guardavam uma por URL+params
+        state['etags'] = {source: etag for source, etag in state['etags'].items() if source in ETAG_SOURCES}
+
+        changes: List[Dict[str, Any]] = []
+        counts = {'linear': 0, 'github_issues': 0, 'workflow_runs': 0}
+        not_modified: List[str] = []
+        skipped: List[str] = []
+
+        if self.linear is not None and self.linear.api_key:
+            issues = self._fetch_linear(state['linear'], linear_filter or {})
+            counts['linear'] = len(issues)
+            for issue in issues:
+                stage = self._stage(LINEAR_STAGE_PATTERN, issue.get('title', ''))
+                record = {
+                    'id': issue['id'],
+                    'identifier': issue.get('identifier'),
+                    'state': (issue.get('state') or {}).get('name'),
+                    'updated_at': issue.get('updatedAt')
+                }
+                self._apply(state['snapshot'], changes, stage, 'linear', record)
+        else:
+            skipped.append('linear')
+
+        if self._github_headers and repo:
+            issues = self._fetch_github_issues(state, repo)
+            if issues is None:
+                not_modified.append('github_issues')
+            else:
+                counts['github_issues'] = len(issues)
+                for issue in issues:
+                    stage = self._stage(LINEAR_STAGE_PATTERN, issue.get('title', ''))
+                    record = {
+                        'number': issue.get('number'),
+                        'state': issue.get('state'),
+                        'updated_at': issue.get('updated_at')
+                    }
+                    self._apply(state['snapshot'], changes, stage, 'github_issue', record)
+
+            runs = self._fetch_workflow_runs(state, repo)
+            if runs is None:
+                not_modified.append('workflow_runs')
+            else:
+                counts['workflow_runs'] = len(runs)
+                for run in runs:
+                    stage = self._stage(RUN_STAGE_PATTERN, run.get('display_title') or run.get('name', ''))
+                    record = {
+                        'id': run.get('id'),
+                        'status': run.get('status'),
+                        'conclusion': run.get('conclusion'),
+                        'updated_at': run.get('updated_at')
+                    }
+                    self._apply(state['snapshot'], changes, stage, 'workflow_run', record)
+        else:
+            skipped.extend(['github_issues', 'workflow_runs'])
+
+        self.store.set(state_key, state)
+
+        changed_stages = sorted({c['stage'] for c in changes})
+        return {
+            'status': 'sync_complete',
+            'project': project_key,
+            'full': full,
+            'counts': counts,
+            'changes': changes,
+            'inconsistencies': self._inconsistencies(state['snapshot'], changed_stages),
+            'not_modified': not_modified,
+            'skipped': skipped,
+            'watermarks': {
+                'linear': state['linear']['cursor'],
+                'github_issues': state['github_issues']['cursor'],
+                'workflow_runs': state['workflow_runs']['cursor']
+            },
+            'duration_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+
+    def record_run(self, project_key: str, stage: str, run: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Aplica ao snapshot um run vindo do run tracker (sem esperar o próximo sync)
+        """
+        state_key = f"sync:{project_key}"
+        changes: List[Dict[str, Any]] = []
+        record = {
+            'id': run.get('id'),
+            'status': run.get('status'),
+            'conclusion': run.get('conclusion'),
+            'updated_at': run.get('updated_at')
+        }
+        with self._key_lock(state_key):
+            state = self.store.get(state_key) or _empty_state()
+            self._apply(state['snapshot'], changes, stage, 'workflow_run', record)
+            if changes:
+                self.store.set(state_key, state)
+        return changes
+
+    def _fetch_linear(self, watermark: Dict[str, Any], base_filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        query_filter = dict(base_filter)
+        if watermark['cursor']:
+            query_filter['updatedAt'] = {'gte': watermark['cursor']}
+
+        seen_at_cursor = set(watermark['ids'])
+        cursor_at_start = watermark['cursor']
+        changed = []
+        after = None
+
+        while True:
+            data = self.linear.query(LINEAR_ISSUES_QUERY, {'filter': query_filter, 'after': after})
+            connection = data.get('issues') or {}
+            for node in connection.get('nodes', []):
+                if node.get('updatedAt') == cursor_at_start and node['id'] in seen_at_cursor:
+                    continue
+                changed.append(node)
+            page_info = connection.get('pageInfo') or {}
+            if not page_info.get('hasNextPage'):
+                break
+            after = page_info.get('endCursor')
+
+        _advance_cursor(watermark, [(n['id'], n.get('updatedAt')) for n in changed])
+        return changed
+
+    def _fetch_github_issues(self, state: Dict[str, Any], repo: str) -> Optional[List[Dict[str, Any]]]:
+        watermark = state['github_issues']
+        url = f"{self.github_api_url}/repos/{repo}/issues"
+        params = {'state': 'all', 'sort': 'updated', 'direction': 'asc', 'per_page': 100}
+        if watermark['cursor']:
+            params['since'] = watermark['cursor']
+
+        seen_at_cursor = set(str(i) for i in watermark['ids'])
+        cursor_at_start = watermark['cursor']
+        changed = []
+        page = 1
+
+        while True:
+            params['page'] = page
+            # Só a primeira página é condicional: 304 significa "nada mudou"
+            items = self._github_get(state, url, params, etag_source='github_issues' if page == 1 else None)
+            if items is None:
+                return None
+            for item in items:
+                if 'pull_request' in item:
+                    continue
+                if item.get('updated_at') == cursor_at_start and str(item['id']) in seen_at_cursor:
+                    continue
+                changed.append(item)
+            if len(items) < params['per_page']:
+                break
+            page += 1
+
+        _advance_cursor(watermark, [(str(i['id']), i.get('updated_at')) for i in changed])
+        return changed
+
+    def _fetch_workflow_runs(self, state: Dict[str, Any], repo: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Runs atualizados desde o watermark; a API lista do mais novo para o
+        mais antigo, então as páginas seguem até uma sem nenhum run acima do
+        cursor (ou até SYNC_RUN_MAX_PAGES)
+        """
+        watermark = state['workflow_runs']
+        url = f"{self.github_api_url}/repos/{repo}/actions/workflows/{self.workflow}/runs"
+        params = {'per_page': 100}
+        cursor = watermark['cursor']
+        runs = []
+        page = 1
+
+        while True:
+            params['page'] = page
+            # Só a primeira página é condicional: 304 significa "nada mudou"
+            body = self._github_get(state, url, params, etag_source='workflow_runs' if page == 1 else None)
+            if body is None:
+                return None
+            items = body.get('workflow_runs', [])
+            changed = [run for run in items if not cursor or (run.get('updated_at') or '') >= cursor]
+            runs.extend(changed)
+            if len(items) < params['per_page'] or (cursor and not changed):
+                break
+            if page >= SYNC_RUN_MAX_PAGES:
+                logger.warning(f"⚠️ Workflow runs of {repo} changed beyond {SYNC_RUN_MAX_PAGES} pages; "
+                               f"older runs were not read")
+                break
+            page += 1
+
+        for run in runs:
+            if run.get('updated_at') and (not watermark['cursor'] or run['updated_at'] > watermark['cursor']):
+                watermark['cursor'] = run['updated_at']
+        return runs
+
+    def _github_get(self, state: Dict[str, Any], url: str, params: Dict[str, Any],
+                    etag_source: Optional[str] = None):
+        """
+        GET na API do GitHub; com `etag_source` o request é condicional e
+        None indica 304 (nada mudou desde a última resposta da fonte)
+        """
+        headers = dict(self._github_headers)
+        etag = state['etags'].get(etag_source) if etag_source else None
+        if etag:
+            headers['If-None-Match'] = etag
+
+        response = http_client.get(url, params=params, headers=headers)
+        if response.status_code == 304:
+            return None
+        if response.status_code != 200:
+            raise SyncError(f"GitHub API returned {response.status_code} for {url}")
+
+        if etag_source and response.headers.get('ETag'):
+            state['etags'][etag_source] = response.headers['ETag']
+        return response.json()
+
+    @staticmethod
+    def _stage(pattern, title: str) -> Optional[str]:
+        match = pattern.search(title or '')
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _apply(snapshot, changes, stage, source, record) -> None:
+        if not stage:
+            return
+        entry = snapshot.setdefault(stage, {})
+        previous = entry.get(source)
+        if previous == record:
+            return
+        # Runs antigos não sobrescrevem o run mais recente do estágio
+        if source == 'workflow_run' and previous and previous.get('id') != record.get('id'):
+            if (record.get('updated_at') or '') < (previous.get('updated_at') or ''):
+                return
+        entry[source] = record
+        changes.append({'stage': stage, 'source': source, 'record': record, 'previous': previous})
+
+    @staticmethod
+    def _inconsistencies(snapshot, stages: List[str]) -> List[Dict[str, Any]]:
+        found = []
+        for stage in stages:
+            entry = snapshot.get(stage, {})
+            linear_state = (entry.get('linear') or {}).get('state')
+            run = entry.get('workflow_run') or {}
+            if linear_state in DONE_STATES and run.get('conclusion') == 'failure':
+                found.append({'stage': stage, 'issue': 'approved_but_run_failed', 'run_id': run.get('id')})
+            elif run.get('conclusion') == 'success' and linear_state and linear_state not in DONE_STATES:
+                found.append({'stage': stage, 'issue': 'run_succeeded_linear_pending', 'run_id': run.get('id')})
+        return found
@@ -0,0 +1,341 @@
+"""
+ADC-Agents-Team - Templates
+Renderização dos templates do repositório (sintaxe templatefile do Terraform)
+com cache de templates compilados por instância
+"""
+
+import os
+import re
+import ast
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def default_templates_dir() -> str:
+    """
+    `templates/` ao lado do pacote `shared` (diretório da função, onde o deploy
+    e o symlink o colocam) ou, com `shared` importado direto de functions/
+    (ferramentas, bench, serviço único), o `templates/` da raiz do repositório
+    """
+    shared_dir = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.path.join(os.path.dirname(shared_dir), 'templates'),
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), 'templates'),
+    ]
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            return candidate
+    return candidates[0]
+
+
+TEMPLATES_DIR = os.environ.get('TEMPLATES_DIR') or default_templates_dir()
+TEMPLATE_CACHE_SIZE = int(os.environ.get('TEMPLATE_CACHE_SIZE', '32'))
+# Intervalo mínimo entre os stat() que detectam alteração no arquivo
+TEMPLATE_CHECK_INTERVAL = float(os.environ.get('TEMPLATE_CHECK_INTERVAL', '2'))
+
+# ${expr}, %{ diretiva } (com ~ opcional) e o escape $${
+_TOKEN = re.compile(r'\$\$\{|%%\{|\$\{(.*?)\}|%\{~?\s*(.*?)\s*~?\}')
+_FOR = re.compile(r'^for\s+(\w+)(?:\s*,\s*(\w+))?\s+in\s+(.+?)(?:\s+if\s+(.+))?$')
+
+
+class TemplateError(Exception):
+    """Template com sintaxe não suportada"""
+
+
+class Undefined:
+    """
+    Valor de variável ausente: renderiza vazio e é falso
+    """
+
+    def __getattr__(self, name):
+        return self
+
+    def __getitem__(self, key):
+        return self
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __str__(self):
+        return ''
+
+    def __eq__(self, other):
+        return isinstance(other, Undefined)
+
+    __hash__ = object.__hash__
+
+
+UNDEFINED = Undefined()
+
+
+class Node(dict):
+    """
+    Dict com acesso por atributo (`stage.id`), como objetos do Terraform
+    """
+
+    def __getattr__(self, name):
+        return wrap(self.get(name, UNDEFINED))
+
+
+def wrap(value: Any) -> Any:
+    if isinstance(value, dict) and not isinstance(value, Node):
+        return Node(value)
+    if isinstance(value, list):
+        return [wrap(v) for v in value]
+    return value
+
+
+def _length(value) -> int:
+    return len(value)
+
+
+def _join(first, second) -> str:
+    # Aceita join(separador, lista) do Terraform e join(lista, separador)
+    separator, items = (first, second) if isinstance(first, str) else (second, first)
+    return separator.join(str(i) for i in items)
+
+
+def _contains(collection, value) -> bool:
+    return value in collection
+
+
+FUNCTIONS = {
+    'length': _length,
+    'join': _join,
+    'contains': _contains,
+    'upper': lambda s: str(s).upper(),
+    'lower': lambda s: str(s).lower(),
+    'format': lambda fmt, *args: fmt % args,
+    'true': True,
+    'false': False,
+    'null': None,
+}
+
+
+class _Scope(dict):
+    """
+    Namespace de avaliação: nomes ausentes viram Undefined
+    """
+
+    def __missing__(self, key):
+        return UNDEFINED
+
+
+def _compile_expression(expression: str):
+    source = expression.strip()
+    source = re.sub(r'!(?!=)', ' not ', source)
+    source = source.replace('&&', ' and ').replace('||', ' or ').strip()
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise TemplateError(f"Unsupported expression: {expression}") from e
+    _check_expression(tree, expression)
+    return compile(tree, f"<template expr {expression!r}>", 'eval')
+
+
+def _check_expression(tree: ast.AST, expression: str) -> None:
+    """
+    Sem __builtins__ o eval ainda alcança objetos internos por atributos
+    (`().__class__...`) e métodos (`'{0.__globals__}'.format(f)`): nomes e
+    atributos com `_` são recusados e só as FUNCTIONS podem ser chamadas
+    """
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            raise TemplateError(f"Private attribute in expression: {expression}")
+        if isinstance(node, ast.Name) and node.id.startswith('_'):
+            raise TemplateError(f"Private name in expression: {expression}")
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+            raise TemplateError(f"Only template functions can be called: {expression}")
+        if isinstance(node, ast.Lambda):
+            raise TemplateError(f"Unsupported expression: {expression}")
+
+
+def _to_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class Template:
+    """
+    Template pré-compilado: o texto é parseado uma vez em nós e as
+    expressões viram code objects
+    """
+
+    def __init__(self, source: str, name: str = '<string>'):
+        self.name = name
+        self.nodes = self._parse(source)
+
+    def _parse(self, source: str) -> List[Tuple]:
+        root: List[Tuple] = []
+        # Pilha de (tipo, nós do bloco atual, dados da diretiva)
+        stack: List[Tuple[str, List[Tuple], Dict[str, Any]]] = [('root', root, {})]
+        position = 0
+
+        for match in _TOKEN.finditer(source):
+            text = source[position:match.start()]
+            position = match.end()
+            token = match.group(0)
+            body = stack[-1][1]
+
+            if token in ('$${', '%%{'):
+                body.append(('text', text + token[1:]))
+                continue
+            if text:
+                body.append(('text', text))
+
+            if match.group(1) is not None:
+                body.append(('expr', _compile_expression(match.group(1))))
+                continue
+
+            directive = match.group(2)
+            # Diretiva sozinha na linha: consome a quebra de linha (trim_blocks)
+            if source.startswith('\n', position):
+                position += 1
+
+            if directive.startswith('for '):
+                parsed = _FOR.match(directive)
+                if not parsed:
+                    raise TemplateError(f"{self.name}: invalid directive %{{ {directive} }}")
+                key, value, iterable, condition = parsed.groups()
+                block: List[Tuple] = []
+                body.append(('for', key, value, _compile_expression(iterable),
+                             _compile_expression(condition) if condition else None, block))
+                stack.append(('for', block, {}))
+            elif directive.startswith('if '):
+                then_block: List[Tuple] = []
+                node = ['if', _compile_expression(directive[3:]), then_block, []]
+                body.append(node)
+                stack.append(('if', then_block, {'node': node}))
+            elif directive == 'else':
+                kind, _, data = stack.pop() if stack[-1][0] == 'if' else (None, None, None)
+                if kind != 'if':
+                    raise TemplateError(f"{self.name}: else without if")
+                stack.append(('else', data['node'][3], data))
+            elif directive in ('endif', 'endfor'):
+                expected = ('if', 'else') if directive == 'endif' else ('for',)
+                if stack[-1][0] not in expected:
+                    raise TemplateError(f"{self.name}: unexpected {directive}")
+                stack.pop()
+            else:
+                raise TemplateError(f"{self.name}: unsupported directive %{{ {directive} }}")
+
+        if len(stack) != 1:
+            raise TemplateError(f"{self.name}: unclosed {stack[-1][0]} block")
+        if source[position:]:
+            root.append(('text', source[position:]))
+        return root
+
+    def render(self, context: Optional[Dict[str, Any]] = None, **variables) -> str:
+        scope = _Scope(FUNCTIONS)
+        scope.update({k: wrap(v) for k, v in {**(context or {}), **variables}.items()})
+        output: List[str] = []
+        self._render(self.nodes, scope, output)
+        return ''.join(output)
+
+    def _render(self, nodes: List, scope: _Scope, output: List[str]) -> None:
+        for node in nodes:
+            kind = node[0]
+            if kind == 'text':
+                output.append(node[1])
+            elif kind == 'expr':
+                output.append(_to_text(eval(node[1], {'__builtins__': {}}, scope)))
+            elif kind == 'if':
+                branch = node[2] if eval(node[1], {'__builtins__': {}}, scope) else node[3]
+                self._render(branch, scope, output)
+            elif kind == 'for':
+                _, key, value, iterable, condition, block = node
+                collection = eval(iterable, {'__builtins__': {}}, scope)
+                pairs = collection.items() if isinstance(collection, dict) else enumerate(collection)
+                for index, item in pairs:
+                    inner = _Scope(scope)
+                    if value is None:
+                        inner[key] = wrap(item)
+                    else:
+                        inner[key], inner[value] = index, wrap(item)
+                    if condition is not None and not eval(condition, {'__builtins__': {}}, inner):
+                        continue
+                    self._render(block, inner, output)
+
+
+class TemplateCache:
+    """
+    LRU de templates compilados, invalidado por mtime/tamanho do arquivo
+    """
+
+    def __init__(self, base_dir: str = TEMPLATES_DIR, max_entries: int = TEMPLATE_CACHE_SIZE,
+                 check_interval: float = TEMPLATE_CHECK_INTERVAL):
+        self.base_dir = base_dir
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _resolve(self, name: str) -> str:
+        path = os.path.realpath(os.path.join(self.base_dir, name))
+        if not path.startswith(os.path.realpath(self.base_dir) + os.sep):
+            raise TemplateError(f"Template outside templates dir: {name}")
+        return path
+
+    def _load(self, name: str, parser) -> Any:
+        path = self._resolve(name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry['checked'] < self.check_interval:
+                self._entries.move_to_end(path)
+                self.stats['hits'] += 1
+                return entry['value']
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise TemplateError(f"Template not found: {name}") from None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['signature'] == signature:
+                entry['checked'] = now
+                self._entries.move_to_end(path)
+                self.stats['hits'] += 1
+                return entry['value']
+
+        with open(path, encoding='utf-8') as f:
+            value = parser(f.read(), name)
+
+        with self._lock:
+            self.stats['misses'] += 1
+            self._entries[path] = {'signature': signature, 'checked': now, 'value': value}
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return value
+
+    def get(self, name: str) -> Template:
+        return self._load(name, lambda source, label: Template(source, label))
+
+    def load_json(self, name: str) -> Any:
+        return self._load(name, lambda source, label: json.loads(source))
+
+    def render(self, name: str, context: Optional[Dict[str, Any]] = None, **variables) -> str:
+        return self.get(name).render(context, **variables)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
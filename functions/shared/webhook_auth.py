@@ -0,0 +1,83 @@
+"""
+ADC-Agents-Team - Webhook Auth
+Verificação da assinatura HMAC-SHA256 dos webhooks do Linear
+"""
+
+import hmac
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'Linear-Signature'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+# Resposta pronta para rotas operacionais sem token (sem jsonify nem log por request)
+ADMIN_UNAUTHORIZED_RESPONSE = ('{"error": "Unauthorized"}', 401, {'Content-Type': 'application/json'})
+
+
+class SignatureVerifier:
+    """
+    HMAC com a chave pré-processada no warm start: cada request só copia
+    o estado interno (`.copy()`) e alimenta o corpo bruto
+    """
+
+    def __init__(self, secret: str, max_age_seconds: float = 60.0):
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        self.max_age_seconds = max_age_seconds
+        self.stats = {'verified': 0, 'rejected': 0, 'stale': 0}
+
+    def verify(self, body: bytes, signature: Optional[str]) -> bool:
+        """
+        Compara em tempo constante a assinatura (hex) com o HMAC do corpo
+        """
+        if not signature:
+            self.stats['rejected'] += 1
+            return False
+        try:
+            expected = bytes.fromhex(signature.strip())
+        except ValueError:
+            self.stats['rejected'] += 1
+            return False
+
+        mac = self._mac.copy()
+        mac.update(body)
+        if not hmac.compare_digest(mac.digest(), expected):
+            self.stats['rejected'] += 1
+            return False
+        self.stats['verified'] += 1
+        return True
+
+    def is_fresh(self, data: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """
+        Proteção contra replay: `webhookTimestamp` (ms) dentro da janela
+        """
+        timestamp = data.get('webhookTimestamp')
+        if timestamp is None or not self.max_age_seconds:
+            return True
+        try:
+            age = (now if now is not None else time.time()) - float(timestamp) / 1000.0
+        except (TypeError, ValueError):
+            age = float('inf')
+        if abs(age) > self.max_age_seconds:
+            self.stats['stale'] += 1
+            return False
+        return True
+
+
+def sign(secret: str, body: bytes) -> str:
+    """
+    Assinatura no formato do Linear (ferramentas locais e replay)
+    """
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def admin_token_matches(secret: str, token: Optional[str]) -> bool:
+    """
+    Token das rotas operacionais (/drain, /status, /metrics, detalhes do
+    /health) em tempo constante; sem secret configurado o acesso é negado
+    """
+    if not secret or not token:
+        return False
+    return hmac.compare_digest(secret.encode(), token.strip().encode())
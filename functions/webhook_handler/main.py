@@ -5,54 +5,92 @@ Versão Final - Outubro 2025
 """
 
 import os
+import re
 import json
+import time
 import logging
 import traceback
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-import requests
+from typing import Dict, Any, Optional, List, Tuple
 from flask import Request, jsonify
 import functions_framework
 
-# Configuração de logging
-logging.basicConfig(
-    level=os.environ.get('LOG_LEVEL', 'INFO'),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from shared.config import configure_logging, lazy, settings
+from shared import request_log
+from shared.request_log import bind, log_request
+from shared.metrics import REGISTRY, prometheus_response, span
+from shared.agents import AGENT_INFO
+from shared.dedup import DedupCache, create_dedup_cache
+from shared.notifications import NotificationDispatcher, create_notification_dispatcher, flush_after
+from shared.pipeline_state import NEXT_STAGE, STAGE_SEQUENCE, PipelineStateStore, create_pipeline_state_store
+from shared.github_dispatch import DispatchDeferred, get_scheduler as get_dispatch_scheduler
+from shared.event_queue import EventQueueBackend, EventQueueWorker, create_event_queue
+from shared.webhook_auth import (ADMIN_TOKEN_HEADER, ADMIN_UNAUTHORIZED_RESPONSE, SIGNATURE_HEADER, SignatureVerifier,
+                                 admin_token_matches)
+from shared.circuit_breaker import on_any_recover, snapshot_all as circuit_snapshot
+from shared.event_router import EventRouter, loads as json_loads
+from shared.linear import LinearClient, stats as linear_stats
+from shared.projects import Project, ProjectRegistry, create_project_registry
+from shared.fanout import FANOUT_DEADLINE, fan_out
+from shared.coalescer import (
+    COALESCED_DISPATCH_EVENT, DISPATCH_COALESCE_SECONDS, DispatchCoalescer, create_dispatch_coalescer
 )
+from shared.run_tracker import new_dispatch_id
+
+# Configuração de logging
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Variáveis de ambiente
-PROJECT_NAME = os.environ.get('PROJECT_NAME', 'unknown')
-ENVIRONMENT = os.environ.get('ENVIRONMENT', 'production')
-LINEAR_API_KEY = os.environ.get('LINEAR_API_KEY')
-GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
-GITHUB_OWNER = os.environ.get('GITHUB_OWNER')
-DRIVE_FOLDER_ID = os.environ.get('DRIVE_FOLDER_ID')
-AUTO_APPROVE_STAGES = os.environ.get('AUTO_APPROVE_STAGES', 'L3,L5,L7,L8').split(',')
+PROJECT_NAME = settings.project_name
+ENVIRONMENT = settings.environment
+LINEAR_API_KEY = settings.linear_api_key
+GITHUB_TOKEN = settings.github_token
+GITHUB_OWNER = settings.github_owner
+DRIVE_FOLDER_ID = settings.drive_folder_id
 NOTIFICATION_EMAIL = os.environ.get('NOTIFICATION_EMAIL', '')
 SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL', '')
+WEBHOOK_MODE = os.environ.get('WEBHOOK_MODE', 'sync')  # sync | async
+EVENT_QUEUE_URL = os.environ.get('EVENT_QUEUE_URL', '')
+EVENT_QUEUE_BATCH_SIZE = int(os.environ.get('EVENT_QUEUE_BATCH_SIZE', '25'))
+LINEAR_WEBHOOK_SECRET = settings.linear_webhook_secret
+# Rotas operacionais exigem X-Admin-Token: ADMIN_TOKEN ou, na falta dele, o secret do webhook
+ADMIN_SECRET = settings.admin_secret
+LINEAR_WEBHOOK_MAX_AGE = float(os.environ.get('LINEAR_WEBHOOK_MAX_AGE', '60'))  # s; 0 desativa
+WEBHOOK_MAX_BODY_BYTES = int(os.environ.get('WEBHOOK_MAX_BODY_BYTES', str(1024 * 1024)))
+# Efeitos da aprovação além do dispatch/notificação (Drive só com credenciais Google)
+APPROVAL_DRIVE_SETUP = (os.environ.get('APPROVAL_DRIVE_SETUP', 'true').lower() in ('1', 'true', 'yes')
+                        and bool(os.environ.get('GOOGLE_CREDENTIALS') or settings.google_access_token))
+APPROVAL_LINEAR_COMMENT = os.environ.get('APPROVAL_LINEAR_COMMENT', 'true').lower() in ('1', 'true', 'yes')
 
 # Constantes
-LINEAR_API_URL = "https://api.linear.app/graphql"
-GITHUB_API_URL = "https://api.github.com"
+LINEAR_API_URL = os.environ.get('LINEAR_API_URL', "https://api.linear.app/graphql")
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', "https://api.github.com")
+WORKFLOW_FILE = "llm-pipeline-auto.yml"
 
 # Mapeamento de estágios
-STAGE_SEQUENCE = ['L1', 'L2', 'L3', 'L4', 'L5', 'L6', 'L7', 'L8', 'L9']
+STAGE_PATTERN = re.compile(r'(L\d+):')
 
-AGENT_INFO = {
-    'L1': {'name': 'Alex Requirements', 'emoji': '🎯'},
-    'L2': {'name': 'Sam Architecture', 'emoji': '🏢️'},
-    'L3': {'name': 'Luna Design', 'emoji': '🎨'},
-    'L4': {'name': 'Morgan Backend', 'emoji': '⚙️'},
-    'L5': {'name': 'River Frontend', 'emoji': '💻'},
-    'L6': {'name': 'Quinn Testing', 'emoji': '🔍'},
-    'L7': {'name': 'Phoenix Deploy', 'emoji': '🚀'},
-    'L8': {'name': 'Sage Monitor', 'emoji': '📊'},
-    'L9': {'name': 'Echo Documentation', 'emoji': '📚'}
-}
+# Chave HMAC preparada uma vez por instância; sem secret a verificação fica desativada
+SIGNATURE_VERIFIER = SignatureVerifier(LINEAR_WEBHOOK_SECRET, LINEAR_WEBHOOK_MAX_AGE) if LINEAR_WEBHOOK_SECRET else None
+if SIGNATURE_VERIFIER is None:
+    logger.warning("⚠️ LINEAR_WEBHOOK_SECRET not set: webhook signatures are not verified")
+if not ADMIN_SECRET:
+    logger.warning("⚠️ ADMIN_TOKEN not set: /drain, /status and /metrics are disabled")
+
+# Resposta pronta para o caminho de rejeição (sem jsonify nem log por request)
+UNAUTHORIZED_RESPONSE = ('{"error": "Invalid signature"}', 401, {'Content-Type': 'application/json'})
+ADMIN_PATHS = frozenset({'/metrics', '/status', '/drain'})
+IGNORED_RESPONSE = ('{"status": "ignored", "reason": "event_type_not_handled"}', 200,
+                    {'Content-Type': 'application/json'})
+
+# Tabela de roteamento (type, action) → handler, preenchida pelos decorators abaixo
+EVENTS = EventRouter()
 
 
 @functions_framework.http
+@log_request('webhook_handler')
+@flush_after(lambda: get_notifier())
 def linear_webhook_handler(request: Request):
     """
     Handler principal para webhooks Linear
@@ -67,52 +105,110 @@ def linear_webhook_handler(request: Request):
             'status': 'healthy',
             'project': PROJECT_NAME,
             'environment': ENVIRONMENT,
+            'projects': len(get_project_registry()),
+            'mode': WEBHOOK_MODE,
+            'dedup': get_dedup_cache().stats(),
+            'dispatch': get_dispatch_scheduler().snapshot(),
+            'notifications': get_notifier().stats,
+            'signatures': SIGNATURE_VERIFIER.stats if SIGNATURE_VERIFIER else 'disabled',
+            'events': EVENTS.stats,
+            'coalescer': get_dispatch_coalescer().stats if DISPATCH_COALESCE_SECONDS > 0 else 'disabled',
+            'linear': linear_stats(),
+            'logging': request_log.stats(),
+            'circuits': circuit_snapshot(),
+            'latency': REGISTRY.summary(),
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     
+    # /drain executa efeitos colaterais; /status e /metrics expõem estado interno
+    if request.path in ADMIN_PATHS and not admin_token_matches(ADMIN_SECRET, request.headers.get(ADMIN_TOKEN_HEADER)):
+        return ADMIN_UNAUTHORIZED_RESPONSE
+    
+    # Histogramas de latência por fase (Prometheus)
+    if request.path == '/metrics':
+        return prometheus_response()
+    
+    # Status do pipeline a partir do estado persistido (sem chamar o Linear)
+    if request.path == '/status':
+        project = request.args.get('project', PROJECT_NAME)
+        return jsonify(get_pipeline_state().status(project)), 200
+    
+    # Drenagem da fila (Cloud Scheduler ou chamada manual)
+    if request.path == '/drain':
+        if request.method != 'POST':
+            return jsonify({'error': 'Only POST requests allowed'}), 405
+        return jsonify(drain_event_queue()), 200
+    
     try:
         # Validar método
         if request.method != 'POST':
             return jsonify({'error': 'Only POST requests allowed'}), 405
         
+        if (request.content_length or 0) > WEBHOOK_MAX_BODY_BYTES:
+            return jsonify({'error': 'Payload too large'}), 413
+        
+        # Corpo lido uma única vez; a assinatura é conferida antes de qualquer parse ou log
+        raw_body = request.get_data()
+        if SIGNATURE_VERIFIER is not None and not SIGNATURE_VERIFIER.verify(
+                raw_body, request.headers.get(SIGNATURE_HEADER)):
+            return UNAUTHORIZED_RESPONSE
+        
+        # Eventos sem rota (a maior parte do volume) saem antes do parse completo
+        if raw_body and EVENTS.is_unhandled(raw_body):
+            bind(outcome='unrouted_early')
+            return IGNORED_RESPONSE
+        
         # Parse request data
         try:
-            data = request.get_json(force=True)
-        except Exception as e:
+            with span('parse'):
+                data = json_loads(raw_body) if raw_body else None
+        except ValueError as e:
             logger.error(f"Failed to parse JSON: {str(e)}")
             return jsonify({'error': 'Invalid JSON'}), 400
         
         if not data:
             return jsonify({'error': 'Empty request body'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Invalid JSON'}), 400
+        
+        if SIGNATURE_VERIFIER is not None and not SIGNATURE_VERIFIER.is_fresh(data):
+            return jsonify({'error': 'Stale webhook'}), 401
         
-        # Log incoming webhook
-        logger.info(f"📨 Webhook received for {PROJECT_NAME}")
-        logger.debug(f"Webhook data: {json.dumps(data, indent=2)}")
+        # Idempotência: entregas repetidas retornam sem tocar no GitHub
+        delivery_id = request.headers.get('Linear-Delivery')
+        bind(delivery=delivery_id, event_type=data.get('type'), event_action=data.get('action'))
+        dedup_keys = get_dedup_keys(data, delivery_id)
+        with span('dedup'):
+            duplicate = get_dedup_cache().check_and_mark(dedup_keys)
+        if duplicate:
+            bind(outcome='duplicate_delivery')
+            return jsonify({'status': 'ignored', 'reason': 'duplicate_delivery'}), 200
         
-        # Roteamento baseado no tipo de evento
-        event_type = data.get('type', 'unknown')
-        action = data.get('action', 'unknown')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Webhook data: {json.dumps(data)}")
         
-        logger.info(f"📋 Event: {event_type}, Action: {action}")
+        # Modo assíncrono: persiste o evento e responde antes de processar
+        if WEBHOOK_MODE == 'async':
+            return enqueue_event(data)
         
-        # Processar diferentes tipos de eventos
-        if event_type == 'InitializePipeline':
-            return handle_initialization(data)
-        elif event_type == 'Issue' and action == 'update':
-            return handle_issue_update(data)
-        elif event_type == 'Issue' and action == 'create':
-            return handle_issue_create(data)
-        elif event_type == 'Comment' and action == 'create':
-            return handle_comment_create(data)
-        elif event_type == 'IssueLabel':
-            return handle_issue_label(data)
-        else:
-            logger.info(f"ℹ️ Unhandled event type: {event_type}/{action}")
-            return jsonify({'status': 'ignored', 'reason': 'event_type_not_handled'}), 200
+        try:
+            with span('route'):
+                body, status = process_event(data)
+        except DispatchDeferred as e:
+            if e.requeue_after is None:
+                raise
+            # GitHub com circuito aberto: estaciona o evento em vez de devolver 500 ao Linear
+            return park_event(data, e)
+        if status >= 500:
+            get_dedup_cache().forget(dedup_keys)
+        return jsonify(body), status
         
     except Exception as e:
-        logger.error(f"❌ Error processing webhook: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception(f"❌ Error processing webhook: {str(e)}")
+        
+        # Permitir que o retry do Linear reprocesse o evento
+        if 'dedup_keys' in locals():
+            get_dedup_cache().forget(dedup_keys)
         
         # Notificar erro se configurado
         send_error_notification(e, data if 'data' in locals() else {})
@@ -123,6 +219,187 @@ def linear_webhook_handler(request: Request):
         }), 500
 
 
+def process_event(data: Dict[str, Any]):
+    """
+    Roteia o evento para o handler correspondente
+    Retorna (body, status_code)
+    """
+    return EVENTS.dispatch(data, handle_unrouted)
+
+
+def handle_unrouted(data: Dict[str, Any]):
+    """
+    Evento sem handler registrado
+    """
+    bind(outcome='event_type_not_handled')
+    return {'status': 'ignored', 'reason': 'event_type_not_handled'}, 200
+
+
+def get_dedup_keys(data: Dict[str, Any], delivery_id: Optional[str] = None) -> List[str]:
+    """
+    Chaves de idempotência: id da entrega e (issue, estado, updatedAt)
+    """
+    keys = []
+    if delivery_id:
+        keys.append(f"delivery:{delivery_id}")
+    
+    if data.get('type') == 'Issue' and data.get('action') == 'update':
+        issue_data = data.get('data') or {}
+        issue_id = issue_data.get('id')
+        updated_at = issue_data.get('updatedAt')
+        if issue_id and updated_at:
+            state = (issue_data.get('state') or {}).get('name', '')
+            keys.append(f"issue:{issue_id}:{state}:{updated_at}")
+    
+    return keys
+
+
+@lazy
+def get_dedup_cache() -> DedupCache:
+    """
+    Cache de idempotência das entregas do Linear
+    """
+    return create_dedup_cache()
+
+
+@lazy
+def get_notifier() -> NotificationDispatcher:
+    """
+    Notificações coalescidas e enviadas em background; o que estiver na fila
+    sai antes da resposta (flush_after)
+    """
+    return create_notification_dispatcher()
+
+
+@lazy
+def get_pipeline_state() -> PipelineStateStore:
+    """
+    Estado persistente do pipeline (cache em memória + backend)
+    """
+    return create_pipeline_state_store()
+
+
+@lazy
+def get_project_registry() -> ProjectRegistry:
+    """
+    Projetos atendidos pela instância, indexados por nome e ids do Linear
+    """
+    return create_project_registry()
+
+
+@lazy
+def get_drive_client() -> 'DriveClient':
+    """
+    Cliente do Drive (token da service account ou GOOGLE_ACCESS_TOKEN)
+    """
+    from shared.drive import DriveClient
+    return DriveClient()
+
+
+@lazy
+def get_linear_client() -> LinearClient:
+    """
+    Cliente GraphQL do Linear (rate limit e cache compartilhados na instância)
+    """
+    return LinearClient(LINEAR_API_KEY, LINEAR_API_URL)
+
+
+@lazy
+def get_dispatch_coalescer() -> DispatchCoalescer:
+    """
+    Janela de coalescência dos dispatches de auto-avanço (pendências no
+    estado do pipeline, disparadas pela fila durável)
+    """
+    return create_dispatch_coalescer(
+        get_pipeline_state(), get_event_queue(), dispatch_coalesced, wake=get_event_worker().wake
+    )
+
+
+@lazy
+def get_event_queue() -> EventQueueBackend:
+    """
+    Fila durável de eventos (modo async)
+    """
+    return create_event_queue(EVENT_QUEUE_URL)
+
+
+@lazy
+def get_event_worker() -> EventQueueWorker:
+    """
+    Worker que drena a fila em lotes
+    """
+    return EventQueueWorker(
+        get_event_queue(),
+        process_queued_event,
+        batch_size=EVENT_QUEUE_BATCH_SIZE
+    )
+
+
+def enqueue_event(data: Dict[str, Any]):
+    """
+    Valida e persiste o evento, respondendo 202 imediatamente
+
+    O worker em background só avança enquanto a instância tem CPU (em Cloud
+    Functions ela é limitada após a resposta); o POST /drain periódico é o
+    que garante o processamento
+    """
+    if not isinstance(data, dict) or not data.get('type'):
+        return jsonify({'error': 'Missing event type'}), 400
+    
+    event_id = get_event_queue().put(data)
+    get_event_worker().wake()
+    
+    return jsonify({'status': 'queued', 'event_id': event_id}), 202
+
+
+def park_event(data: Dict[str, Any], deferred: DispatchDeferred):
+    """
+    Persiste o evento na fila durável até o upstream se recuperar
+    """
+    event_id = get_event_queue().put(data)
+    bind(outcome='parked', event_id=event_id)
+    return jsonify({
+        'status': 'queued',
+        'reason': 'upstream_unavailable',
+        'event_id': event_id,
+        'retry_after': round(deferred.requeue_after, 2)
+    }), 202
+
+
+def replay_parked_events(upstream: str) -> None:
+    """
+    Circuito fechou de novo: drena em background os eventos estacionados
+    """
+    if get_event_queue().size():
+        logger.info(f"🔁 {upstream} recovered, replaying queued events")
+        get_event_worker().wake()
+
+
+on_any_recover(replay_parked_events)
+
+
+def process_queued_event(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Processa um evento retirado da fila; falhas 5xx geram retry
+    """
+    if data.get('type') == COALESCED_DISPATCH_EVENT:
+        return get_dispatch_coalescer().process(data)
+    
+    body, status = process_event(data)
+    if status >= 500:
+        raise RuntimeError(body.get('error', f'status {status}'))
+    return body
+
+
+def drain_event_queue(max_batches: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Drena a fila de forma síncrona e retorna estatísticas
+    """
+    stats = get_event_worker().drain(max_batches)
+    stats['pending'] = get_event_queue().size()
+    return stats
+
+
 def handle_cors():
     """Handle CORS preflight requests"""
     headers = {
@@ -134,6 +411,7 @@ def handle_cors():
     return ('', 204, headers)
 
 
+@EVENTS.route('InitializePipeline')
 def handle_initialization(data: Dict[str, Any]):
     """
     Processa inicialização do pipeline
@@ -173,100 +451,136 @@ Sistema 100% operacional e pronto para uso!
         level="success"
     )
     
-    return jsonify({
+    return {
         'status': 'initialized',
         'project': init_data.get('project_name'),
         'resources': resources,
         'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    }, 200
 
 
+@EVENTS.route('Issue', 'update')
 def handle_issue_update(data: Dict[str, Any]):
     """
     Processa atualização de issue Linear
     """
     issue_data = data.get('data', {})
     issue_title = issue_data.get('title', '')
-    issue_state = issue_data.get('state', {}).get('name', '')
     issue_id = issue_data.get('id', '')
     
-    logger.info(f"📝 Issue updated: {issue_title}")
-    logger.info(f"   State: {issue_state}")
-    
     # Extrair estágio do título
     stage = extract_stage_from_title(issue_title)
+    bind(issue_id=issue_id, stage=stage)
     
     if not stage:
-        logger.info("ℹ️ Issue não pertence ao pipeline")
-        return jsonify({'status': 'ignored', 'reason': 'not_pipeline_issue'}), 200
+        bind(outcome='not_pipeline_issue')
+        return {'status': 'ignored', 'reason': 'not_pipeline_issue'}, 200
+    
+    issue_data = enrich_issue(issue_data)
+    issue_state = (issue_data.get('state') or {}).get('name', '')
+    project = get_project_registry().resolve(
+        issue_data.get('projectId') or (issue_data.get('project') or {}).get('id'),
+        issue_data.get('teamId') or (issue_data.get('team') or {}).get('id')
+    )
+    bind(issue_state=issue_state, project=project.name)
     
     # Verificar se é aprovação de estágio
     if issue_state in ['Done', 'Completed', 'Approved']:
-        logger.info(f"✅ Stage {stage} aprovado!")
+        # Reserva atômica: reentregas e entregas concorrentes (updatedAt diferente,
+        # passam pelo dedup) não aplicam a transição duas vezes
+        claim, state = get_pipeline_state().claim_stage(project.name, stage)
+        if claim is None:
+            if stage in state['completed']:
+                bind(outcome='stage_already_completed')
+                return {'status': 'ignored', 'reason': 'stage_already_completed', 'stage': stage}, 200
+            bind(outcome='stage_in_progress')
+            return {'status': 'ignored', 'reason': 'stage_in_progress', 'stage': stage}, 200
         
-        # Determinar próximo estágio
-        next_stage = get_next_stage(stage)
+        try:
+            return apply_stage_approval(project, issue_id, stage, claim)
+        except BaseException:
+            # Transição não aplicada: libera o estágio para o reprocessamento
+            get_pipeline_state().release_stage(project.name, stage, claim)
+            raise
+    
+    return {'status': 'processed', 'stage': stage}, 200
+
+
+def apply_stage_approval(project: Project, issue_id: str, stage: str, claim: str):
+    """
+    Aplica a aprovação de `stage` (reservado pelo chamador com `claim`): dispara
+    ou aguarda o próximo estágio e marca a conclusão no estado do pipeline
+    """
+    logger.info(f"✅ Stage {stage} aprovado!")
+    
+    # Determinar próximo estágio
+    next_stage = get_next_stage(stage)
+    
+    if not next_stage:
+        get_pipeline_state().complete_stage(project.name, stage)
+        logger.info("🎉 Pipeline completo!")
+        send_notification(
+            title=f"Pipeline {project.name} Completo!",
+            message=f"Todos os 9 estágios foram concluídos com sucesso. 🎊",
+            level="success",
+            project=project.name
+        )
+        return {
+            'status': 'pipeline_completed',
+            'completed_stage': stage
+        }, 200
+    
+    # Verificar se pode auto-proceder
+    can_auto = can_auto_proceed(next_stage, project)
+    
+    if can_auto and DISPATCH_COALESCE_SECONDS > 0:
+        # Rajada de aprovações: só o estágio mais avançado chega ao GitHub. A
+        # reserva vira pendência persistida; o estágio é concluído após o dispatch
+        outcome, pending = get_dispatch_coalescer().submit(
+            project.name, stage, next_stage, claim, {'previous_stage': stage}
+        )
+        bind(outcome=f"dispatch_{outcome}")
+        
+        return {
+            'status': 'dispatch_scheduled',
+            'approved_stage': stage,
+            'next_stage': next_stage,
+            'dispatch': outcome,
+            'dispatch_stage': pending['stage'] if pending else None,
+            'dispatch_in_seconds': round(max(pending['due_at'] - time.time(), 0.0), 1) if pending else 0.0
+        }, 200
+    
+    if can_auto:
+        logger.info(f"🚀 Auto-proceeding to {next_stage}")
+        
+        # Dispatch e depois pasta do Drive, notificação e comentário em paralelo;
+        # DispatchDeferred é relançado antes de marcar o estágio concluído
+        side_effects, results = run_approval_side_effects(project, issue_id, stage, next_stage, auto=True)
+        get_pipeline_state().complete_stage(project.name, stage)
         
-        if not next_stage:
-            logger.info("🎉 Pipeline completo!")
-            send_notification(
-                title=f"Pipeline {PROJECT_NAME} Completo!",
-                message=f"Todos os 9 estágios foram concluídos com sucesso. 🎊",
-                level="success"
-            )
-            return jsonify({
-                'status': 'pipeline_completed',
-                'completed_stage': stage
-            }), 200
+        return {
+            'status': 'auto_proceeded',
+            'completed_stage': stage,
+            'next_stage': next_stage,
+            'automation_triggered': bool(results.get('dispatch')),
+            'side_effects': side_effects
+        }, 200
+    else:
+        logger.info(f"⏸️ {next_stage} requires manual approval")
+        get_pipeline_state().complete_stage(project.name, stage, awaiting_approval=True)
         
-        # Verificar se pode auto-proceder
-        can_auto = can_auto_proceed(next_stage)
+        side_effects, _ = run_approval_side_effects(project, issue_id, stage, next_stage, auto=False)
         
-        if can_auto:
-            logger.info(f"🚀 Auto-proceeding to {next_stage}")
-            
-            # Trigger automação para próximo estágio
-            trigger_result = trigger_next_stage_automation(
-                PROJECT_NAME,
-                next_stage,
-                previous_stage=stage
-            )
-            
-            # Notificar avanço automático
-            agent_info = AGENT_INFO.get(next_stage, {})
-            send_notification(
-                title=f"Estágio {next_stage} Iniciado Automaticamente",
-                message=f"{agent_info.get('emoji')} {agent_info.get('name')} está agora trabalhando no estágio {next_stage}.",
-                level="info"
-            )
-            
-            return jsonify({
-                'status': 'auto_proceeded',
-                'completed_stage': stage,
-                'next_stage': next_stage,
-                'automation_triggered': trigger_result
-            }), 200
-        else:
-            logger.info(f"⏸️ {next_stage} requires manual approval")
-            
-            # Notificar que aprovação manual é necessária
-            agent_info = AGENT_INFO.get(next_stage, {})
-            send_notification(
-                title=f"Aprovação Necessária - {next_stage}",
-                message=f"{agent_info.get('emoji')} {agent_info.get('name')} aguarda sua aprovação no Linear para iniciar {next_stage}.",
-                level="warning"
-            )
-            
-            return jsonify({
-                'status': 'awaiting_approval',
-                'completed_stage': stage,
-                'next_stage': next_stage,
-                'requires_manual_approval': True
-            }), 200
-    
-    return jsonify({'status': 'processed', 'stage': stage}), 200
+        return {
+            'status': 'awaiting_approval',
+            'completed_stage': stage,
+            'next_stage': next_stage,
+            'requires_manual_approval': True,
+            'side_effects': side_effects
+        }, 200
 
 
+@EVENTS.route('Issue', 'create')
 def handle_issue_create(data: Dict[str, Any]):
     """
     Processa criação de nova issue
@@ -274,11 +588,12 @@ def handle_issue_create(data: Dict[str, Any]):
     issue_data = data.get('data', {})
     issue_title = issue_data.get('title', '')
     
-    logger.info(f"📌 New issue created: {issue_title}")
+    bind(issue_id=issue_data.get('id'), issue_title=issue_title)
     
-    return jsonify({'status': 'acknowledged'}), 200
+    return {'status': 'acknowledged'}, 200
 
 
+@EVENTS.route('Comment', 'create')
 def handle_comment_create(data: Dict[str, Any]):
     """
     Processa criação de comentário em issue
@@ -286,29 +601,132 @@ def handle_comment_create(data: Dict[str, Any]):
     comment_data = data.get('data', {})
     comment_body = comment_data.get('body', '')
     
-    logger.info(f"💬 New comment: {comment_body[:100]}...")
+    bind(comment_id=comment_data.get('id'), comment_length=len(comment_body))
     
     # Aqui pode adicionar lógica para processar comandos via comentários
     # Exemplo: @bot deploy, @bot rollback, etc.
     
-    return jsonify({'status': 'acknowledged'}), 200
+    return {'status': 'acknowledged'}, 200
 
 
+@EVENTS.route('IssueLabel')
 def handle_issue_label(data: Dict[str, Any]):
     """
     Processa mudanças de labels em issues
     """
-    logger.info("🏷️ Issue label changed")
+    bind(label=(data.get('data') or {}).get('name'))
     
-    return jsonify({'status': 'acknowledged'}), 200
+    return {'status': 'acknowledged'}, 200
+
+
+def enrich_issue(issue_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa estado, time e labels que vierem só como id no payload, com no
+    máximo uma chamada ao Linear (entidades estáveis saem do cache)
+    """
+    if not LINEAR_API_KEY:
+        return issue_data
+    
+    loader = get_linear_client().loader()
+    refs = {}
+    if not (issue_data.get('state') or {}).get('name') and issue_data.get('stateId'):
+        refs['state'] = loader.load('workflowState', issue_data['stateId'])
+    if not issue_data.get('team') and issue_data.get('teamId'):
+        refs['team'] = loader.load('team', issue_data['teamId'])
+    if not issue_data.get('labels') and issue_data.get('labelIds'):
+        refs['labels'] = loader.load_many('issueLabel', issue_data['labelIds'])
+    if not refs:
+        return issue_data
+    
+    try:
+        with span('linear_enrich'):
+            loader.dispatch()
+    except Exception as e:
+        # Enriquecimento é best-effort: rate limit, circuito aberto ou erro de rede não bloqueiam o evento
+        logger.warning(f"⚠️ Linear enrichment skipped: {e}")
+        return issue_data
+    finally:
+        bind(linear_round_trips=loader.round_trips)
+    
+    enriched = dict(issue_data)
+    for field, ref in refs.items():
+        value = [r.get() for r in ref if r.get()] if field == 'labels' else ref.get()
+        if value:
+            enriched[field] = value
+    return enriched
+
+
+def run_approval_side_effects(project: Project, issue_id: str, stage: str, next_stage: str,
+                              auto: bool) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Efeitos de uma aprovação: o dispatch primeiro, depois os efeitos
+    independentes em paralelo (latência = o mais lento, não a soma), com
+    prazo FANOUT_DEADLINE e status por efeito
+    """
+    agent_info = AGENT_INFO.get(next_stage, {})
+    agent = f"{agent_info.get('emoji')} {agent_info.get('name')}"
+    effects = {}
+    report: Dict[str, Dict[str, Any]] = {}
+    results: Dict[str, Any] = {}
+    
+    if auto:
+        # O dispatch roda no request até ter resultado definitivo (nunca 'timeout'
+        # com o POST em voo); DispatchDeferred sai antes de notificação,
+        # comentário e pasta, que o reprocessamento do evento duplicaria
+        dispatch_id = new_dispatch_id()
+        started = time.perf_counter()
+        results['dispatch'] = trigger_next_stage_automation(
+            project.name, next_stage, previous_stage=stage, max_wait=FANOUT_DEADLINE * 0.9,
+            dispatch_id=dispatch_id)
+        # Consultável depois via action run_status do automation_core
+        report['dispatch'] = {'status': 'ok', 'ms': round((time.perf_counter() - started) * 1000, 1),
+                              'dispatch_id': dispatch_id}
+        effects['notification'] = lambda: send_notification(
+            title=f"Estágio {next_stage} Iniciado Automaticamente",
+            message=f"{agent} está agora trabalhando no estágio {next_stage}.",
+            level="info",
+            project=project.name
+        )
+        comment = f"🚀 {stage} aprovado: {next_stage} iniciado automaticamente ({agent})."
+    else:
+        effects['notification'] = lambda: send_notification(
+            title=f"Aprovação Necessária - {next_stage}",
+            message=f"{agent} aguarda sua aprovação no Linear para iniciar {next_stage}.",
+            level="warning",
+            project=project.name
+        )
+        comment = f"⏸️ {stage} aprovado: {next_stage} aguarda aprovação manual ({agent})."
+    
+    if APPROVAL_DRIVE_SETUP and project.drive_folder_id:
+        effects['drive_folder'] = lambda: setup_stage_folder(project, next_stage)
+    if APPROVAL_LINEAR_COMMENT and LINEAR_API_KEY and issue_id:
+        effects['linear_comment'] = lambda: get_linear_client().create_comment(issue_id, comment)
+    
+    with span('side_effects'):
+        effect_report, effect_results = fan_out(effects, FANOUT_DEADLINE)
+    report.update(effect_report)
+    results.update(effect_results)
+    bind(side_effects={name: r['status'] for name, r in report.items()})
+    return report, results
+
+
+@span('drive_folder')
+def setup_stage_folder(project: Project, stage: str) -> Optional[str]:
+    """
+    Garante a pasta do estágio na estrutura do projeto no Drive
+    """
+    from shared.drive_organizer import DEFAULT_STAGE_FOLDERS, FolderResolver
+    
+    if stage not in DEFAULT_STAGE_FOLDERS:
+        return None
+    return FolderResolver(get_drive_client(), project.drive_folder_id).resolve(DEFAULT_STAGE_FOLDERS[stage])
 
 
 def extract_stage_from_title(title: str) -> Optional[str]:
     """
     Extrai estágio (L1, L2, etc.) do título da issue
     """
-    import re
-    match = re.search(r'(L\d+):', title)
+    match = STAGE_PATTERN.search(title)
     return match.group(1) if match else None
 
 
@@ -316,106 +734,105 @@ def get_next_stage(current_stage: str) -> Optional[str]:
     """
     Retorna o próximo estágio na sequência
     """
-    try:
-        current_index = STAGE_SEQUENCE.index(current_stage)
-        if current_index < len(STAGE_SEQUENCE) - 1:
-            return STAGE_SEQUENCE[current_index + 1]
-    except ValueError:
+    if current_stage not in NEXT_STAGE:
         logger.error(f"Stage {current_stage} not found in sequence")
-    
-    return None
+    return NEXT_STAGE.get(current_stage)
 
 
-def can_auto_proceed(stage: str) -> bool:
+def can_auto_proceed(stage: str, project: Project) -> bool:
     """
-    Verifica se estágio pode ser automatizado
+    Verifica se estágio pode ser automatizado no projeto
     """
-    return stage in AUTO_APPROVE_STAGES
+    return stage in project.auto_approve_stages
 
 
+@span('github_dispatch')
 def trigger_next_stage_automation(
     project_name: str, 
     stage: str, 
-    previous_stage: Optional[str] = None
+    previous_stage: Optional[str] = None,
+    max_wait: Optional[float] = None,
+    dispatch_id: Optional[str] = None
 ) -> bool:
     """
-    Trigger automação do próximo estágio via GitHub Actions
+    Trigger automação do próximo estágio via GitHub Actions; `dispatch_id`
+    vai no run-name para o run tracker achar o run correspondente
     """
     if not GITHUB_TOKEN or not GITHUB_OWNER:
         logger.warning("GitHub credentials not configured")
         return False
     
-    try:
-        repo_name = f"llm-app-{project_name.lower().replace('_', '-')}"
-        
-        # Endpoint do GitHub Actions workflow dispatch
-        url = f"{GITHUB_API_URL}/repos/{GITHUB_OWNER}/{repo_name}/actions/workflows/llm-pipeline-auto.yml/dispatches"
-        
-        headers = {
-            "Authorization": f"Bearer {GITHUB_TOKEN}",
-            "Accept": "application/vnd.github.v3+json",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "ref": "main",
-            "inputs": {
-                "stage": stage,
-                "project_name": project_name,
-                "previous_stage": previous_stage or "",
-                "auto_triggered": "true",
-                "triggered_by": "linear_webhook",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        }
-        
-        logger.info(f"Triggering GitHub Actions for {stage}")
-        logger.debug(f"URL: {url}")
-        logger.debug(f"Payload: {json.dumps(payload, indent=2)}")
-        
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
-        
-        if response.status_code == 204:
-            logger.info(f"GitHub Actions triggered successfully for {stage}")
-            return True
-        else:
-            logger.error(f"Failed to trigger GitHub Actions: {response.status_code}")
-            logger.error(f"Response: {response.text}")
-            return False
-        
-    except Exception as e:
-        logger.error(f"Error triggering automation: {str(e)}")
-        logger.error(traceback.format_exc())
+    repo = get_project_registry().get(project_name).repo
+    
+    inputs = {
+        "stage": stage,
+        "project_name": project_name,
+        "previous_stage": previous_stage or "",
+        "auto_triggered": "true",
+        "triggered_by": "linear_webhook",
+        "timestamp": datetime.utcnow().isoformat(),
+        "dispatch_id": dispatch_id or new_dispatch_id()
+    }
+    
+    # O scheduler espaça dispatches e repete 403/429/5xx com backoff
+    result = get_dispatch_scheduler().dispatch(repo, WORKFLOW_FILE, inputs, GITHUB_TOKEN, max_wait=max_wait)
+    bind(dispatch_repo=repo, dispatch_stage=stage, dispatch_status=result.status_code,
+         dispatch_attempts=result.attempts, dispatch_id=inputs['dispatch_id'])
+    
+    if result.ok:
+        return True
+    
+    if result.ambiguous:
+        # O POST pode ter criado o run: reprocessar o evento duplicaria o estágio
+        logger.warning(f"⚠️ Dispatch of {stage} unconfirmed ({result.error}); "
+                       f"check run_status for dispatch_id {inputs['dispatch_id']}")
         return False
+    
+    logger.error(f"Failed to trigger GitHub Actions: {result.status_code} after {result.attempts} attempts")
+    logger.error(f"Response: {result.error}")
+    
+    if result.retryable:
+        # Não descartar a transição: a fila (ou o retry do Linear) reprocessa o evento
+        raise DispatchDeferred(f"Dispatch of {stage} deferred: {result.error}", result)
+    return False
 
 
+def dispatch_coalesced(project_name: str, stage: str, pending: Dict[str, Any]) -> bool:
+    """
+    Dispatch vencedor da janela (evento da fila); DispatchDeferred volta para
+    o coalescer reagendar e a notificação só sai após o sucesso
+    """
+    logger.info(f"🚀 Auto-proceeding to {stage} (coalesced)")
+    triggered = trigger_next_stage_automation(
+        project_name, stage, previous_stage=pending['payload'].get('previous_stage'),
+        dispatch_id=new_dispatch_id()
+    )
+    if not triggered:
+        return False
+    
+    agent_info = AGENT_INFO.get(stage, {})
+    send_notification(
+        title=f"Estágio {stage} Iniciado Automaticamente",
+        message=f"{agent_info.get('emoji')} {agent_info.get('name')} está agora trabalhando no estágio {stage}.",
+        level="info",
+        project=project_name
+    )
+    return triggered
+
+
+@span('notification')
 def send_notification(
     title: str, 
     message: str, 
-    level: str = "info"
+    level: str = "info",
+    project: Optional[str] = None
 ) -> bool:
     """
-    Envia notificações por email ou Slack
+    Enfileira notificação (Slack/stub); o envio ocorre em background
+    e nunca adiciona latência à resposta do webhook
     """
-    try:
-        # Implementar lógica de notificação
-        logger.info(f"Notification [{level.upper()}]: {title}")
-        logger.info(f"Message: {message}")
-        
-        # Aqui você pode integrar com Slack, email, etc.
-        if SLACK_WEBHOOK_URL:
-            # Enviar para Slack
-            pass
-        
-        if NOTIFICATION_EMAIL:
-            # Enviar por email
-            pass
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send notification: {str(e)}")
-        return False
+    bind(notification=title, notification_level=level)
+    return get_notifier().notify(title, message, level, project=project or PROJECT_NAME)
 
 
 def send_error_notification(error: Exception, data: Dict[str, Any]) -> bool:
@@ -431,7 +848,7 @@ def send_error_notification(error: Exception, data: Dict[str, Any]) -> bool:
     
     **Dados do evento:**
     ```json
-    {json.dumps(data, indent=2)[:500]}...
+    {json.dumps(data, default=str)[:500]}...
     ```
     """
     
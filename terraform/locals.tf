@@ -20,6 +20,16 @@ locals {
   apps_script_url  = "${local.webhook_base_url}/${local.apps_script_function_name}"
   automation_url   = "${local.webhook_base_url}/${local.automation_function_name}"
   
+  # Fila de eventos no Firestore, compartilhada entre as instâncias do webhook
+  event_queue_collection = "adc-events-${local.project_id_clean}"
+  event_queue_url        = "firestore://${var.google_project_id}/${local.event_queue_collection}"
+  
+  # Estado do pipeline (claims e compare-and-set valem entre instâncias)
+  pipeline_state_url = "firestore://${var.google_project_id}/adc-pipeline-state-${local.project_id_clean}"
+  
+  # Token das rotas operacionais do webhook (mesmo fallback de ADMIN_SECRET no código)
+  admin_secret = var.admin_token != "" ? var.admin_token : var.linear_webhook_secret
+  
   # Key do time Linear (3 primeiras letras do projeto em maiúsculo)
   linear_team_key = upper(substr(replace(var.project_name, "-", ""), 0, 3))
   
@@ -496,6 +506,7 @@ locals {
     "logging.googleapis.com",
     "secretmanager.googleapis.com",
     "storage-api.googleapis.com",
+    "firestore.googleapis.com",
     "compute.googleapis.com"
   ]
   
@@ -503,16 +514,19 @@ locals {
   env_config = {
     dev = {
       log_level = "DEBUG"
+      log_sample_rate = 1
       instance_size = "small"
       retention_days = 7
     }
     staging = {
       log_level = "INFO"
+      log_sample_rate = 0.25
       instance_size = "medium"
       retention_days = 30
     }
     production = {
       log_level = "WARNING"
+      log_sample_rate = 0.1
       instance_size = "large"
       retention_days = 90
     }
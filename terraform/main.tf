@@ -237,13 +237,23 @@ resource "google_cloudfunctions_function" "webhook_handler" {
     PROJECT_NAME     = var.project_name
     ENVIRONMENT      = var.environment
     LINEAR_API_KEY   = var.linear_api_key
+    LINEAR_WEBHOOK_SECRET = var.linear_webhook_secret
+    ADMIN_TOKEN      = var.admin_token
     GITHUB_TOKEN     = var.github_token
     GITHUB_OWNER     = var.github_owner
     DRIVE_FOLDER_ID  = gdrive_folder.main_project_folder.id
     LOG_LEVEL        = local.current_env_config.log_level
+    LOG_SAMPLE_RATE  = local.current_env_config.log_sample_rate
     AUTO_APPROVE_STAGES = join(",", var.auto_approve_stages)
     NOTIFICATION_EMAIL = var.notification_email
     SLACK_WEBHOOK_URL = var.slack_webhook_url
+    WEBHOOK_MODE      = var.webhook_mode
+    EVENT_QUEUE_URL   = local.event_queue_url
+    PIPELINE_STATE_URL = local.pipeline_state_url
+    DISPATCH_COALESCE_SECONDS = var.dispatch_coalesce_seconds
+    PROJECTS_CONFIG   = jsonencode(var.projects)
+    # Pasta do estágio criada no Drive durante a aprovação
+    GOOGLE_CREDENTIALS = base64encode(file(var.google_credentials_file))
   }
   
   labels = merge(var.tags, {
@@ -292,7 +302,11 @@ resource "google_cloudfunctions_function" "apps_script_proxy" {
   environment_variables = {
     PROJECT_NAME = var.project_name
     DRIVE_FOLDER_ID = gdrive_folder.main_project_folder.id
+    ARTIFACTS_BUCKET = google_storage_bucket.artifacts.name
+    PIPELINE_STAGES = jsonencode(local.pipeline_stages)
     GOOGLE_CREDENTIALS = base64encode(file(var.google_credentials_file))
+    PROJECTS_CONFIG = jsonencode(var.projects)
+    ADMIN_TOKEN = local.admin_secret
   }
   
   labels = merge(var.tags, {
@@ -346,6 +360,9 @@ resource "google_cloudfunctions_function" "automation_core" {
     WEBHOOK_URL = local.webhook_url
     DRIVE_FOLDER_ID = gdrive_folder.main_project_folder.id
     ARTIFACTS_BUCKET = google_storage_bucket.artifacts.name
+    AUTO_APPROVE_STAGES = join(",", var.auto_approve_stages)
+    PROJECTS_CONFIG = jsonencode(var.projects)
+    ADMIN_TOKEN = local.admin_secret
   }
   
   labels = merge(var.tags, {
@@ -382,6 +399,89 @@ resource "google_cloudfunctions_function_iam_member" "automation_invoker" {
   member = "allUsers"
 }
 
+#-------------------#
+# FIRESTORE         #
+#-------------------#
+
+# Service account das funções (GOOGLE_CREDENTIALS) lê e grava os estados compartilhados
+resource "google_project_iam_member" "functions_firestore" {
+  project = var.google_project_id
+  role    = "roles/datastore.user"
+  member  = "serviceAccount:${jsondecode(file(var.google_credentials_file)).client_email}"
+}
+
+# Índices das consultas da fila: eventos prontos e dead letters
+resource "google_firestore_index" "event_queue_ready" {
+  depends_on = [google_project_service.required_apis]
+  
+  project    = var.google_project_id
+  collection = local.event_queue_collection
+  
+  fields {
+    field_path = "status"
+    order      = "ASCENDING"
+  }
+  
+  fields {
+    field_path = "available_at"
+    order      = "ASCENDING"
+  }
+}
+
+resource "google_firestore_index" "event_queue_dead" {
+  depends_on = [google_project_service.required_apis]
+  
+  project    = var.google_project_id
+  collection = local.event_queue_collection
+  
+  fields {
+    field_path = "status"
+    order      = "ASCENDING"
+  }
+  
+  fields {
+    field_path = "created_at"
+    order      = "ASCENDING"
+  }
+}
+
+#-------------------#
+# CLOUD SCHEDULER   #
+#-------------------#
+
+# Drena a fila compartilhada: eventos aceitos com 202 e dispatches coalescidos
+# não dependem da CPU da instância que os recebeu depois da resposta
+resource "google_cloud_scheduler_job" "drain_events" {
+  count      = var.webhook_mode == "async" || var.dispatch_coalesce_seconds > 0 ? 1 : 0
+  depends_on = [google_project_service.required_apis]
+  
+  name             = "${local.webhook_function_name}-drain"
+  description      = "Drena a fila de eventos do webhook - ${var.project_name}"
+  region           = var.region
+  schedule         = var.event_drain_schedule
+  time_zone        = "Etc/UTC"
+  attempt_deadline = "540s"
+  
+  retry_config {
+    retry_count = 1
+  }
+  
+  http_target {
+    http_method = "POST"
+    uri         = "${local.webhook_url}/drain"
+    headers = {
+      "X-Admin-Token" = local.admin_secret
+    }
+  }
+  
+  lifecycle {
+    precondition {
+      condition     = local.admin_secret != ""
+      error_message = "O /drain agendado exige admin_token ou linear_webhook_secret."
+    }
+  }
+}
+
 #-------------------#
 # GITHUB RESOURCES  #
 #-------------------#
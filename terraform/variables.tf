@@ -68,6 +68,20 @@ variable "linear_api_key" {
   sensitive   = true
 }
 
+variable "admin_token" {
+  description = "Token (header X-Admin-Token) de /drain, /status e /metrics das funções; vazio usa o linear_webhook_secret"
+  type        = string
+  default     = ""
+  sensitive   = true
+}
+
+variable "linear_webhook_secret" {
+  description = "Signing secret do webhook do Linear (verificação do header Linear-Signature)"
+  type        = string
+  default     = ""
+  sensitive   = true
+}
+
 variable "linear_organization_id" {
   description = "ID da organização Linear"
   type        = string
@@ -139,6 +153,42 @@ variable "auto_approve_stages" {
   default     = ["L3", "L5", "L7", "L8"]
 }
 
+variable "projects" {
+  description = "Pipelines adicionais servidos pelo mesmo deploy, roteados pelos ids de time/projeto do Linear"
+  type = list(object({
+    name                = string
+    linear_team_id      = optional(string, "")
+    linear_project_id   = optional(string, "")
+    repo                = optional(string)
+    drive_folder_id     = optional(string)
+    auto_approve_stages = optional(list(string))
+  }))
+  default = []
+}
+
+variable "dispatch_coalesce_seconds" {
+  description = "Janela (s) de coalescência dos dispatches de auto-avanço por projeto; 0 dispara dentro do request (>0 usa a fila e o /drain agendado)"
+  type        = number
+  default     = 0
+}
+
+variable "webhook_mode" {
+  description = "Modo do webhook handler: sync (processa inline) ou async (enfileira no Firestore, responde 202 e o /drain agendado processa)"
+  type        = string
+  default     = "sync"
+  
+  validation {
+    condition     = contains(["sync", "async"], var.webhook_mode)
+    error_message = "Webhook mode deve ser: sync ou async."
+  }
+}
+
+variable "event_drain_schedule" {
+  description = "Cron do Cloud Scheduler que chama POST /drain (modo async ou coalescência ativa)"
+  type        = string
+  default     = "* * * * *"
+}
+
 variable "tags" {
   description = "Tags para organização de recursos"
   type        = map(string)
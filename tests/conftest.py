@@ -0,0 +1,29 @@
+"""
+ADC-Agents-Team - Test fixtures
+Caminhos de functions/ e tools/ e os upstreams simulados (tools/fake_upstreams.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'functions'), os.path.join(ROOT, 'tools')]
+
+# Todos os upstreams simulados respondem no mesmo host: um circuito aberto
+# por um teste de falhas vazaria para os seguintes
+os.environ.setdefault('CIRCUIT_BREAKER', 'false')
+
+from fake_upstreams import start_fake_upstreams  # noqa: E402
+
+
+@pytest.fixture
+def upstreams():
+    """
+    (state, base_url) de um servidor simulado exclusivo do teste
+    """
+    server, state, base_url = start_fake_upstreams()
+    yield state, base_url
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import importlib.util
+
+import pytest
+
+from conftest import ROOT
+
+
+@pytest.fixture(scope='module')
+def automation():
+    """
+    functions/automation_core/main.py carregado com nome próprio (cada função tem seu main.py)
+    """
+    spec = importlib.util.spec_from_file_location(
+        'automation_core_main', os.path.join(ROOT, 'functions', 'automation_core', 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+OPERATIONS = [{'action': 'run_status', 'payload': {'project_name': 'demo', 'stage': 'L3'}}]
+
+
+@pytest.mark.parametrize('max_workers', ['many', None, 0, -2, 1.5, True, [4]])
+def test_invalid_max_workers_is_rejected(automation, max_workers):
+    body, status = automation.run_batch({'operations': OPERATIONS, 'max_workers': max_workers})
+
+    assert status == 400
+    assert body == {'error': 'max_workers must be a positive integer'}
+
+
+def test_numeric_max_workers_string_is_accepted(automation, monkeypatch):
+    monkeypatch.setitem(automation.ACTIONS, 'run_status', lambda payload: ({'ok': True}, 200))
+    body, status = automation.run_batch({'operations': OPERATIONS, 'max_workers': '2'})
+
+    assert status == 200 and body['failed'] == 0
+
+
+def recording(calls, response=({'status': 'triggered'}, 200)):
+    def action(payload):
+        calls.append(payload)
+        return response
+    return action
+
+
+def test_duplicate_dispatches_run_once(automation, monkeypatch):
+    calls = []
+    monkeypatch.setitem(automation.ACTIONS, 'trigger_stage', recording(calls))
+    operations = [
+        {'action': 'trigger_stage', 'payload': {'project_name': 'demo', 'stage': 'L3'}},
+        {'action': 'trigger_stage', 'payload': {'project_name': 'demo', 'stage': 'L3', 'note': 'retry'}},
+        {'action': 'trigger_stage', 'payload': {'project_name': 'demo', 'stage': 'L4'}},
+    ]
+    body, status = automation.run_batch({'operations': operations})
+
+    assert status == 200
+    assert (body['total'], body['executed'], body['failed']) == (3, 2, 0)
+    assert sorted(p['stage'] for p in calls) == ['L3', 'L4']
+    assert [r['coalesced'] for r in body['results']] == [False, True, False]
+    assert body['results'][1]['result'] == {'status': 'triggered'}
+
+
+def test_identical_non_dispatch_operations_are_coalesced(automation, monkeypatch):
+    calls = []
+    monkeypatch.setitem(automation.ACTIONS, 'sync_status', recording(calls, ({'status': 'sync_complete'}, 200)))
+    demo = {'action': 'sync_status', 'payload': {'project_name': 'demo'}}
+    other = {'action': 'sync_status', 'payload': {'project_name': 'other'}}
+    body, _ = automation.run_batch({'operations': [demo, dict(demo), other]})
+
+    assert body['executed'] == 2 and len(calls) == 2
+
+
+def test_unknown_actions_and_failures_are_reported_per_item(automation, monkeypatch):
+    def broken(payload):
+        raise RuntimeError('upstream down')
+
+    monkeypatch.setitem(automation.ACTIONS, 'sync_status', broken)
+    operations = [{'action': 'deploy', 'payload': {}}, 'not-an-object',
+                  {'action': 'sync_status', 'payload': {'project_name': 'demo'}}]
+    body, status = automation.run_batch({'operations': operations})
+
+    assert status == 200 and body['failed'] == 3
+    assert [r['status_code'] for r in body['results']] == [400, 400, 500]
+    assert body['results'][2]['result'] == {'error': 'upstream down'}
+
+
+def test_batch_size_is_limited(automation, monkeypatch):
+    monkeypatch.setattr(automation, 'BATCH_MAX_OPERATIONS', 2)
+
+    assert automation.run_batch({'operations': []})[1] == 400
+    assert automation.run_batch({'operations': OPERATIONS * 3})[1] == 400
+
+
+def test_groups_run_in_parallel_up_to_max_workers(automation, monkeypatch):
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def slow(payload):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {'status': 'ok'}, 200
+
+    monkeypatch.setitem(automation.ACTIONS, 'run_status', slow)
+    operations = [{'action': 'run_status', 'payload': {'project_name': 'demo', 'stage': f"L{n}"}} for n in range(6)]
+    body, _ = automation.run_batch({'operations': operations, 'max_workers': 2})
+
+    assert body['executed'] == 6
+    assert peak[0] == 2
@@ -0,0 +1,124 @@
+import pytest
+
+from shared import http_client
+from shared.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('github', failure_rate=0.5, min_calls=4, window_seconds=30,
+                          open_seconds=10, half_open_calls=1, clock=clock)
+
+
+def call(breaker, success):
+    breaker.before_call()
+    breaker.record(success)
+
+
+def trip(breaker):
+    for success in (True, False, False, False):
+        call(breaker, success)
+    assert breaker.state == OPEN
+
+
+def test_failures_below_min_calls_keep_the_circuit_closed(breaker):
+    for _ in range(3):
+        call(breaker, False)
+
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['failures_in_window'] == 3
+
+
+def test_failure_rate_over_the_window_opens_the_circuit(breaker):
+    for success in (True, True, False, False):
+        call(breaker, success)
+
+    assert breaker.state == OPEN
+    assert breaker.stats['trips'] == 1
+
+
+def test_old_calls_leave_the_window(breaker, clock):
+    for _ in range(3):
+        call(breaker, False)
+    clock.now += 31
+    call(breaker, False)
+
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['calls_in_window'] == 1
+
+
+def test_open_circuit_rejects_calls_with_retry_after(breaker, clock):
+    trip(breaker)
+    clock.now += 4
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(6)
+    assert breaker.stats['rejected'] == 1
+
+
+def test_half_open_allows_one_probe_and_success_closes(breaker, clock):
+    recovered = []
+    breaker.on_recover(recovered.append)
+    trip(breaker)
+    clock.now += 10
+
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True)
+
+    assert breaker.state == CLOSED
+    assert breaker.stats['recoveries'] == 1
+    assert recovered == ['github']
+
+
+def test_failed_probe_reopens_the_circuit(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    call(breaker, False)
+
+    assert breaker.state == OPEN
+    assert breaker.stats['trips'] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_recovery_callback_errors_do_not_break_record(breaker, clock):
+    def failing(name):
+        raise RuntimeError('boom')
+
+    breaker.on_recover(failing)
+    trip(breaker)
+    clock.now += 10
+    call(breaker, True)
+
+    assert breaker.state == CLOSED
+
+
+def test_http_client_fails_fast_while_the_circuit_is_open(upstreams, breaker, monkeypatch):
+    state, base_url = upstreams
+    monkeypatch.setattr(http_client, 'CIRCUIT_ENABLED', True)
+    monkeypatch.setattr(http_client, 'get_breaker', lambda host: breaker)
+    state.inject = lambda: 503
+    for _ in range(4):
+        assert http_client.post(f"{base_url}/graphql", json={}).status_code == 503
+    sent = len(state.request_log)
+
+    with pytest.raises(CircuitOpenError):
+        http_client.post(f"{base_url}/graphql", json={})
+    assert len(state.request_log) == sent
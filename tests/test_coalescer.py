@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from shared.coalescer import DispatchCoalescer
+from shared.event_queue import EventQueueWorker, SQLiteEventQueue
+from shared.pipeline_state import PipelineStateStore, SQLitePipelineStateBackend
+
+
+class Deferred(Exception):
+    requeue_after = None
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    state = PipelineStateStore(SQLitePipelineStateBackend(str(tmp_path / 'state.sqlite3')))
+    queue = SQLiteEventQueue(str(tmp_path / 'queue.sqlite3'))
+    calls = []
+    outcomes = []
+
+    def dispatch(project, stage, pending):
+        calls.append(stage)
+        outcome = outcomes.pop(0) if outcomes else True
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    coalescer = DispatchCoalescer(state, queue, dispatch, window=0.05, max_delay=1.0, max_retries=1)
+    return state, queue, coalescer, EventQueueWorker(queue, coalescer.process), calls, outcomes
+
+
+def approve(state, coalescer, stage, next_stage):
+    claim, _ = state.claim_stage('demo', stage)
+    assert claim is not None
+    return coalescer.submit('demo', stage, next_stage, claim)[0]
+
+
+def test_burst_dispatches_only_the_latest_stage_after_the_window(pipeline):
+    state, queue, coalescer, worker, calls, _ = pipeline
+    assert approve(state, coalescer, 'L2', 'L3') == 'scheduled'
+    assert approve(state, coalescer, 'L3', 'L4') == 'superseded'
+
+    assert worker.drain()['claimed'] == 0
+    # Estágios aprovados continuam reservados até o dispatch
+    assert state.claim_stage('demo', 'L2')[0] is None
+    assert state.status('demo')['completed_stages'] == []
+
+    time.sleep(0.1)
+    worker.drain()
+    assert calls == ['L4']
+    status = state.status('demo')
+    assert (status['completed_stages'], status['current_stage'], status['pending_dispatch']) == (['L2', 'L3'], 'L4', None)
+    assert queue.size() == 0
+
+
+def test_failed_dispatch_is_retried_then_dead_lettered_with_stages_open(pipeline):
+    state, queue, coalescer, worker, calls, outcomes = pipeline
+    outcomes.extend([Deferred('github down'), False])
+    approve(state, coalescer, 'L2', 'L3')
+
+    time.sleep(0.1)
+    assert worker.drain()['deferred'] == 1
+    time.sleep(1.1)
+    assert worker.drain()['dead'] == 1
+
+    assert calls == ['L3', 'L3']
+    assert queue.dead_letters() == [{'type': 'CoalescedDispatch', 'project': 'demo'}]
+    status = state.status('demo')
+    assert status['completed_stages'] == [] and status['pending_dispatch'] is None
+    assert status['failed_dispatch']['stages'] == ['L2']
+    assert state.claim_stage('demo', 'L2')[0] is not None
+
+
+def test_stage_approved_during_dispatch_stays_pending(pipeline):
+    state, queue, coalescer, worker, calls, outcomes = pipeline
+    approve(state, coalescer, 'L2', 'L3')
+
+    def dispatch_and_supersede(project, stage, pending):
+        calls.append(stage)
+        if stage == 'L3':
+            approve(state, coalescer, 'L3', 'L4')
+        return True
+
+    coalescer.dispatch = dispatch_and_supersede
+    time.sleep(0.1)
+    worker.drain()
+    assert state.status('demo')['completed_stages'] == ['L2']
+    assert state.status('demo')['pending_dispatch']['stage'] == 'L4'
+
+    time.sleep(0.1)
+    worker.drain()
+    assert calls == ['L3', 'L4']
+    assert state.status('demo')['completed_stages'] == ['L2', 'L3']
+
+
+def test_manual_approval_during_the_window_cancels_the_stale_dispatch(pipeline):
+    state, queue, coalescer, worker, calls, _ = pipeline
+    approve(state, coalescer, 'L2', 'L3')
+
+    # L3 aprovado à mão com L4 manual antes da janela vencer
+    claim, _ = state.claim_stage('demo', 'L3')
+    state.complete_stage('demo', 'L3', awaiting_approval=True)
+
+    time.sleep(0.1)
+    assert worker.drain()['claimed'] == 1
+    assert calls == []
+    status = state.status('demo')
+    assert (status['completed_stages'], status['current_stage'], status['pending_approval']) == (['L2', 'L3'], 'L4', 'L4')
+    assert status['pending_dispatch'] is None
+
+
+def test_dispatch_settled_after_a_manual_approval_never_moves_back(pipeline):
+    state, queue, coalescer, worker, calls, _ = pipeline
+    approve(state, coalescer, 'L2', 'L3')
+
+    def dispatch_while_approved_by_hand(project, stage, pending):
+        calls.append(stage)
+        state.claim_stage('demo', 'L3')
+        state.complete_stage('demo', 'L3', awaiting_approval=True)
+        return True
+
+    coalescer.dispatch = dispatch_while_approved_by_hand
+    time.sleep(0.1)
+    worker.drain()
+    assert calls == ['L3']
+    status = state.status('demo')
+    assert (status['current_stage'], status['pending_approval'], status['pending_dispatch']) == ('L4', 'L4', None)
+    assert status['completed_stages'] == ['L2', 'L3']
+
+
+def test_approval_behind_a_manually_advanced_pipeline_is_not_dispatched(pipeline):
+    state, queue, coalescer, worker, calls, _ = pipeline
+    state.claim_stage('demo', 'L3')
+    state.complete_stage('demo', 'L3', awaiting_approval=True)
+
+    assert approve(state, coalescer, 'L2', 'L3') == 'ignored'
+    assert queue.size() == 0
+    status = state.status('demo')
+    assert (status['completed_stages'], status['current_stage'], status['pending_dispatch']) == (['L2', 'L3'], 'L4', None)
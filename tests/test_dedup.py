@@ -0,0 +1,47 @@
+import time
+
+from shared.dedup import DedupCache, SQLiteDedupStore
+
+
+def test_second_delivery_with_any_shared_key_is_duplicate():
+    cache = DedupCache()
+    assert cache.check_and_mark(['delivery:1', 'issue:a:Done:t1']) is False
+    assert cache.check_and_mark(['delivery:2', 'issue:a:Done:t1']) is True
+    assert cache.check_and_mark(['delivery:3']) is False
+    assert cache.stats()['hits'] == 1
+
+
+def test_forget_lets_the_retry_through():
+    cache = DedupCache()
+    cache.check_and_mark(['delivery:1'])
+    cache.forget(['delivery:1'])
+    assert cache.check_and_mark(['delivery:1']) is False
+
+
+def test_keys_expire_after_ttl():
+    cache = DedupCache(ttl_seconds=0.05)
+    cache.check_and_mark(['delivery:1'])
+    time.sleep(0.1)
+    assert cache.check_and_mark(['delivery:1']) is False
+
+
+def test_least_recently_used_keys_are_evicted():
+    cache = DedupCache(max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.check_and_mark([key])
+    assert cache.stats()['evictions'] == 1
+    assert cache.check_and_mark(['a']) is False
+    assert cache.check_and_mark(['c']) is True
+
+
+def test_persistent_store_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite3')
+    first = DedupCache(store=SQLiteDedupStore(path))
+    second = DedupCache(store=SQLiteDedupStore(path))
+
+    assert first.check_and_mark(['delivery:1']) is False
+    assert second.check_and_mark(['delivery:1']) is True
+    assert second.stats()['persistent_hits'] == 1
+
+    first.forget(['delivery:1'])
+    assert DedupCache(store=SQLiteDedupStore(path)).check_and_mark(['delivery:1']) is False
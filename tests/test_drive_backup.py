@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from shared import drive_backup
+from shared.drive import DriveClient
+from shared.drive_backup import DriveBackup
+from shared.gcs import CHUNK_ALIGNMENT, GCSClient
+
+BUCKET = 'adc-backups'
+PREFIX = 'backups/demo'
+BIG = bytes(range(256)) * (CHUNK_ALIGNMENT * 2 // 256 + 100)
+
+
+@pytest.fixture
+def drive_tree(upstreams, monkeypatch):
+    state, base_url = upstreams
+
+    # backup_id tem resolução de segundos: cada execução do teste ganha um segundo novo
+    class Clock(datetime):
+        tick = 0
+
+        @classmethod
+        def utcnow(cls):
+            cls.tick += 1
+            return datetime(2026, 1, 1) + timedelta(seconds=cls.tick)
+
+    monkeypatch.setattr(drive_backup, 'datetime', Clock)
+
+    root = state.add_drive_folder('Projeto', 'drive-root')
+    sub = state.add_drive_folder('Dados', root)
+    ids = {
+        'notes': state.add_drive_file('notes.txt', root, b'v1')['id'],
+        'doc': state.add_drive_file('Spec', root, b'# spec', mime_type='application/vnd.google-apps.document')['id'],
+        'form': state.add_drive_file('Survey', root, mime_type='application/vnd.google-apps.form')['id'],
+        'big': state.add_drive_file('big.bin', sub, BIG)['id'],
+    }
+    drive = DriveClient(lambda: 'token', url=f"{base_url}/drive/v3", batch_url=f"{base_url}/batch/drive/v3",
+                        upload_url=f"{base_url}/upload/drive/v3")
+    engine = DriveBackup(drive, GCSClient(lambda: 'token', url=base_url), BUCKET, PREFIX,
+                         chunk_size=CHUNK_ALIGNMENT, concurrency=2)
+    return state, engine, root, ids
+
+
+def objects(state, prefix):
+    return {name[len(prefix):]: stored['data'] for (bucket, name), stored in state.gcs_objects.items()
+            if bucket == BUCKET and name.startswith(prefix)}
+
+
+def test_first_backup_streams_every_file_into_its_snapshot(drive_tree):
+    state, engine, root, ids = drive_tree
+    result = engine.run(root)
+
+    assert result['status'] == 'backup_created'
+    assert (result['files_uploaded'], result['files_skipped'], result['files_unchanged']) == (3, 1, 0)
+    assert result['bytes_uploaded'] == len(BIG) + len(b'v1') + len(b'# spec')
+
+    files = objects(state, f"{PREFIX}/{result['backup_id']}/files/")
+    assert set(files) == {'notes.txt', 'Spec.docx', 'Dados/big.bin'}
+    assert files['Dados/big.bin'] == BIG
+
+    latest = state.gcs_objects[(BUCKET, f"{PREFIX}/manifest.json")]['data']
+    assert state.gcs_objects[(BUCKET, result['manifest'])]['data'] == latest
+    assert set(json.loads(latest)['files']) == {ids['notes'], ids['doc'], ids['big']}
+
+
+def test_incremental_copies_unchanged_files_and_drops_deleted_ones(drive_tree):
+    state, engine, root, ids = drive_tree
+    first = engine.run(root)
+
+    state.update_drive_file(ids['notes'], b'v2')
+    with state.lock:
+        state.drive_files.pop(ids['big'])
+    second = engine.run(root)
+
+    assert (second['files_uploaded'], second['files_unchanged'], second['files_removed']) == (1, 1, 1)
+    assert second['bytes_uploaded'] == len(b'v2')
+    assert objects(state, f"{PREFIX}/{second['backup_id']}/files/") == {'notes.txt': b'v2', 'Spec.docx': b'# spec'}
+    # O snapshot anterior continua íntegro para restauração pontual
+    assert objects(state, f"{PREFIX}/{first['backup_id']}/files/")['notes.txt'] == b'v1'
+
+    manifest = json.loads(state.gcs_objects[(BUCKET, f"{PREFIX}/manifest.json")]['data'])
+    assert manifest['last_backup']['backup_id'] == second['backup_id']
+    assert ids['big'] not in manifest['files']
+
+
+def test_full_backup_uploads_everything_again(drive_tree):
+    state, engine, root, ids = drive_tree
+    engine.run(root)
+    result = engine.run(root, backup_type='full')
+
+    assert (result['files_uploaded'], result['files_unchanged']) == (3, 0)
+
+
+def test_unknown_backup_type_is_rejected(drive_tree):
+    _, engine, root, _ = drive_tree
+    with pytest.raises(ValueError):
+        engine.run(root, backup_type='differential')
@@ -0,0 +1,73 @@
+import pytest
+
+from shared.drive import DriveClient
+from shared.drive_organizer import RuleIndex, organize_folder
+
+RULES = {'regex': {r'report-\d+': 'Reports'}, 'extension': {'tar.gz': 'Archives'}, 'mime_type': {'text/csv': 'Tabelas'}}
+
+
+@pytest.fixture
+def project(upstreams):
+    state, base_url = upstreams
+    root = state.add_drive_folder('Projeto', 'drive-root')
+    assets = state.add_drive_folder('Assets', root)
+    names = ['L3: Design.md', 'logo.png', 'report-2025.pdf', 'dump.tar.gz', 'notes.xyz']
+    ids = {name: state.add_drive_file(name, root, b'x')['id'] for name in names}
+    drive = DriveClient(lambda: 'token', url=f"{base_url}/drive/v3", batch_url=f"{base_url}/batch/drive/v3",
+                        upload_url=f"{base_url}/upload/drive/v3")
+    return state, drive, root, assets, ids
+
+
+def folder_path(state, file_id, root):
+    parts = []
+    current = state.drive_files[file_id]['parents'][0]
+    while current != root:
+        meta = state.drive_files[current]
+        parts.append(meta['name'])
+        current = meta['parents'][0]
+    return '/'.join(reversed(parts))
+
+
+def test_rule_precedence_is_regex_stage_extension_mime():
+    index = RuleIndex({'regex': {'^L2': 'Custom'}, 'mime_type': {'text/csv': 'Tabelas'}})
+
+    assert index.match({'name': 'L2: Arquitetura.md'}) == 'Custom'
+    assert index.match({'name': 'L5 - Tela.png'}) == 'L4-L6_Development/L5-Frontend'
+    assert index.match({'name': 'foto.JPG'}) == 'Assets/Images'
+    assert index.match({'name': 'dados', 'mimeType': 'text/csv'}) == 'Tabelas'
+    assert index.match({'name': 'leia-me'}) is None
+
+
+def test_compound_extensions_win_over_simple_ones():
+    index = RuleIndex({'extension': {'.tar.gz': 'Archives', 'gz': 'Compressed'}}, use_defaults=False)
+    assert index.match({'name': 'dump.tar.gz'}) == 'Archives'
+    assert index.match({'name': 'log.gz'}) == 'Compressed'
+
+
+def test_organize_moves_files_in_batches_and_reuses_existing_folders(project):
+    state, drive, root, assets, ids = project
+    result = organize_folder(drive, root, RULES)
+
+    assert result['status'] == 'organized'
+    assert (result['files_scanned'], result['files_processed'], result['files_unmatched']) == (5, 4, 1)
+    assert result['batches'] == 1
+    assert folder_path(state, ids['L3: Design.md'], root) == 'L1-L3_Planning/L3-Design'
+    assert folder_path(state, ids['logo.png'], root) == 'Assets/Images'
+    assert folder_path(state, ids['report-2025.pdf'], root) == 'Reports'
+    assert folder_path(state, ids['dump.tar.gz'], root) == 'Archives'
+    assert state.drive_files[ids['notes.xyz']]['parents'] == [root]
+    # Assets já existia: só Images é criada embaixo dela
+    assert state.drive_files[state.drive_files[ids['logo.png']]['parents'][0]]['parents'] == [assets]
+    assert result['folders_created'] == 5
+
+
+def test_dry_run_counts_matches_without_touching_drive(project):
+    state, drive, root, _, ids = project
+    folders_before = len(state.drive_files)
+    result = organize_folder(drive, root, RULES, dry_run=True)
+
+    assert result['status'] == 'dry_run'
+    assert (result['files_matched'], result['files_processed'], result['folders_created']) == (4, 0, 0)
+    assert result['moves_by_target']['Assets/Images'] == 1
+    assert len(state.drive_files) == folders_before
+    assert all(state.drive_files[file_id]['parents'] == [root] for file_id in ids.values())
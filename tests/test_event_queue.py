@@ -0,0 +1,137 @@
+import time
+import threading
+
+import pytest
+
+from shared.event_queue import EventQueueWorker, FirestoreEventQueue, SQLiteEventQueue, create_event_queue
+from shared.firestore import FirestoreClient
+
+
+class Deferred(Exception):
+    def __init__(self, requeue_after):
+        super().__init__('upstream unavailable')
+        self.requeue_after = requeue_after
+
+
+class Permanent(Exception):
+    dead_letter = True
+
+
+@pytest.fixture(params=['sqlite', 'firestore'])
+def queue(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteEventQueue(str(tmp_path / 'queue.sqlite3'))
+    _, base_url = request.getfixturevalue('upstreams')
+    return FirestoreEventQueue(FirestoreClient('demo', token_provider=lambda: 'token', url=f"{base_url}/v1"), 'events')
+
+
+def test_claim_hides_events_until_ack(queue):
+    first = queue.put({'type': 'Issue', 'n': 1})
+    queue.put({'type': 'Issue', 'n': 2})
+
+    batch = queue.claim(batch_size=1, lease_seconds=60)
+    assert [(event_id, payload['n'], attempts) for event_id, payload, attempts in batch] == [(first, 1, 1)]
+    assert [payload['n'] for _, payload, _ in queue.claim(10, 60)] == [2]
+    assert queue.claim(10, 60) == []
+
+    queue.ack([first])
+    assert queue.size() == 1
+
+
+def test_expired_lease_makes_event_visible_again(queue):
+    queue.put({'type': 'Issue'})
+    assert len(queue.claim(1, lease_seconds=0.05)) == 1
+    assert queue.claim(1, 60) == []
+
+    time.sleep(0.1)
+    (_, _, attempts), = queue.claim(1, 60)
+    assert attempts == 2
+
+
+def test_delayed_put_is_not_claimable_before_due(queue):
+    queue.put({'type': 'CoalescedDispatch'}, delay_seconds=0.1)
+    assert queue.claim(1, 60) == []
+    time.sleep(0.15)
+    assert len(queue.claim(1, 60)) == 1
+
+
+def test_worker_retries_with_backoff_then_dead_letters(queue):
+    event_id = queue.put({'type': 'Issue'})
+    worker = EventQueueWorker(queue, lambda payload: 1 / 0, max_attempts=2)
+
+    assert worker.process_batch()['failed'] == 1
+    # Backoff de 2s após a primeira tentativa
+    assert queue.claim(1, 60) == []
+
+    queue.nack(event_id, 0)
+    assert worker.process_batch()['dead'] == 1
+    assert queue.size() == 0
+    assert queue.dead_letters() == [{'type': 'Issue'}]
+
+
+def test_worker_requeues_deferred_events_without_counting_attempts(queue):
+    queue.put({'type': 'Issue'})
+
+    def process(payload):
+        raise Deferred(0)
+
+    worker = EventQueueWorker(queue, process, max_attempts=1)
+
+    for _ in range(3):
+        assert worker.process_batch()['deferred'] == 1
+    (_, _, attempts), = queue.claim(1, 60)
+    assert attempts == 1
+
+
+def test_worker_dead_letters_permanent_failures_immediately(queue):
+    queue.put({'type': 'Issue'})
+
+    def process(payload):
+        raise Permanent('rejected')
+
+    stats = EventQueueWorker(queue, process, max_attempts=5).process_batch()
+    assert stats['dead'] == 1
+    assert queue.dead_letters() == [{'type': 'Issue'}]
+
+
+def test_drain_processes_every_batch(queue):
+    for n in range(7):
+        queue.put({'n': n})
+    seen = []
+    stats = EventQueueWorker(queue, lambda payload: seen.append(payload['n']), batch_size=3).drain()
+
+    assert seen == list(range(7))
+    assert (stats['batches'], stats['processed']) == (3, 7)
+    assert queue.size() == 0
+
+
+def test_create_event_queue_from_url(tmp_path):
+    assert isinstance(create_event_queue('sqlite://'), SQLiteEventQueue)
+    assert create_event_queue(f"sqlite://{tmp_path}/q.sqlite3").path == f"{tmp_path}/q.sqlite3"
+    firestore = create_event_queue('firestore://adc-demo/adc_event_queue')
+    assert isinstance(firestore, FirestoreEventQueue) and firestore.collection == 'adc_event_queue'
+    assert firestore.client.root == 'projects/adc-demo/databases/(default)/documents'
+    with pytest.raises(ValueError):
+        create_event_queue('firestore://adc-demo')
+    with pytest.raises(ValueError):
+        create_event_queue('redis://localhost')
+
+
+def test_concurrent_claims_never_lease_an_event_twice(queue):
+    for n in range(20):
+        queue.put({'n': n})
+    seen = []
+
+    def claim():
+        while True:
+            batch = queue.claim(3, 60)
+            if not batch:
+                return
+            seen.extend(payload['n'] for _, payload, _ in batch)
+
+    threads = [threading.Thread(target=claim) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seen) == list(range(20))
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from shared.event_router import EventRouter
+
+
+@pytest.fixture
+def router():
+    router = EventRouter()
+    router.route('Issue', 'update')(lambda data: ({'handled': 'issue_update'}, 200))
+    router.route('IssueLabel')(lambda data: ({'handled': 'label'}, 200))
+    return router
+
+
+def body(**event):
+    return json.dumps(event).encode()
+
+
+@pytest.mark.parametrize('raw', [
+    body(type='Reaction', action='create'),
+    body(type='Issue', action='remove'),
+    body(type='Project', action='update', data={'state': {'type': 'started'}}),
+])
+def test_events_without_route_are_rejected_early(router, raw):
+    assert router.is_unhandled(raw)
+    assert router.stats['rejected_early'] == 1
+
+
+@pytest.mark.parametrize('raw', [
+    body(type='Issue', action='update'),
+    body(type='IssueLabel', action='create'),
+    # Tipo aninhado (state.type) não mascara o tipo do evento
+    body(action='update', data={'state': {'type': 'started'}, 'title': 'L2'}, type='Issue'),
+    b'{"type" : "Issue",\n "action":"update"}',
+    # Sem "type" legível ou com escapes: o parse completo decide
+    body(action='update'),
+    b'{"type": "Iss\\u0075e", "action": "update", "data": {"state": {"type": "started"}}}',
+    b'not json',
+])
+def test_routable_or_unreadable_events_go_to_the_full_parse(router, raw):
+    assert not router.is_unhandled(raw)
+    assert router.stats['rejected_early'] == 0
+
+
+def test_prefilter_agrees_with_dispatch(router):
+    default = lambda data: ({'status': 'ignored'}, 200)  # noqa: E731
+    events = [
+        {'type': 'Issue', 'action': 'update'},
+        {'type': 'Issue', 'action': 'create'},
+        {'type': 'IssueLabel', 'action': 'remove'},
+        {'type': 'Comment', 'action': 'create'},
+    ]
+    for event in events:
+        routed = router.dispatch(event, default)[0] != {'status': 'ignored'}
+        assert router.is_unhandled(body(**event)) is not routed
+
+
+def test_specific_action_wins_over_wildcard(router):
+    router.route('Issue')(lambda data: ({'handled': 'issue_any'}, 200))
+
+    assert router.dispatch({'type': 'Issue', 'action': 'update'}, None)[0] == {'handled': 'issue_update'}
+    assert router.dispatch({'type': 'Issue', 'action': 'create'}, None)[0] == {'handled': 'issue_any'}
+    assert router.stats['routed'] == 2
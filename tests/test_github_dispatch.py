@@ -0,0 +1,167 @@
+from http.client import RemoteDisconnected
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from shared import github_dispatch, http_client
+from shared.circuit_breaker import CircuitOpenError
+from shared.github_dispatch import DispatchScheduler
+
+REPO = 'owner/llm-app-demo'
+WORKFLOW = 'llm-pipeline-auto.yml'
+INPUTS = {'stage': 'L3', 'project_name': 'demo', 'auto_triggered': 'true'}
+
+
+@pytest.fixture
+def github(upstreams, monkeypatch):
+    state, base_url = upstreams
+    monkeypatch.setattr(github_dispatch, 'GITHUB_API_URL', base_url)
+    return state
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """
+    Backoff sem espera real; registra as tentativas que pediram backoff
+    """
+    attempts = []
+
+    def backoff(attempt, base=1.0, cap=30.0):
+        attempts.append(attempt)
+        return 0.01
+
+    monkeypatch.setattr(github_dispatch, '_jittered_backoff', backoff)
+    return attempts
+
+
+def fail_first(state, *statuses):
+    remaining = list(statuses)
+    state.inject = lambda: remaining.pop(0) if remaining else None
+
+
+def test_dispatch_posts_inputs(github):
+    scheduler = DispatchScheduler()
+    result = scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert (result.ok, result.status_code, result.attempts) == (True, 204, 1)
+    assert github.dispatches == [{'repo': REPO, 'workflow': WORKFLOW, 'body': {'ref': 'main', 'inputs': INPUTS}}]
+    assert scheduler.snapshot()['dispatched'] == 1
+
+
+def test_transient_errors_are_retried_with_backoff(github, backoffs):
+    fail_first(github, 503, 502)
+    scheduler = DispatchScheduler()
+    result = scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert result.ok and result.attempts == 3
+    assert backoffs == [1, 2]
+    assert scheduler.snapshot()['retries'] == 2
+    assert len(github.dispatches) == 1
+
+
+def test_client_errors_fail_without_retry(github, backoffs):
+    fail_first(github, 404)
+    result = DispatchScheduler().dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert (result.ok, result.retryable, result.status_code, result.attempts) == (False, False, 404, 1)
+    assert backoffs == []
+
+
+def test_backoff_past_the_deadline_defers_the_dispatch(github, monkeypatch):
+    fail_first(github, 503, 503, 503)
+    monkeypatch.setattr(github_dispatch, '_jittered_backoff', lambda attempt, base=1.0, cap=30.0: 5.0)
+    result = DispatchScheduler().dispatch(REPO, WORKFLOW, INPUTS, 'token', max_wait=1.0)
+
+    assert (result.ok, result.retryable, result.status_code, result.attempts) == (False, True, 503, 1)
+    assert result.retry_after == 5.0
+    assert github.dispatches == []
+
+
+def test_rate_limit_wait_past_the_deadline_refunds_the_tokens(github):
+    scheduler = DispatchScheduler(rate=0.01, burst=1)
+    assert scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token').ok
+
+    result = scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token', max_wait=0.5)
+    assert (result.ok, result.retryable, result.attempts) == (False, True, 0)
+    assert result.retry_after > 0.5
+    token_bucket, repo_bucket = scheduler._buckets_for(scheduler._credentials_for('token')[0], REPO)
+    assert token_bucket.tokens == pytest.approx(0, abs=0.01)
+    assert repo_bucket.tokens == pytest.approx(0, abs=0.01)
+
+
+def test_open_circuit_defers_without_sending(github, monkeypatch):
+    def post(url, **kwargs):
+        raise CircuitOpenError('github', 12.0)
+
+    monkeypatch.setattr(github_dispatch.http_client, 'post', post)
+    scheduler = DispatchScheduler(burst=1)
+    result = scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert (result.ok, result.retryable, result.circuit_open) == (False, True, True)
+    assert result.retry_after == 12.0
+    assert scheduler.snapshot()['circuit_open'] == 1
+    token_bucket, _ = scheduler._buckets_for(scheduler._credentials_for('token')[0], REPO)
+    assert token_bucket.tokens == pytest.approx(1, abs=0.01)
+
+
+def test_workflow_without_new_inputs_gets_the_legacy_ones(github):
+    github.declare_workflow_inputs(REPO, WORKFLOW, ['stage', 'project_name', 'auto_triggered'])
+    scheduler = DispatchScheduler()
+    inputs = dict(INPUTS, triggered_by='automation_core', dispatch_id='abc123')
+
+    first = scheduler.dispatch(REPO, WORKFLOW, inputs, 'token')
+    second = scheduler.dispatch(REPO, WORKFLOW, inputs, 'token')
+
+    assert (first.ok, first.attempts, second.ok, second.attempts) == (True, 2, True, 1)
+    assert [d['body']['inputs'] for d in github.dispatches] == [INPUTS, INPUTS]
+    assert scheduler.snapshot()['legacy_inputs'] == 1
+
+
+def test_workflow_with_new_inputs_receives_them_all(github):
+    github.declare_workflow_inputs(REPO, WORKFLOW, [*INPUTS, 'dispatch_id'])
+    inputs = dict(INPUTS, dispatch_id='abc123')
+
+    assert DispatchScheduler().dispatch(REPO, WORKFLOW, inputs, 'token').attempts == 1
+    assert github.dispatches[0]['body']['inputs'] == inputs
+
+
+def raising_post(*errors):
+    remaining = list(errors)
+    calls = []
+    send = http_client.post
+
+    def post(url, **kwargs):
+        calls.append(url)
+        if remaining:
+            raise remaining.pop(0)
+        return send(url, **kwargs)
+
+    return post, calls
+
+
+def test_connect_errors_are_retried(github, backoffs, monkeypatch):
+    refused = requests.exceptions.ConnectionError(
+        MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused')))
+    post, calls = raising_post(requests.exceptions.ConnectTimeout('connect timeout'), refused)
+    monkeypatch.setattr(github_dispatch.http_client, 'post', post)
+    result = DispatchScheduler().dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert (result.ok, result.attempts) == (True, 3)
+    assert backoffs == [1, 2]
+    assert len(github.dispatches) == 1
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ReadTimeout('read timeout'),
+    requests.exceptions.ConnectionError(ProtocolError('Connection aborted.', RemoteDisconnected()))
+])
+def test_errors_after_sending_are_ambiguous_and_not_retried(github, backoffs, monkeypatch, error):
+    post, calls = raising_post(error)
+    monkeypatch.setattr(github_dispatch.http_client, 'post', post)
+    scheduler = DispatchScheduler()
+    result = scheduler.dispatch(REPO, WORKFLOW, INPUTS, 'token')
+
+    assert (result.ok, result.retryable, result.ambiguous, result.attempts) == (False, False, True, 1)
+    assert len(calls) == 1 and backoffs == []
+    assert scheduler.snapshot()['ambiguous'] == 1
@@ -0,0 +1,77 @@
+import pytest
+
+from shared import http_client
+from shared.http_client import HostPolicy
+
+
+@pytest.fixture
+def fake(upstreams, monkeypatch):
+    """
+    Upstream simulado com política própria (sem backoff) e sessões novas
+    """
+    state, base_url = upstreams
+    monkeypatch.setitem(http_client.HOST_POLICIES, '127.0.0.1', HostPolicy(retries=2, backoff_factor=0))
+    http_client.close_all()
+    yield state, base_url
+    http_client.close_all()
+
+
+def fail_first(state, *statuses):
+    remaining = list(statuses)
+    state.inject = lambda: remaining.pop(0) if remaining else None
+
+
+def calls(state, request_line):
+    return sum(1 for line in state.request_log if line == request_line)
+
+
+def test_get_is_retried_on_gateway_errors(fake):
+    state, base_url = fake
+    fail_first(state, 503, 502)
+    response = http_client.get(f"{base_url}/repos/owner/repo/issues")
+
+    assert response.status_code == 200
+    assert calls(state, 'GET /repos/owner/repo/issues') == 3
+
+
+def test_get_returns_the_last_error_when_retries_run_out(fake):
+    state, base_url = fake
+    fail_first(state, 503, 503, 503, 503)
+    response = http_client.get(f"{base_url}/repos/owner/repo/issues")
+
+    assert response.status_code == 503
+    assert calls(state, 'GET /repos/owner/repo/issues') == 3
+
+
+def test_post_is_not_retried_on_status_errors(fake):
+    state, base_url = fake
+    fail_first(state, 503)
+    response = http_client.post(f"{base_url}/graphql", json={'query': '{ viewer { id } }'})
+
+    assert response.status_code == 503
+    assert calls(state, 'POST /graphql') == 1
+
+
+def test_statuses_outside_the_policy_are_not_retried(fake):
+    state, base_url = fake
+    fail_first(state, 500)
+    response = http_client.get(f"{base_url}/repos/owner/repo/issues")
+
+    assert response.status_code == 500
+    assert calls(state, 'GET /repos/owner/repo/issues') == 1
+
+
+def test_connect_retries_cover_post_but_status_retries_do_not():
+    retry = HostPolicy(retries=2).build_retry()
+
+    assert retry.connect == 2
+    assert not retry.is_retry('POST', 503)
+    assert retry.is_retry('GET', 503)
+
+
+def test_policy_and_session_per_host():
+    assert http_client.get_policy('api.github.com').timeout == (3.05, 10.0)
+    assert http_client.get_policy('unknown.example.com') is http_client.DEFAULT_POLICY
+    assert not http_client.get_policy('hooks.slack.com').circuit_breaker
+    assert http_client.get_session('api.github.com') is http_client.get_session('api.github.com')
+    assert http_client.get_session('api.github.com') is not http_client.get_session('api.linear.app')
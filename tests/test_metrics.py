@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+from shared.metrics import (PROMETHEUS_CONTENT_TYPE, REGISTRY, REQUEST_METRIC, SPAN_METRIC, Histogram, Registry,
+                            prometheus_response, span)
+from shared.request_log import current, log_request
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.snapshot() == ([2, 1, 1, 1], 5, pytest.approx(5.565))
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float('inf')
+    assert Histogram().quantile(0.5) is None
+
+
+def test_exposition_format():
+    registry = Registry()
+    histogram = registry.histogram('adc_test_seconds', 'Teste', span='parse "raw"')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    registry.add_collector(lambda: [('adc_test_total', 'counter', 'Contador', [({'upstream': 'github'}, 3)])])
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ['# HELP adc_test_seconds Teste', '# TYPE adc_test_seconds histogram']
+    buckets = [line for line in lines if line.startswith('adc_test_seconds_bucket')]
+    assert len(buckets) == len(histogram.buckets) + 1
+    assert 'adc_test_seconds_bucket{span="parse \\"raw\\"",le="0.05"} 1' in buckets
+    assert 'adc_test_seconds_bucket{span="parse \\"raw\\"",le="0.5"} 2' in buckets
+    assert buckets[-1] == 'adc_test_seconds_bucket{span="parse \\"raw\\"",le="+Inf"} 2'
+    assert lines[-5:] == [
+        'adc_test_seconds_sum{span="parse \\"raw\\""} 0.550000',
+        'adc_test_seconds_count{span="parse \\"raw\\""} 2',
+        '# HELP adc_test_total Contador',
+        '# TYPE adc_test_total counter',
+        'adc_test_total{upstream="github"} 3',
+    ]
+
+
+def test_summary_reports_milliseconds_per_series():
+    registry = Registry()
+    registry.histogram('adc_test_seconds', span='parse').observe(0.004)
+    registry.histogram('adc_test_seconds', span='idle')
+
+    assert registry.summary() == {
+        'adc_test_seconds{parse}': {'count': 1, 'avg_ms': 4.0, 'p50_ms': 5.0, 'p95_ms': 5.0}
+    }
+
+
+def test_span_feeds_the_histogram_and_the_request_line():
+    @span('test_decorated')
+    def decorated():
+        with span('test_block'):
+            return 'done'
+
+    @log_request('automation_core')
+    def handler(request):
+        assert decorated() == 'done'
+        return current().fields['timings_ms'], 200
+
+    timings, _ = handler(SimpleNamespace(method='POST', path='/'))
+    assert set(timings) == {'test_decorated', 'test_block'}
+    assert REGISTRY.histogram(SPAN_METRIC, span='test_decorated').count >= 1
+
+
+def test_requests_are_observed_by_status_class():
+    log_request('metrics_test')(lambda request: ('', 503))(SimpleNamespace(method='GET', path='/'))
+
+    assert REGISTRY.histogram(REQUEST_METRIC, function='metrics_test', status='5xx').count == 1
+    body, status, headers = prometheus_response()
+    assert status == 200 and headers['Content-Type'] == PROMETHEUS_CONTENT_TYPE
+    assert 'adc_request_duration_seconds_count{function="metrics_test",status="5xx"} 1' in body
+    assert '# TYPE adc_circuit_state gauge' in body
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from shared.notifications import NotificationDispatcher, SlackSink, StubSink, flush_after
+
+
+@pytest.fixture
+def stub():
+    sink = StubSink()
+    return sink, NotificationDispatcher([sink], window_seconds=5.0)
+
+
+def test_notifications_inside_the_window_go_out_as_one_batch(stub):
+    sink, dispatcher = stub
+    dispatcher.notify('L2 aprovado', 'ok', project='demo')
+    dispatcher.notify('L3 aprovado', 'ok', project='demo')
+
+    assert dispatcher.flush(2.0)
+    assert [[n['title'] for n in batch] for batch in sink.batches] == [['L2 aprovado', 'L3 aprovado']]
+    assert (dispatcher.stats['sent'], dispatcher.stats['batches'], dispatcher.pending) == (2, 1, 0)
+
+
+def test_flush_closes_the_window_instead_of_waiting_for_it(stub):
+    sink, dispatcher = stub
+    dispatcher.notify('L2 aprovado', 'ok')
+    started = time.monotonic()
+
+    assert dispatcher.flush(2.0)
+    assert time.monotonic() - started < 1.0
+    assert len(sink.batches) == 1
+
+
+def test_errors_skip_the_window():
+    sink = StubSink()
+    dispatcher = NotificationDispatcher([sink], window_seconds=5.0)
+    dispatcher.notify('Falhou', 'boom', level='error')
+
+    deadline = time.monotonic() + 1.0
+    while not sink.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [n['title'] for n in sink.batches[0]] == ['Falhou']
+
+
+def test_handler_returns_only_after_queued_notifications_are_sent(stub):
+    sink, dispatcher = stub
+
+    @flush_after(lambda: dispatcher, timeout=2.0)
+    def handler():
+        dispatcher.notify('L2 aprovado', 'ok')
+        return 'done'
+
+    assert handler() == 'done'
+    assert dispatcher.pending == 0 and len(sink.batches) == 1
+
+
+def test_slack_batches_become_a_single_message():
+    text = SlackSink.format_batch([
+        {'title': 'L2', 'message': 'ok', 'level': 'success'},
+        {'title': 'L3', 'message': 'falhou', 'level': 'error'}
+    ])
+    assert text.splitlines() == ['*2 atualizações do pipeline*', '✅ *L2* — ok', '❌ *L3* — falhou']
@@ -0,0 +1,54 @@
+import pytest
+
+from shared.firestore import FirestoreClient
+from shared.pipeline_state import (
+    FirestorePipelineStateBackend, PipelineStateStore, SQLitePipelineStateBackend, create_pipeline_state_store
+)
+
+
+@pytest.fixture(params=['sqlite', 'firestore'])
+def instances(request, tmp_path):
+    """
+    Duas instâncias (stores com caches próprios) sobre o mesmo backend
+    """
+    if request.param == 'sqlite':
+        def backend():
+            return SQLitePipelineStateBackend(str(tmp_path / 'state.sqlite3'))
+    else:
+        _, base_url = request.getfixturevalue('upstreams')
+
+        def backend():
+            client = FirestoreClient('demo', token_provider=lambda: 'token', url=f"{base_url}/v1")
+            return FirestorePipelineStateBackend(client, 'pipeline')
+    return PipelineStateStore(backend()), PipelineStateStore(backend())
+
+
+def test_claim_excludes_deliveries_on_other_instances(instances):
+    first, second = instances
+    token, _ = first.claim_stage('demo', 'L2')
+    assert token is not None
+
+    assert second.claim_stage('demo', 'L2')[0] is None
+    assert first.release_stage('demo', 'L2', token)
+    assert second.claim_stage('demo', 'L2')[0] is not None
+
+
+def test_stale_cache_is_resolved_by_compare_and_set(instances):
+    first, second = instances
+    first.get('demo')
+    second.claim_stage('demo', 'L2')
+    second.complete_stage('demo', 'L2')
+
+    # O cache de `first` ainda não viu L2: o compare-and-set falha e a transição é reavaliada
+    changed, _ = first.complete_stage('demo', 'L2')
+    assert not changed
+    assert first.status('demo')['version'] == second.status('demo')['version'] == 2
+
+
+def test_create_pipeline_state_store_from_url(tmp_path):
+    assert isinstance(create_pipeline_state_store('sqlite://').backend, SQLitePipelineStateBackend)
+    store = create_pipeline_state_store('firestore://adc-demo/adc-pipeline-state')
+    assert isinstance(store.backend, FirestorePipelineStateBackend)
+    assert store.backend.collection == 'adc-pipeline-state'
+    with pytest.raises(ValueError):
+        create_pipeline_state_store('redis://localhost')
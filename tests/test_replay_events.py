@@ -0,0 +1,108 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from shared.event_router import EventRouter
+from shared.firestore import FirestoreClient
+from shared.pipeline_state import FirestorePipelineStateBackend, PipelineStateStore, SQLitePipelineStateBackend
+
+import replay_events
+
+
+def test_local_state_store_is_reported(tmp_path, monkeypatch):
+    monkeypatch.delenv('PIPELINE_STATE_URL', raising=False)
+    store = PipelineStateStore(SQLitePipelineStateBackend(str(tmp_path / 'state.sqlite3')))
+    assert replay_events.local_state_store(SimpleNamespace(get_pipeline_state=lambda: store)) == 'default local SQLite'
+
+
+def test_shared_state_store_is_accepted():
+    client = FirestoreClient('demo', token_provider=lambda: 'token', url='http://127.0.0.1:1/v1')
+    store = PipelineStateStore(FirestorePipelineStateBackend(client, 'pipeline'))
+    assert replay_events.local_state_store(SimpleNamespace(get_pipeline_state=lambda: store)) is None
+
+
+class DispatchDeferred(Exception):
+    pass
+
+
+def fake_webhook(process_event):
+    """
+    Só o que o Replayer usa do webhook_handler
+    """
+    router = EventRouter()
+    router.route('Issue', 'update')(lambda data: ({}, 200))
+
+    def dedup_keys(data):
+        issue = data.get('data') or {}
+        return [f"issue:{issue.get('id')}:{issue.get('updatedAt')}"]
+
+    return SimpleNamespace(
+        EVENTS=router, DispatchDeferred=DispatchDeferred, process_event=process_event,
+        json_loads=json.loads, get_dedup_keys=dedup_keys,
+        get_project_registry=lambda: SimpleNamespace(resolve=lambda *ids: SimpleNamespace(name='demo'))
+    )
+
+
+def replayer(process_event, **options):
+    settings = dict(workers=2, queue_size=4, dry_run=False, all_events=False, dedup_window=100, failed_output=None)
+    settings.update(options)
+    return replay_events.Replayer(fake_webhook(process_event), **settings)
+
+
+def raises(error):
+    def process_event(data):
+        raise error
+    return process_event
+
+
+@pytest.mark.parametrize('process_event, outcome', [
+    (lambda data: ({'status': 'auto_proceeded', 'automation_triggered': True}, 200), 'replayed'),
+    (lambda data: ({'status': 'awaiting_approval'}, 200), 'replayed'),
+    (lambda data: ({'status': 'pipeline_completed'}, 200), 'replayed'),
+    (lambda data: ({'status': 'ignored', 'reason': 'stage_already_completed'}, 200), 'already_applied'),
+    (lambda data: ({'status': 'ignored', 'reason': 'not_a_stage_issue'}, 200), 'ignored'),
+    # Estágio concluído mas o GitHub recusou o dispatch: ação manual
+    (lambda data: ({'status': 'auto_proceeded', 'automation_triggered': False}, 200), 'failed'),
+    (lambda data: ({'error': 'boom'}, 500), 'failed'),
+    (raises(DispatchDeferred('github down')), 'deferred'),
+    (raises(RuntimeError('bug')), 'failed'),
+])
+def test_replay_outcome_classification(process_event, outcome):
+    assert replayer(process_event).replay({'type': 'Issue', 'action': 'update'}) == outcome
+
+
+def test_dry_run_does_not_process():
+    assert replayer(raises(AssertionError('processed')), dry_run=True).replay({}) == 'replayed'
+
+
+def line(**event):
+    return json.dumps(event).encode()
+
+
+def test_feed_counts_and_writes_failed_lines(tmp_path):
+    def process_event(data):
+        if data['data']['id'] == 'deferred':
+            raise DispatchDeferred('github down')
+        return {'status': 'awaiting_approval'}, 200
+
+    failed_output = tmp_path / 'retry.jsonl'
+    deferred = line(type='Issue', action='update', data={'id': 'deferred', 'updatedAt': '1'})
+    applied = line(type='Issue', action='update', data={'id': 'ok', 'updatedAt': '1'})
+    lines = [applied, applied, deferred, line(type='Reaction', action='create'),
+             line(type='Issue', action='create', data={'id': 'new'}), b'{not json', b'[1, 2]']
+    replay = replayer(process_event, failed_output=str(failed_output))
+    replay.feed((('archive.jsonl', n, raw) for n, raw in enumerate(lines, 1)), replay_events.Pacer(0))
+
+    report = replay.report()
+    assert {key: report[key] for key in ('read', 'replayed', 'duplicate', 'deferred', 'filtered', 'invalid')} == {
+        'read': 7, 'replayed': 1, 'duplicate': 1, 'deferred': 1, 'filtered': 2, 'invalid': 2
+    }
+    assert failed_output.read_bytes() == deferred + b'\n'
+
+
+def test_envelopes_are_unwrapped():
+    event = {'type': 'Issue', 'action': 'update'}
+
+    assert [replay_events.unwrap(record) for record in (event, {'body': event}, {'payload': event})] == [event] * 3
+    assert replay_events.unwrap({'body': 'raw'}) is None and replay_events.unwrap([event]) is None
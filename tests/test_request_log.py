@@ -0,0 +1,134 @@
+import json
+import queue
+import logging
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from shared import request_log
+from shared.request_log import (DroppingQueueHandler, JsonFormatter, SamplingFilter, bind, current, log_request,
+                                response_status)
+
+
+@pytest.fixture
+def lines():
+    """
+    Linhas de resumo do logger `request`, formatadas como no Cloud Logging
+    """
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    request_log.request_logger.addHandler(handler)
+    yield lambda: [json.loads(JsonFormatter().format(record)) for record in records]
+    request_log.request_logger.removeHandler(handler)
+
+
+def request(path='/'):
+    return SimpleNamespace(method='POST', path=path)
+
+
+def test_one_summary_line_with_bound_fields(lines):
+    @log_request('webhook_handler')
+    def handler(req):
+        bind(action='update', stage=lambda: 'L3')
+        return {'status': 'ok'}, 202
+
+    assert handler(request('/hook')) == ({'status': 'ok'}, 202)
+    [line] = lines()
+    assert line['severity'] == 'INFO'
+    assert {key: line[key] for key in ('function', 'method', 'path', 'status', 'action', 'stage')} == {
+        'function': 'webhook_handler', 'method': 'POST', 'path': '/hook', 'status': 202,
+        'action': 'update', 'stage': 'L3'
+    }
+    assert line['duration_ms'] >= 0
+
+
+def test_context_is_closed_after_the_request(lines):
+    @log_request('automation_core')
+    def handler(req):
+        assert current().function == 'automation_core'
+        return 'ok'
+
+    handler(request())
+    assert current() is None
+    bind(ignored=True)  # fora de um request: no-op
+    assert lines()[0]['status'] == 200
+
+
+def test_exceptions_are_logged_as_500_and_reraised(lines):
+    @log_request('apps_script_proxy')
+    def handler(req):
+        bind(step='drive')
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        handler(request())
+    [line] = lines()
+    assert (line['severity'], line['status'], line['step']) == ('ERROR', 500, 'drive')
+
+
+def test_concurrent_requests_do_not_share_fields(lines):
+    barrier = threading.Barrier(2)
+
+    @log_request('webhook_handler')
+    def handler(req):
+        bind(request_id=req.path)
+        barrier.wait()
+        return 'ok'
+
+    threads = [threading.Thread(target=handler, args=(request(f"/{n}"),)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted((line['path'], line['request_id']) for line in lines()) == [('/0', '/0'), ('/1', '/1')]
+
+
+def test_observers_receive_function_status_and_duration(lines):
+    seen = []
+    observer = lambda function, status, elapsed: seen.append((function, status, elapsed >= 0))  # noqa: E731
+    request_log.add_observer(observer)
+    try:
+        log_request('automation_core')(lambda req: ('', 404))(request())
+    finally:
+        request_log._observers.remove(observer)
+    assert seen == [('automation_core', 404, True)]
+
+
+def test_lazy_field_errors_do_not_break_the_line():
+    record = logging.LogRecord('request', logging.INFO, __file__, 1, 'GET / 200', None, None)
+    record.fields = {'bad': lambda: 1 / 0}
+
+    assert json.loads(JsonFormatter().format(record))['bad'].startswith('<error:')
+
+
+def test_unsampled_requests_drop_only_informative_logs():
+    sampling = SamplingFilter(rate=0.5)
+
+    def keep(level, **extra):
+        record = logging.LogRecord('app', level, __file__, 1, 'msg', None, None)
+        record.__dict__.update(extra)
+        return sampling.filter(record)
+
+    @log_request('webhook_handler', sample_rate=0.0)
+    def handler(req):
+        return [keep(logging.INFO), keep(logging.WARNING), keep(logging.INFO, always=True)]
+
+    assert handler(request()) == [False, True, True]
+    assert sampling.dropped == 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    for _ in range(3):
+        handler.emit(logging.LogRecord('app', logging.INFO, __file__, 1, 'msg %s', ('x',), None))
+
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().msg == 'msg x'
+
+
+def test_response_status_of_flask_returns():
+    assert response_status(({}, 201)) == 201
+    assert response_status(SimpleNamespace(status_code=304)) == 304
+    assert response_status('body') == 200
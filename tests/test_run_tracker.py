@@ -0,0 +1,28 @@
+from shared.run_tracker import RunTracker
+
+REPO = 'owner/llm-app-demo'
+WORKFLOW = 'llm-pipeline-auto.yml'
+
+
+def test_unknown_dispatch_id_is_not_registered(upstreams):
+    state, base_url = upstreams
+    state.upsert_workflow_run(REPO, display_title='L3 demo [aaaaaaaaaaaa]')
+    tracker = RunTracker('token', base_url, poll_interval=0)
+
+    assert tracker.status('bbbbbbbbbbbb', REPO, WORKFLOW, project='demo') is None
+    assert tracker.pending() == 0
+    assert tracker.stats['tracked'] == 0
+
+
+def test_dispatch_from_another_instance_is_found_by_id(upstreams):
+    state, base_url = upstreams
+    run = state.upsert_workflow_run(REPO, display_title='L3 demo [aaaaaaaaaaaa]',
+                                    status='completed', conclusion='success')
+    tracker = RunTracker('token', base_url, poll_interval=0)
+
+    record = tracker.status('aaaaaaaaaaaa', REPO, WORKFLOW, project='demo')
+
+    assert (record['run_id'], record['status'], record['conclusion']) == (run['id'], 'completed', 'success')
+    assert record['stage'] == 'L3'
+    assert tracker.stats['polls'] == 1
+    assert tracker.pending() == 0
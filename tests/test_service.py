@@ -0,0 +1,82 @@
+import os
+import importlib.util
+
+import pytest
+from werkzeug.test import Client
+
+from conftest import ROOT
+from shared.config import settings
+
+ADMIN_TOKEN = 'admin-secret'
+
+
+@pytest.fixture(scope='module')
+def service():
+    """
+    Módulo do modo serviço (functions/service) com as três funções montadas
+    """
+    os.environ['ADMIN_TOKEN'] = ADMIN_TOKEN
+    for name in ('admin_token', 'admin_secret'):
+        settings.__dict__.pop(name, None)
+    spec = importlib.util.spec_from_file_location('service_main', os.path.join(ROOT, 'functions', 'service', 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    os.environ.pop('ADMIN_TOKEN', None)
+
+
+@pytest.fixture(scope='module')
+def client(service):
+    return Client(service.app)
+
+
+@pytest.mark.parametrize('path', ['/metrics', '/webhook/metrics', '/automation/metrics', '/apps-script/metrics'])
+def test_metrics_require_the_admin_token(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={'X-Admin-Token': 'wrong'}).status_code == 401
+
+    response = client.get(path, headers={'X-Admin-Token': ADMIN_TOKEN})
+    assert response.status_code == 200
+    assert '# TYPE adc_span_duration_seconds histogram' in response.get_data(as_text=True)
+
+
+def test_apps_script_health_details_require_the_admin_token(client):
+    public = client.get('/apps-script/health').get_json()
+    assert public['status'] == 'healthy'
+    assert not {'drive_folder', 'latency', 'circuits'} & set(public)
+
+    details = client.get('/apps-script/health', headers={'X-Admin-Token': ADMIN_TOKEN}).get_json()
+    assert {'drive_folder', 'latency', 'circuits'} <= set(details)
+
+
+def test_root_health_lists_the_mounted_functions(client):
+    health = client.get('/health').get_json()
+
+    assert health['mode'] == 'service'
+    assert health['functions'] == {
+        '/webhook': 'linear_webhook_handler',
+        '/automation': 'automation_handler',
+        '/apps-script': 'apps_script_handler',
+    }
+
+
+def test_prefix_is_stripped_before_the_function_handler(client):
+    # /webhook/health chega ao handler como /health
+    assert 'dedup' in client.get('/webhook/health').get_json()
+    assert client.get('/apps-script/health').get_json()['status'] == 'healthy'
+
+    response = client.post('/automation/', json={'action': 'deploy'})
+    assert (response.status_code, response.get_json()) == (400, {'error': 'unknown action'})
+
+
+def test_unknown_paths_are_not_routed(client):
+    assert client.get('/unknown/health').status_code == 404
+
+
+def test_functions_share_one_interpreter_state(service):
+    webhook, automation, apps_script = (service.MODULES[p] for p in ('/webhook', '/automation', '/apps-script'))
+
+    assert webhook.prometheus_response is automation.prometheus_response is apps_script.prometheus_response
+    assert webhook.settings is automation.settings is apps_script.settings
+    assert service.load_function('automation_core') is automation
+    assert service.HANDLERS['automation_handler'] is automation.automation_handler
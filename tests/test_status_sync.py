@@ -0,0 +1,143 @@
+import threading
+
+import pytest
+
+from shared.linear import LinearClient
+from shared.status_sync import StatusSyncEngine, SyncStateStore
+
+REPO = 'owner/llm-app-demo'
+
+
+@pytest.fixture
+def engine(upstreams, tmp_path):
+    state, base_url = upstreams
+    store = SyncStateStore(str(tmp_path / 'sync.sqlite3'))
+    return state, StatusSyncEngine(
+        store, linear=LinearClient('key', f"{base_url}/graphql"),
+        github_token='token', github_api_url=base_url
+    )
+
+
+def seed(state):
+    state.upsert_linear_issue('lin-2', 'L2: Arquitetura', 'Done')
+    state.upsert_linear_issue('lin-3', 'L3: Design', 'In Progress')
+    state.upsert_github_issue(REPO, 1, 'L2: Arquitetura', state='closed')
+    state.upsert_workflow_run(REPO, display_title='demo L2 [abc123]', status='completed', conclusion='success')
+
+
+def test_first_sync_fetches_everything(engine):
+    state, sync = engine
+    seed(state)
+    result = sync.sync('demo', REPO)
+
+    assert result['counts'] == {'linear': 2, 'github_issues': 1, 'workflow_runs': 1}
+    assert {(c['stage'], c['source']) for c in result['changes']} == {
+        ('L2', 'linear'), ('L3', 'linear'), ('L2', 'github_issue'), ('L2', 'workflow_run')
+    }
+    assert result['watermarks']['linear'] == state.linear_issues['lin-3']['updatedAt']
+
+
+def test_second_sync_only_returns_changed_records(engine):
+    state, sync = engine
+    seed(state)
+    sync.sync('demo', REPO)
+
+    unchanged = sync.sync('demo', REPO)
+    assert unchanged['counts'] == {'linear': 0, 'github_issues': 0, 'workflow_runs': 0}
+    assert unchanged['changes'] == []
+    # Sem mudanças, GitHub responde 304 aos GETs condicionais com a ETag guardada
+    assert sync.sync('demo', REPO)['not_modified'] == ['github_issues', 'workflow_runs']
+
+    state.upsert_linear_issue('lin-3', 'L3: Design', 'Done')
+    changed = sync.sync('demo', REPO)
+    assert changed['counts']['linear'] == 1
+    assert [(c['stage'], c['record']['state'], c['previous']['state']) for c in changed['changes']] == [
+        ('L3', 'Done', 'In Progress')
+    ]
+
+
+def test_full_sync_ignores_watermarks(engine):
+    state, sync = engine
+    seed(state)
+    sync.sync('demo', REPO)
+
+    result = sync.sync('demo', REPO, full=True)
+    assert result['counts'] == {'linear': 2, 'github_issues': 1, 'workflow_runs': 1}
+    assert result['not_modified'] == []
+
+
+def test_approved_stage_with_failed_run_is_flagged(engine):
+    state, sync = engine
+    seed(state)
+    sync.sync('demo', REPO)
+
+    state.upsert_workflow_run(REPO, display_title='demo L2 [def456]', status='completed', conclusion='failure')
+    result = sync.sync('demo', REPO)
+    assert result['inconsistencies'] == [
+        {'stage': 'L2', 'issue': 'approved_but_run_failed', 'run_id': result['changes'][0]['record']['id']}
+    ]
+
+
+def test_record_run_updates_snapshot_without_a_sync(engine):
+    state, sync = engine
+    seed(state)
+    sync.sync('demo', REPO)
+
+    run = {'id': 99, 'status': 'in_progress', 'conclusion': None, 'updated_at': '2999-01-01T00:00:00Z'}
+    assert [c['stage'] for c in sync.record_run('demo', 'L3', run)] == ['L3']
+    assert sync.record_run('demo', 'L3', run) == []
+
+    older = dict(run, id=98, updated_at='2000-01-01T00:00:00Z')
+    assert sync.record_run('demo', 'L3', older) == []
+
+
+def test_one_etag_per_source_as_watermarks_advance(engine):
+    state, sync = engine
+    seed(state)
+    for number in range(2, 6):
+        state.upsert_github_issue(REPO, number, f"L{number}: Estágio")
+        state.upsert_workflow_run(REPO, display_title=f"demo L{number} [run{number}]")
+        sync.sync('demo', REPO)
+
+    assert set(sync.store.get('sync:demo')['etags']) == {'github_issues', 'workflow_runs'}
+
+
+def test_workflow_runs_are_read_across_pages(engine):
+    state, sync = engine
+    seed(state)
+    sync.sync('demo', REPO)
+
+    for number in range(150):
+        state.upsert_workflow_run(REPO, display_title=f"demo L3 [run{number}]", status='completed')
+    result = sync.sync('demo', REPO)
+
+    # 150 runs novos + o run no cursor (comparação inclusiva)
+    assert result['counts']['workflow_runs'] == 151
+    assert result['watermarks']['workflow_runs'] == max(
+        run['updated_at'] for run in state.workflow_runs[REPO].values())
+
+
+def test_record_run_during_a_sync_is_not_lost(engine, monkeypatch):
+    state, sync = engine
+    seed(state)
+    run = {'id': 99, 'status': 'in_progress', 'conclusion': None, 'updated_at': '2999-01-01T00:00:00Z'}
+    fetch_runs = sync._fetch_workflow_runs
+    recorder = threading.Thread(target=sync.record_run, args=('demo', 'L3', run))
+
+    def fetch_while_recording(sync_state, repo):
+        # O callback do run tracker chega no meio do sync (outra thread)
+        recorder.start()
+        recorder.join(0.2)
+        return fetch_runs(sync_state, repo)
+
+    monkeypatch.setattr(sync, '_fetch_workflow_runs', fetch_while_recording)
+    sync.sync('demo', REPO)
+    recorder.join()
+
+    assert sync.store.get('sync:demo')['snapshot']['L3']['workflow_run'] == run
+
+
+def test_sources_without_credentials_are_skipped(tmp_path):
+    sync = StatusSyncEngine(SyncStateStore(str(tmp_path / 'sync.sqlite3')))
+    result = sync.sync('demo', REPO)
+    assert result['skipped'] == ['linear', 'github_issues', 'workflow_runs']
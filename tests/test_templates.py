@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from shared.templates import Template, TemplateCache, TemplateError
+
+
+def test_expressions_directives_and_undefined_variables():
+    template = Template(
+        "${upper(name)}: %{ for id, stage in stages }${id}=${stage.id}%{ if stage.auto } auto%{ endif };%{ endfor }\n"
+        "${missing.field}|${length(stages)}|$${literal}"
+    )
+
+    assert template.render(name='demo', stages=[{'id': 'L1', 'auto': True}, {'id': 'L2'}]) == (
+        'DEMO: 0=L1 auto;1=L2;|2|${literal}'
+    )
+
+
+def test_template_functions_and_operators():
+    template = Template('[${join(", ", tools)}] ${contains(tools, "git") && !contains(tools, "svn")}')
+
+    assert template.render(tools=['git', 'make']) == '[git, make] true'
+
+
+@pytest.mark.parametrize('expression', [
+    "().__class__.__bases__[0].__subclasses__()",
+    "name.__class__",
+    "__import__('os')",
+    "_private",
+    "'{0.__globals__}'.format(length)",
+    "name.upper()",
+    "(lambda: 1)()",
+    "open('/etc/passwd')",
+])
+def test_expressions_cannot_reach_python_internals(expression):
+    with pytest.raises(TemplateError):
+        Template('${' + expression + '}')
+
+
+def test_builtins_are_not_available():
+    # Nomes desconhecidos (inclusive builtins) viram Undefined e renderizam vazio
+    assert Template('${len}${eval}${globals}').render() == ''
+
+
+def test_unbalanced_directives_are_rejected():
+    for source in ('%{ if x }open', '%{ endfor }', '%{ else }', '%{ while x }'):
+        with pytest.raises(TemplateError):
+            Template(source)
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    base = tmp_path / 'templates'
+    (base / 'linear').mkdir(parents=True)
+    (base / 'linear' / 'stage.md').write_text('Stage ${stage}')
+    (tmp_path / 'secret.md').write_text('${secret}')
+    return base
+
+
+@pytest.mark.parametrize('name', ['../secret.md', '/etc/passwd', 'linear/../../secret.md', ''])
+def test_templates_outside_the_base_dir_are_refused(templates_dir, name):
+    with pytest.raises(TemplateError):
+        TemplateCache(str(templates_dir)).get(name)
+
+
+def test_symlink_escaping_the_base_dir_is_refused(templates_dir):
+    os.symlink(templates_dir.parent / 'secret.md', templates_dir / 'linear' / 'link.md')
+
+    with pytest.raises(TemplateError):
+        TemplateCache(str(templates_dir)).get('linear/link.md')
+
+
+def test_cache_reuses_and_invalidates_compiled_templates(templates_dir):
+    cache = TemplateCache(str(templates_dir), check_interval=0)
+    assert cache.render('linear/stage.md', stage='L1') == 'Stage L1'
+    assert cache.render('linear/stage.md', stage='L2') == 'Stage L2'
+    assert (cache.stats['misses'], cache.stats['hits']) == (1, 1)
+
+    (templates_dir / 'linear' / 'stage.md').write_text('Estágio ${stage} (atualizado)')
+    assert cache.render('linear/stage.md', stage='L3') == 'Estágio L3 (atualizado)'
+    assert cache.stats['misses'] == 2
+
+    with pytest.raises(TemplateError):
+        cache.get('linear/missing.md')
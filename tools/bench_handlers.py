@@ -0,0 +1,405 @@
+"""
+ADC-Agents-Team - Handler Benchmark
+Load test local dos três entry points HTTP com upstreams simulados
+
+Cada handler é exercitado pelo test client do Flask com payloads sintéticos;
+GitHub/Linear/Drive/GCS apontam para tools/fake_upstreams.py (latência e erros configuráveis).
+
+Uso:
+    python tools/bench_handlers.py --requests 2000 --concurrency 8
+    python tools/bench_handlers.py --latency-ms 150 --error-rate 0.05 --json > bench.json
+    python tools/bench_handlers.py --baseline bench.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+import tracemalloc
+import importlib.util
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS_DIR)
+FUNCTIONS_DIR = os.path.join(ROOT, 'functions')
+
+sys.path.insert(0, TOOLS_DIR)
+from fake_upstreams import start_fake_upstreams  # noqa: E402
+
+sys.path.insert(0, FUNCTIONS_DIR)
+from shared.webhook_auth import SIGNATURE_HEADER, sign  # noqa: E402
+
+STAGES = ['L1', 'L2', 'L3', 'L4', 'L5', 'L6', 'L7', 'L8', 'L9']
+
+Request = Tuple[str, str, Any, Dict[str, str]]  # (method, path, json ou bytes, headers)
+
+WEBHOOK_SECRET = 'bench-secret'
+
+
+# --- Payloads sintéticos ---
+
+def linear_events(rng: random.Random) -> Iterator[Request]:
+    """
+    Mix aproximado do tráfego real: a maioria dos eventos é ignorada
+    """
+    base_time = datetime(2025, 10, 1)
+    counter = 0
+    while True:
+        counter += 1
+        roll = rng.random()
+        issue_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        updated_at = (base_time + timedelta(seconds=counter)).isoformat() + 'Z'
+        headers = {'Linear-Delivery': str(uuid.UUID(int=rng.getrandbits(128)))}
+        stage = rng.choice(STAGES)
+
+        if roll < 0.15:
+            event = {'type': 'Issue', 'action': 'update', 'data': {
+                'id': issue_id, 'updatedAt': updated_at, 'title': f"{stage}: Entrega do estágio",
+                'state': {'name': 'Done'}}}
+        elif roll < 0.60:
+            event = {'type': 'Issue', 'action': 'update', 'data': {
+                'id': issue_id, 'updatedAt': updated_at, 'title': f"{stage}: Entrega do estágio",
+                'state': {'name': 'In Progress'}, 'description': 'x' * rng.randint(200, 2000)}}
+        elif roll < 0.75:
+            event = {'type': 'Comment', 'action': 'create', 'data': {
+                'id': issue_id, 'body': 'Comentário ' * rng.randint(5, 80)}}
+        elif roll < 0.90:
+            event = {'type': 'IssueLabel', 'action': 'create', 'data': {'id': issue_id, 'name': 'bug'}}
+        elif roll < 0.95:
+            event = {'type': 'Issue', 'action': 'create', 'data': {
+                'id': issue_id, 'title': f"{stage}: Nova issue", 'state': {'name': 'Todo'}}}
+        else:
+            event = {'type': 'Reaction', 'action': 'create', 'data': {'id': issue_id, 'emoji': '👍'}}
+
+        event['createdAt'] = updated_at
+        event['webhookTimestamp'] = int(time.time() * 1000)
+        body = json.dumps(event).encode()
+        # ~3% de requests sem assinatura válida (flood/replay não autenticado)
+        headers[SIGNATURE_HEADER] = 'deadbeef' if rng.random() < 0.03 else sign(WEBHOOK_SECRET, body)
+        yield ('POST', '/', body, headers)
+
+
+def automation_actions(rng: random.Random) -> Iterator[Request]:
+    while True:
+        roll = rng.random()
+        project = f"bench_{rng.randint(1, 20)}"
+        if roll < 0.6:
+            body = {'action': 'trigger_stage', 'payload': {'stage': rng.choice(STAGES), 'project_name': project}}
+        elif roll < 0.8:
+            body = {'action': 'batch', 'payload': {'operations': [
+                {'action': 'trigger_stage', 'payload': {'stage': rng.choice(STAGES), 'project_name': f"bench_{i}"}}
+                for i in range(rng.randint(2, 10))
+            ]}}
+        else:
+            body = {'action': 'sync_status', 'payload': {'project_name': project}}
+        yield ('POST', '/', body, {})
+
+
+def apps_script_actions(rng: random.Random) -> Iterator[Request]:
+    actions = ['create_document', 'create_stage_document', 'update_config', 'organize_files', 'backup_data']
+    while True:
+        action = rng.choice(actions)
+        payload = {
+            # Documentos vão para uma pasta à parte: backup/organize veem sempre a mesma árvore
+            'create_document': {'title': f"Doc {rng.randint(1, 999)}", 'content': 'x' * 500,
+                                'folder_id': 'bench-docs'},
+            'create_stage_document': {'title': 'Stage doc', 'template': 'linear/stage-issue-description.md',
+                                      'stage': rng.choice(STAGES), 'folder_id': 'bench-docs'},
+            'update_config': {'config_type': 'project', 'data': {'k': 'v'}},
+            'organize_files': {'rules': {}},
+            'backup_data': {'backup_type': 'incremental'},
+        }[action]
+        action = 'create_document' if action == 'create_stage_document' else action
+        yield ('POST', '/', {'action': action, 'payload': payload}, {})
+
+
+SCENARIOS = {
+    'webhook': ('webhook_handler', 'linear_webhook_handler', linear_events),
+    'automation': ('automation_core', 'automation_handler', automation_actions),
+    'apps_script': ('apps_script_proxy', 'apps_script_handler', apps_script_actions),
+}
+
+# 4xx que os payloads sintéticos provocam de propósito; qualquer outro é regressão
+EXPECTED_4XX = {
+    'webhook': {401},  # assinaturas inválidas injetadas
+    'automation': set(),
+    'apps_script': set(),
+}
+
+
+# --- Carregamento dos handlers ---
+
+def load_handler(function_dir: str, entry_point: str) -> Callable:
+    """
+    Importa functions/<dir>/main.py com nome único (os três módulos se chamam main)
+    """
+    path = os.path.join(FUNCTIONS_DIR, function_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    spec = importlib.util.spec_from_file_location(f"{function_dir}_main", os.path.join(path, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, entry_point)
+
+
+def make_app(handler: Callable):
+    from flask import Flask, request
+
+    app = Flask(f"bench_{handler.__name__}")
+
+    @app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'OPTIONS'])
+    @app.route('/<path:path>', methods=['GET', 'POST', 'OPTIONS'])
+    def entry(path):
+        return handler(request)
+
+    return app
+
+
+# --- Execução ---
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def body_kwargs(body: Any) -> Dict[str, Any]:
+    if isinstance(body, bytes):
+        return {'data': body, 'content_type': 'application/json'}
+    return {'json': body}
+
+
+def run_load(app, requests_iter: Iterator[Request], total: int, concurrency: int) -> Dict[str, Any]:
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    def next_request() -> Optional[Request]:
+        with lock:
+            if len(latencies) + in_flight[0] >= total:
+                return None
+            in_flight[0] += 1
+            return next(requests_iter)
+
+    in_flight = [0]
+
+    def worker():
+        client = app.test_client()
+        while True:
+            item = next_request()
+            if item is None:
+                return
+            method, path, body, headers = item
+            started = time.perf_counter()
+            response = client.open(path, method=method, headers=headers, **body_kwargs(body))
+            elapsed = time.perf_counter() - started
+            with lock:
+                in_flight[0] -= 1
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'wall_s': round(wall, 3),
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'errors_4xx': sum(v for k, v in statuses.items() if 400 <= k < 500),
+        'errors_5xx': sum(v for k, v in statuses.items() if k >= 500)
+    }
+
+
+def status_failures(name: str, result: Dict[str, Any], error_rate: float) -> List[str]:
+    """
+    4xx fora do esperado sempre falham; 5xx só são aceitos com erros injetados
+    """
+    failures = [f"{name}: {count} unexpected {status} responses"
+                for status, count in result['statuses'].items()
+                if 400 <= int(status) < 500 and int(status) not in EXPECTED_4XX[name]]
+    if result['errors_5xx'] and not error_rate:
+        failures.append(f"{name}: {result['errors_5xx']} 5xx responses without injected upstream errors")
+    return failures
+
+
+def measure_memory(app, requests_iter: Iterator[Request], samples: int) -> Dict[str, Any]:
+    """
+    Pico de alocação por request (tracemalloc) em uma passada sequencial
+    """
+    client = app.test_client()
+    peaks = []
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for _ in range(samples):
+        method, path, body, headers = next(requests_iter)
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        client.open(path, method=method, headers=headers, **body_kwargs(body))
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'samples': samples,
+        'peak_kb_mean': round(statistics.mean(peaks) / 1024, 1),
+        'peak_kb_max': round(max(peaks) / 1024, 1),
+        'retained_kb_per_request': round((retained - baseline) / 1024 / samples, 2)
+    }
+
+
+def configure_environment(base_url: str, workdir: str, webhook_mode: str) -> None:
+    """
+    Aponta as funções para os fakes antes do import (constantes lidas no import)
+    """
+    os.environ.update({
+        'PROJECT_NAME': 'bench',
+        'ENVIRONMENT': 'dev',
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+        'LOG_OUTPUT': os.environ.get('LOG_OUTPUT', 'text'),
+        'GITHUB_API_URL': base_url,
+        'LINEAR_API_URL': f"{base_url}/graphql",
+        'GITHUB_TOKEN': 'bench-token',
+        'GITHUB_OWNER': 'bench',
+        'LINEAR_API_KEY': 'bench-key',
+        'GITHUB_DISPATCH_RATE': '100000',
+        'GITHUB_DISPATCH_BURST': '100000',
+        'GITHUB_DISPATCH_MAX_WAIT': '5',
+        'WEBHOOK_MODE': webhook_mode,
+        'LINEAR_WEBHOOK_SECRET': WEBHOOK_SECRET,
+        'EVENT_QUEUE_URL': os.path.join(workdir, 'events.sqlite3'),
+        'PIPELINE_STATE_URL': os.path.join(workdir, 'pipeline.sqlite3'),
+        'SYNC_STATE_PATH': os.path.join(workdir, 'sync.sqlite3'),
+        'NOTIFICATION_WINDOW_SECONDS': '0.5',
+        'DRIVE_API_URL': f"{base_url}/drive/v3",
+        'DRIVE_BATCH_URL': f"{base_url}/batch/drive/v3",
+        'DRIVE_UPLOAD_URL': f"{base_url}/upload/drive/v3",
+        'GCS_API_URL': base_url,
+        'GOOGLE_ACCESS_TOKEN': 'bench-token',
+        'DRIVE_FOLDER_ID': 'bench-root',
+        'ARTIFACTS_BUCKET': 'bench-artifacts',
+    })
+
+
+def seed_drive(upstreams, rng: random.Random, files_per_stage: int = 10) -> None:
+    """
+    Pasta de projeto com uma subpasta por estágio e artefatos pequenos
+    """
+    upstreams.add_drive_folder('bench', '', folder_id='bench-root')
+    for stage in STAGES:
+        folder = upstreams.add_drive_folder(stage, 'bench-root')
+        for i in range(files_per_stage):
+            upstreams.add_drive_file(f"{stage}: artefato {i}.md", folder, rng.randbytes(rng.randint(1024, 64 * 1024)))
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {result['p95_ms']} ms")
+        if result['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: rps {previous['rps']} -> {result['rps']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test local dos handlers HTTP')
+    parser.add_argument('scenarios', nargs='*', help=f"default: {' '.join(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--memory-samples', type=int, default=200, help='0 desativa a medição de memória')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latência injetada nos upstreams')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fração de respostas 503 dos upstreams')
+    parser.add_argument('--webhook-mode', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--max-p95-ms', type=float, default=0, help='falha se algum p95 exceder este valor')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior (--json) para comparação')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    server, upstreams, base_url = start_fake_upstreams()
+    upstreams.configure(args.latency_ms, args.jitter_ms, args.error_rate)
+    workdir = tempfile.mkdtemp(prefix='adc-bench-')
+    configure_environment(base_url, workdir, args.webhook_mode)
+    seed_drive(upstreams, random.Random(args.seed))
+
+    results: Dict[str, Any] = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': sys.version.split()[0],
+        'upstream': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms, 'error_rate': args.error_rate},
+        'webhook_mode': args.webhook_mode,
+        'scenarios': {}
+    }
+
+    for name in args.scenarios:
+        function_dir, entry_point, generator = SCENARIOS[name]
+        app = make_app(load_handler(function_dir, entry_point))
+        requests_iter = generator(random.Random(args.seed))
+
+        run_load(app, requests_iter, args.warmup, 1)
+        result = run_load(app, requests_iter, args.requests, args.concurrency)
+        if args.memory_samples:
+            result['memory'] = measure_memory(app, requests_iter, args.memory_samples)
+        results['scenarios'][name] = result
+
+    results['upstream']['requests_served'] = len(upstreams.request_log)
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, r in results['scenarios'].items():
+            print(f"{name:12s} {r['rps']:9.1f} req/s  p50 {r['p50_ms']:7.2f}  p95 {r['p95_ms']:7.2f}  "
+                  f"p99 {r['p99_ms']:7.2f} ms  5xx {r['errors_5xx']}  statuses {r['statuses']}")
+            if 'memory' in r:
+                m = r['memory']
+                print(f"{'':12s} memory: peak {m['peak_kb_mean']} KB/req (max {m['peak_kb_max']}), "
+                      f"retained {m['retained_kb_per_request']} KB/req")
+
+    failures = []
+    for name, r in results['scenarios'].items():
+        failures += status_failures(name, r, args.error_rate)
+    if args.max_p95_ms:
+        failures += [f"{n}: p95 {r['p95_ms']} ms > {args.max_p95_ms}"
+                     for n, r in results['scenarios'].items() if r['p95_ms'] > args.max_p95_ms]
+    if args.baseline:
+        failures += compare_with_baseline(results, args.baseline, args.tolerance)
+    if failures:
+        print('Benchmark failures:\n  ' + '\n  '.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
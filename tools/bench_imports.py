@@ -0,0 +1,114 @@
+"""
+ADC-Agents-Team - Import Benchmark
+Mede o custo de import (cold start) de cada entry point com `python -X importtime`
+
+Uso:
+    python tools/bench_imports.py [--runs 5] [--top 10] [--max-ms 800] [--json]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTIONS_DIR = os.path.join(ROOT, 'functions')
+
+ENTRY_POINTS = {
+    'webhook_handler': 'linear_webhook_handler',
+    'automation_core': 'automation_handler',
+    'apps_script_proxy': 'apps_script_handler',
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Converte a saída do -X importtime em (módulo, nível, self_us, cumulative_us)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, values = line.split(':', 1)
+            self_us, cumulative_us, name = values.split('|', 2)
+        except ValueError:
+            continue
+        name = name.rstrip()[1:]
+        level = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), level, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(function_name: str) -> List[Tuple[str, int, int, int]]:
+    cwd = os.path.join(FUNCTIONS_DIR, function_name)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{function_name}: import failed\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def benchmark(function_name: str, runs: int, top: int) -> Dict[str, object]:
+    totals = []
+    per_module: Dict[str, List[int]] = {}
+
+    # Primeira execução só aquece o cache de bytecode (__pycache__)
+    measure(function_name)
+
+    for _ in range(runs):
+        rows = measure(function_name)
+        main_row = next((r for r in rows if r[0] == 'main' and r[1] == 0), None)
+        totals.append(main_row[3] if main_row else sum(r[2] for r in rows))
+        for name, level, _, cumulative in rows:
+            # Imports feitos diretamente pelo main.py
+            if level == 1:
+                per_module.setdefault(name, []).append(cumulative)
+
+    heaviest = sorted(
+        ((name, statistics.median(values)) for name, values in per_module.items()),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+
+    return {
+        'function': function_name,
+        'entry_point': ENTRY_POINTS[function_name],
+        'runs': runs,
+        'median_ms': round(statistics.median(totals) / 1000, 1),
+        'min_ms': round(min(totals) / 1000, 1),
+        'max_ms': round(max(totals) / 1000, 1),
+        'heaviest_imports_ms': [(name, round(us / 1000, 1)) for name, us in heaviest]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start import benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=0, help='falha se a mediana exceder este valor')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('functions', nargs='*', default=list(ENTRY_POINTS))
+    args = parser.parse_args()
+
+    results = [benchmark(name, args.runs, args.top) for name in args.functions]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['function']} ({result['entry_point']}): "
+                  f"median {result['median_ms']} ms [min {result['min_ms']}, max {result['max_ms']}]")
+            for name, ms in result['heaviest_imports_ms']:
+                print(f"    {ms:8.1f} ms  {name}")
+
+    if args.max_ms and any(r['median_ms'] > args.max_ms for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,693 @@
+"""
+ADC-Agents-Team - Fake Upstreams
+Servidor HTTP local que simula as APIs do Linear (GraphQL), do GitHub,
+do Google Drive v3, do Cloud Storage (upload resumable) e do Firestore
+(documentos, commit com precondições e consultas simples)
+
+Uso:
+    python tools/fake_upstreams.py --port 8085
+
+e aponte as funções para ele:
+    LINEAR_API_URL=http://127.0.0.1:8085/graphql
+    GITHUB_API_URL=http://127.0.0.1:8085
+    DRIVE_API_URL=http://127.0.0.1:8085/drive/v3
+    DRIVE_BATCH_URL=http://127.0.0.1:8085/batch/drive/v3
+    DRIVE_UPLOAD_URL=http://127.0.0.1:8085/upload/drive/v3
+    GCS_API_URL=http://127.0.0.1:8085
+    FIRESTORE_API_URL=http://127.0.0.1:8085/v1
+    GOOGLE_ACCESS_TOKEN=fake
+"""
+
+import re
+import sys
+import json
+import uuid
+import base64
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+class FakeUpstreams:
+    """
+    Estado em memória das APIs simuladas
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.linear_issues: Dict[str, Dict[str, Any]] = {}
+        # Times, estados e labels por tipo GraphQL (team, workflowState, issueLabel)
+        self.linear_entities: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.linear_queries = 0
+        self.linear_comments: List[Dict[str, Any]] = []
+        self.github_issues: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.workflow_runs: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.dispatches: List[Dict[str, Any]] = []
+        # Inputs declarados por (repo, workflow); sem entrada, qualquer input é aceito
+        self.workflow_inputs: Dict[Tuple[str, str], List[str]] = {}
+        self.drive_files: Dict[str, Dict[str, Any]] = {}
+        self.drive_content: Dict[str, bytes] = {}
+        self.drive_children: Dict[str, Dict[str, None]] = {}
+        self.gcs_objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.upload_sessions: Dict[str, Dict[str, Any]] = {}
+        # Documentos do Firestore por nome completo -> {'fields', 'updateTime'}
+        self.firestore_docs: Dict[str, Dict[str, Any]] = {}
+        self._firestore_clock = 0
+        self.request_log: deque = deque(maxlen=10000)
+        self._next_id = 1000
+        # Injeção de falhas: latência (ms) e taxa de erro por requisição
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.error_rate = 0.0
+        self.error_status = 503
+
+    def configure(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                  error_rate: float = 0.0, error_status: int = 503) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def inject(self) -> Optional[int]:
+        """
+        Aplica a latência configurada e sorteia um erro; retorna o status de erro ou None
+        """
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if self.error_rate and random.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    # --- Linear ---
+
+    def upsert_linear_issue(self, issue_id: str, title: str, state: str, **extra) -> Dict[str, Any]:
+        with self.lock:
+            issue = self.linear_issues.setdefault(issue_id, {'id': issue_id, 'identifier': issue_id})
+            issue.update({'title': title, 'state': {'name': state, 'type': 'started'}, 'updatedAt': utc_now()})
+            issue.update(extra)
+            return dict(issue)
+
+    def upsert_linear_entity(self, kind: str, entity_id: str, **fields) -> Dict[str, Any]:
+        with self.lock:
+            entity = self.linear_entities.setdefault(kind, {}).setdefault(entity_id, {'id': entity_id})
+            entity.update(fields)
+            return dict(entity)
+
+    def linear_lookup(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resolve lookups com alias (`e0: team(id: $v0) {...}`) de uma query em lote
+        """
+        data = {}
+        with self.lock:
+            for alias, kind, var in re.findall(r'(\w+): (\w+)\(id: \$(\w+)\)', query):
+                source = self.linear_issues if kind == 'issue' else self.linear_entities.get(kind, {})
+                entity = source.get(variables.get(var))
+                data[alias] = dict(entity) if entity is not None else None
+        return data
+
+    def linear_issues_page(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        query_filter = variables.get('filter') or {}
+        since = (query_filter.get('updatedAt') or {}).get('gte')
+        after = int(variables.get('after') or 0)
+        with self.lock:
+            nodes = sorted(self.linear_issues.values(), key=lambda i: i['updatedAt'])
+        if since:
+            nodes = [n for n in nodes if n['updatedAt'] >= since]
+        page = nodes[after:after + 100]
+        return {
+            'issues': {
+                'nodes': page,
+                'pageInfo': {'hasNextPage': after + 100 < len(nodes), 'endCursor': str(after + 100)}
+            }
+        }
+
+    # --- GitHub ---
+
+    def upsert_github_issue(self, repo: str, number: int, title: str, state: str = 'open') -> Dict[str, Any]:
+        with self.lock:
+            issues = self.github_issues.setdefault(repo, {})
+            issue = issues.setdefault(number, {'id': self._id(), 'number': number})
+            issue.update({'title': title, 'state': state, 'updated_at': utc_now()})
+            return dict(issue)
+
+    def upsert_workflow_run(self, repo: str, run_id: Optional[int] = None, **fields) -> Dict[str, Any]:
+        with self.lock:
+            runs = self.workflow_runs.setdefault(repo, {})
+            run_id = run_id or self._id()
+            run = runs.setdefault(run_id, {'id': run_id, 'created_at': utc_now(), 'status': 'queued', 'conclusion': None})
+            run.update(fields)
+            run['updated_at'] = utc_now()
+            return dict(run)
+
+    def github_issues_list(self, repo: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        since = params.get('since')
+        per_page = int(params.get('per_page', 30))
+        page = int(params.get('page', 1))
+        with self.lock:
+            items = sorted(self.github_issues.get(repo, {}).values(), key=lambda i: i['updated_at'])
+        if since:
+            items = [i for i in items if i['updated_at'] >= since]
+        return items[(page - 1) * per_page:page * per_page]
+
+    def workflow_runs_list(self, repo: str, params: Dict[str, str]) -> Dict[str, Any]:
+        per_page = int(params.get('per_page', 30))
+        start = (int(params.get('page', 1)) - 1) * per_page
+        with self.lock:
+            runs = sorted(self.workflow_runs.get(repo, {}).values(), key=lambda r: r['created_at'], reverse=True)
+        return {'total_count': len(runs), 'workflow_runs': runs[start:start + per_page]}
+
+    def declare_workflow_inputs(self, repo: str, workflow: str, names: List[str]) -> None:
+        with self.lock:
+            self.workflow_inputs[(repo, workflow)] = list(names)
+
+    def unexpected_inputs(self, repo: str, workflow: str, body: Dict[str, Any]) -> List[str]:
+        with self.lock:
+            declared = self.workflow_inputs.get((repo, workflow))
+        if declared is None:
+            return []
+        return [name for name in (body.get('inputs') or {}) if name not in declared]
+
+    def record_dispatch(self, repo: str, workflow: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Registra o dispatch e cria o run na fila, com o título do run-name do workflow
+        """
+        with self.lock:
+            self.dispatches.append({'repo': repo, 'workflow': workflow, 'body': body})
+        inputs = body.get('inputs') or {}
+        title = f"{inputs.get('project_name', '')} {inputs.get('stage', '')}"
+        if inputs.get('dispatch_id'):
+            title += f" [{inputs['dispatch_id']}]"
+        return self.upsert_workflow_run(repo, display_title=title, event='workflow_dispatch',
+                                        path=f".github/workflows/{workflow}", head_branch=body.get('ref'))
+
+    # --- Drive ---
+
+    def add_drive_file(self, name: str, parent: str, content: bytes = b'',
+                       mime_type: str = 'application/octet-stream', file_id: Optional[str] = None) -> Dict[str, Any]:
+        with self.lock:
+            file_id = file_id or f"file{self._id()}"
+            meta = {'id': file_id, 'name': name, 'mimeType': mime_type, 'parents': [parent],
+                    'modifiedTime': utc_now()}
+            if mime_type != 'application/vnd.google-apps.folder':
+                if not mime_type.startswith('application/vnd.google-apps.'):
+                    meta['md5Checksum'] = hashlib.md5(content).hexdigest()
+                    meta['size'] = str(len(content))
+                self.drive_content[file_id] = content
+            self.drive_files[file_id] = meta
+            self.drive_children.setdefault(parent, {})[file_id] = None
+            return dict(meta)
+
+    def add_drive_folder(self, name: str, parent: str, folder_id: Optional[str] = None) -> str:
+        return self.add_drive_file(name, parent, mime_type='application/vnd.google-apps.folder',
+                                   file_id=folder_id)['id']
+
+    def update_drive_file(self, file_id: str, content: bytes) -> None:
+        with self.lock:
+            meta = self.drive_files[file_id]
+            self.drive_content[file_id] = content
+            meta['modifiedTime'] = utc_now()
+            if 'md5Checksum' in meta:
+                meta['md5Checksum'] = hashlib.md5(content).hexdigest()
+                meta['size'] = str(len(content))
+
+    def drive_list(self, params: Dict[str, str]) -> Dict[str, Any]:
+        match = re.search(r"'([^']+)' in parents", params.get('q', ''))
+        parent = match.group(1) if match else None
+        page_size = min(int(params.get('pageSize', 100)), 1000)
+        offset = int(params.get('pageToken') or 0)
+        mime = re.search(r"mimeType (!?=) '([^']+)'", params.get('q', ''))
+        with self.lock:
+            ids = self.drive_children.get(parent, {}) if parent is not None else self.drive_files
+            items = [dict(self.drive_files[i]) for i in ids if i in self.drive_files]
+        if mime:
+            equal = mime.group(1) == '='
+            items = [f for f in items if (f['mimeType'] == mime.group(2)) == equal]
+        body: Dict[str, Any] = {'files': items[offset:offset + page_size]}
+        if offset + page_size < len(items):
+            body['nextPageToken'] = str(offset + page_size)
+        return body
+
+    def move_drive_file(self, file_id: str, add_parents: str, remove_parents: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            meta = self.drive_files.get(file_id)
+            if meta is None:
+                return None
+            parents = [p for p in meta['parents'] if p not in remove_parents.split(',')]
+            meta['parents'] = parents + [p for p in add_parents.split(',') if p and p not in parents]
+            for parent in remove_parents.split(','):
+                self.drive_children.get(parent, {}).pop(file_id, None)
+            for parent in meta['parents']:
+                self.drive_children.setdefault(parent, {})[file_id] = None
+            return {'id': file_id, 'parents': meta['parents']}
+
+    def drive_batch(self, content_type: str, raw: bytes) -> Tuple[str, bytes]:
+        """
+        Executa um batch multipart/mixed de PATCHes (movimentação de arquivos)
+        """
+        boundary = re.search(r'boundary=([^;]+)', content_type).group(1).strip('"')
+        out_boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in raw.decode().split(f"--{boundary}")[1:]:
+            request_line = re.search(r'^(PATCH|GET|POST) (\S+) HTTP/1\.1', part, re.MULTILINE)
+            if not request_line:
+                continue
+            content_id = re.search(r'Content-ID: <([^>]+)>', part)
+            target = urlsplit(request_line.group(2))
+            query = {k: v[0] for k, v in parse_qs(target.query).items()}
+            file_id = target.path.rsplit('/', 1)[1]
+            if self.error_rate and random.random() < self.error_rate:
+                status, result = self.error_status, {'error': {'message': 'injected failure'}}
+            else:
+                result = self.move_drive_file(file_id, query.get('addParents', ''), query.get('removeParents', ''))
+                status = 200 if result else 404
+            payload = json.dumps(result or {'error': {'message': 'File not found'}})
+            parts.append(
+                f"--{out_boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.group(1) if content_id else ''}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n\r\n{payload}\r\n"
+            )
+        body = (''.join(parts) + f"--{out_boundary}--\r\n").encode()
+        return f"multipart/mixed; boundary={out_boundary}", body
+
+    # --- Cloud Storage ---
+
+    def put_object(self, bucket: str, name: str, data: bytes, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        resource = {
+            'bucket': bucket, 'name': name, 'size': str(len(data)),
+            'md5Hash': base64.b64encode(hashlib.md5(data).digest()).decode(),
+            'metadata': metadata or {}, 'updated': utc_now()
+        }
+        with self.lock:
+            self.gcs_objects[(bucket, name)] = {'data': data, 'resource': resource}
+        return resource
+
+    def start_upload(self, bucket: str, name: str, metadata: Optional[Dict[str, str]] = None) -> str:
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.upload_sessions[session_id] = {'bucket': bucket, 'name': name, 'data': bytearray(),
+                                                'metadata': metadata or {}}
+        return session_id
+
+    def upload_chunk(self, session_id: str, content_range: str, data: bytes):
+        """
+        Aplica um chunk; retorna (status, recurso ou bytes recebidos)
+        """
+        session = self.upload_sessions.get(session_id)
+        if session is None:
+            return 404, None
+        match = re.match(r'bytes (\*|(\d+)-(\d+))/(\*|\d+)', content_range or '')
+        if not match:
+            return 400, None
+        received = session['data']
+        if match.group(2) is not None and int(match.group(2)) == len(received):
+            received += data
+        total = match.group(4)
+        if total != '*' and int(total) == len(received):
+            del self.upload_sessions[session_id]
+            return 200, self.put_object(session['bucket'], session['name'], bytes(received), session['metadata'])
+        return 308, len(received)
+
+
+    # --- Firestore ---
+
+    def _firestore_time(self) -> str:
+        # updateTime estritamente crescente: é a precondição dos compare-and-set
+        self._firestore_clock = max(self._firestore_clock + 1, time.time_ns() // 1000)
+        stamp = datetime.fromtimestamp(self._firestore_clock / 1e6, timezone.utc)
+        return stamp.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    @staticmethod
+    def _firestore_value(value: Dict[str, Any]) -> Any:
+        if 'integerValue' in value:
+            return int(value['integerValue'])
+        for key in ('doubleValue', 'stringValue', 'booleanValue'):
+            if key in value:
+                return value[key]
+        return None
+
+    def firestore_document(self, name: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            doc = self.firestore_docs.get(name)
+            return dict(doc, name=name) if doc else None
+
+    def firestore_commit(self, writes: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Aplica os writes atomicamente; precondição violada falha o commit inteiro
+        """
+        with self.lock:
+            for write in writes:
+                name = write.get('update', {}).get('name') or write.get('delete')
+                current = self.firestore_docs.get(name)
+                precondition = write.get('currentDocument') or {}
+                if 'exists' in precondition and precondition['exists'] != (current is not None):
+                    status, code = ('ALREADY_EXISTS', 409) if current else ('NOT_FOUND', 404)
+                    return code, {'error': {'code': code, 'status': status, 'message': name}}
+                if 'updateTime' in precondition and (current or {}).get('updateTime') != precondition['updateTime']:
+                    return 400, {'error': {'code': 400, 'status': 'FAILED_PRECONDITION', 'message': name}}
+
+            update_time = self._firestore_time()
+            results = []
+            for write in writes:
+                if 'delete' in write:
+                    self.firestore_docs.pop(write['delete'], None)
+                    results.append({})
+                    continue
+                name = write['update']['name']
+                written = write['update'].get('fields', {})
+                mask = (write.get('updateMask') or {}).get('fieldPaths')
+                if mask is None:
+                    fields = dict(written)
+                else:
+                    # Com updateMask só os campos listados mudam (ausentes no write são removidos)
+                    fields = dict((self.firestore_docs.get(name) or {}).get('fields', {}))
+                    for key in mask:
+                        if key in written:
+                            fields[key] = written[key]
+                        else:
+                            fields.pop(key, None)
+                for transform in write.get('updateTransforms', []):
+                    current = self._firestore_value(fields.get(transform['fieldPath'], {})) or 0
+                    fields[transform['fieldPath']] = {
+                        'integerValue': str(current + self._firestore_value(transform['increment']))
+                    }
+                self.firestore_docs[name] = {'fields': fields, 'updateTime': update_time}
+                results.append({'updateTime': update_time})
+            return 200, {'writeResults': results, 'commitTime': update_time}
+
+    def firestore_query(self, parent: str, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Filtros de campo (AND), um orderBy ascendente e limit
+        """
+        prefix = f"{parent}/{query['from'][0]['collectionId']}/"
+        where = query.get('where') or {}
+        filters = [f['fieldFilter'] for f in where.get('compositeFilter', {}).get('filters', [])]
+        if 'fieldFilter' in where:
+            filters.append(where['fieldFilter'])
+        compare = {
+            'EQUAL': lambda a, b: a == b, 'LESS_THAN': lambda a, b: a < b,
+            'LESS_THAN_OR_EQUAL': lambda a, b: a <= b, 'GREATER_THAN': lambda a, b: a > b,
+            'GREATER_THAN_OR_EQUAL': lambda a, b: a >= b
+        }
+
+        def matches(doc):
+            for f in filters:
+                field = doc['fields'].get(f['field']['fieldPath'])
+                if field is None:
+                    return False
+                if not compare[f['op']](self._firestore_value(field), self._firestore_value(f['value'])):
+                    return False
+            return True
+
+        with self.lock:
+            docs = [dict(doc, name=name) for name, doc in self.firestore_docs.items()
+                    if name.startswith(prefix) and '/' not in name[len(prefix):] and matches(doc)]
+        for order in reversed(query.get('orderBy', [])):
+            docs.sort(key=lambda doc: self._firestore_value(doc['fields'].get(order['field']['fieldPath'], {})))
+        return docs[:query['limit']] if query.get('limit') else docs
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para exercitar keep-alive dos clientes
+    protocol_version = 'HTTP/1.1'
+    # Headers e corpo saem em writes separados: sem isso o Nagle + delayed ACK
+    # adiciona ~40 ms por resposta e domina as medições
+    disable_nagle_algorithm = True
+    state: FakeUpstreams = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any, etag_enabled: bool = False) -> None:
+        payload = json.dumps(body).encode()
+        headers = {'Content-Type': 'application/json'}
+        if etag_enabled:
+            etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_bytes(self, status: int, payload: bytes, extra_headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_raw(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    @staticmethod
+    def _json(raw: bytes) -> Dict[str, Any]:
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def _inject_failure(self) -> bool:
+        status = self.state.inject()
+        if status is None:
+            return False
+        self._send_json(status, {'message': 'injected failure'})
+        return True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        self.state.request_log.append(f"GET {parts.path}")
+        if self._inject_failure():
+            return
+
+        match = re.match(r'^/repos/([^/]+/[^/]+)/issues$', parts.path)
+        if match:
+            return self._send_json(200, self.state.github_issues_list(match.group(1), params), etag_enabled=True)
+
+        match = re.match(r'^/repos/([^/]+/[^/]+)/actions/workflows/([^/]+)/runs$', parts.path)
+        if match:
+            return self._send_json(200, self.state.workflow_runs_list(match.group(1), params), etag_enabled=True)
+
+        if parts.path == '/drive/v3/files':
+            return self._send_json(200, self.state.drive_list(params))
+
+        match = re.match(r'^/drive/v3/files/([^/]+)(/export)?$', parts.path)
+        if match:
+            file_id = match.group(1)
+            if file_id not in self.state.drive_files:
+                return self._send_json(404, {'error': {'message': 'File not found'}})
+            if match.group(2) or params.get('alt') == 'media':
+                return self._send_bytes(200, self.state.drive_content.get(file_id, b''),
+                                        {'Content-Type': 'application/octet-stream'})
+            return self._send_json(200, self.state.drive_files[file_id])
+
+        match = re.match(r'^/v1/(projects/.+/documents/.+)$', parts.path)
+        if match:
+            doc = self.state.firestore_document(unquote(match.group(1)))
+            if doc is None:
+                return self._send_json(404, {'error': {'code': 404, 'status': 'NOT_FOUND'}})
+            return self._send_json(200, doc)
+
+        match = re.match(r'^/storage/v1/b/([^/]+)/o/([^/]+)$', parts.path)
+        if match:
+            stored = self.state.gcs_objects.get((match.group(1), unquote(match.group(2))))
+            if stored is None:
+                return self._send_json(404, {'error': {'message': 'No such object'}})
+            if params.get('alt') == 'media':
+                return self._send_bytes(200, stored['data'], {'Content-Type': 'application/octet-stream'})
+            return self._send_json(200, stored['resource'])
+
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_PUT(self):
+        parts = urlsplit(self.path)
+        self.state.request_log.append(f"PUT {parts.path}")
+        raw = self._read_raw()
+        if self._inject_failure():
+            return
+
+        match = re.match(r'^/upload/session/([0-9a-f]+)$', parts.path)
+        if match:
+            status, result = self.state.upload_chunk(match.group(1), self.headers.get('Content-Range'), raw)
+            if status == 308:
+                headers = {'Range': f"bytes=0-{result - 1}"} if result else {}
+                return self._send_bytes(308, b'', headers)
+            return self._send_json(status, result or {'error': {'message': 'invalid upload'}})
+
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_PATCH(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        self.state.request_log.append(f"PATCH {parts.path}")
+        self._read_raw()
+        if self._inject_failure():
+            return
+
+        match = re.match(r'^/drive/v3/files/([^/]+)$', parts.path)
+        if match:
+            result = self.state.move_drive_file(match.group(1), params.get('addParents', ''),
+                                                params.get('removeParents', ''))
+            if result is None:
+                return self._send_json(404, {'error': {'message': 'File not found'}})
+            return self._send_json(200, result)
+
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        self.state.request_log.append(f"POST {parts.path}")
+        # O corpo é sempre consumido para não corromper a conexão keep-alive
+        raw = self._read_raw()
+        body = self._json(raw)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if self._inject_failure():
+            return
+
+        if parts.path == '/graphql':
+            self.state.linear_queries += 1
+            if 'issues' in body.get('query', ''):
+                return self._send_json(200, {'data': self.state.linear_issues_page(body.get('variables') or {})})
+            if 'commentCreate' in body.get('query', ''):
+                with self.state.lock:
+                    self.state.linear_comments.append(body.get('variables') or {})
+                return self._send_json(200, {'data': {'commentCreate': {'success': True}}})
+            if '(id: $' in body.get('query', ''):
+                return self._send_json(200, {'data': self.state.linear_lookup(body['query'], body.get('variables') or {})})
+            return self._send_json(200, {'errors': [{'message': 'unsupported query'}]})
+
+        match = re.match(r'^/repos/([^/]+/[^/]+)/actions/workflows/([^/]+)/dispatches$', parts.path)
+        if match:
+            unexpected = self.state.unexpected_inputs(match.group(1), match.group(2), body)
+            if unexpected:
+                # Mesmo formato do GitHub para inputs não declarados no workflow
+                return self._send_json(422, {'message': f"Unexpected inputs provided: {json.dumps(unexpected)}"})
+            self.state.record_dispatch(match.group(1), match.group(2), body)
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        match = re.match(r'^/v1/(projects/.+/documents):(commit|runQuery|runAggregationQuery)$', parts.path)
+        if match:
+            parent, method = match.groups()
+            if method == 'commit':
+                return self._send_json(*self.state.firestore_commit(body.get('writes', [])))
+            if method == 'runQuery':
+                docs = self.state.firestore_query(parent, body['structuredQuery'])
+                return self._send_json(200, [{'document': doc, 'readTime': utc_now()} for doc in docs] or
+                                       [{'readTime': utc_now()}])
+            aggregation = body['structuredAggregationQuery']
+            total = len(self.state.firestore_query(parent, aggregation['structuredQuery']))
+            alias = aggregation['aggregations'][0]['alias']
+            return self._send_json(200, [{'result': {'aggregateFields': {alias: {'integerValue': str(total)}}},
+                                          'readTime': utc_now()}])
+
+        if parts.path == '/batch/drive/v3':
+            content_type, payload = self.state.drive_batch(self.headers.get('Content-Type', ''), raw)
+            return self._send_bytes(200, payload, {'Content-Type': content_type})
+
+        if parts.path == '/drive/v3/files':
+            parent = (body.get('parents') or [''])[0]
+            meta = self.state.add_drive_file(body.get('name', ''), parent,
+                                             mime_type=body.get('mimeType', 'application/octet-stream'))
+            return self._send_json(200, {'id': meta['id'], 'name': meta['name']})
+
+        if parts.path == '/upload/drive/v3/files':
+            boundary = re.search(r'boundary=([^;]+)', self.headers.get('Content-Type', '')).group(1)
+            sections = raw.split(f"--{boundary}".encode())[1:-1]
+            metadata = json.loads(sections[0].split(b'\r\n\r\n', 1)[1])
+            content = sections[1].split(b'\r\n\r\n', 1)[1][:-2] if len(sections) > 1 else b''
+            meta = self.state.add_drive_file(metadata.get('name', ''), (metadata.get('parents') or [''])[0],
+                                             content, mime_type=metadata.get('mimeType', 'application/octet-stream'))
+            return self._send_json(200, {'id': meta['id'], 'name': meta['name'], 'mimeType': meta['mimeType'],
+                                         'webViewLink': f"https://docs.google.com/document/d/{meta['id']}/edit"})
+
+        match = re.match(r'^/upload/storage/v1/b/([^/]+)/o$', parts.path)
+        if match:
+            bucket, name = match.group(1), params.get('name') or body.get('name', '')
+            if params.get('uploadType') == 'resumable':
+                session_id = self.state.start_upload(bucket, name, body.get('metadata'))
+                location = f"http://{self.headers.get('Host')}/upload/session/{session_id}"
+                return self._send_bytes(200, b'', {'Location': location})
+            return self._send_json(200, self.state.put_object(bucket, name, raw))
+
+        match = re.match(r'^/storage/v1/b/([^/]+)/o/([^/]+)/rewriteTo/b/([^/]+)/o/([^/]+)$', parts.path)
+        if match:
+            stored = self.state.gcs_objects.get((match.group(1), unquote(match.group(2))))
+            if stored is None:
+                return self._send_json(404, {'error': {'message': 'No such object'}})
+            resource = self.state.put_object(match.group(3), unquote(match.group(4)), stored['data'],
+                                             stored['resource']['metadata'])
+            return self._send_json(200, {'done': True, 'resource': resource})
+
+        self._send_json(404, {'message': 'Not Found'})
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes que fecham conexões keep-alive ociosas não são erro
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_fake_upstreams(host: str = '127.0.0.1', port: int = 0):
+    """
+    Sobe o servidor em background; retorna (server, state, base_url)
+    """
+    state = FakeUpstreams()
+    handler = type('BoundFakeUpstreamHandler', (FakeUpstreamHandler,), {'state': state})
+    server = QuietHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Linear/GitHub/Drive/GCS/Firestore upstreams')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+
+    server, state, base_url = start_fake_upstreams(args.host, args.port)
+    state.configure(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    print(f"Fake upstreams listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
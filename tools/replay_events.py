@@ -0,0 +1,315 @@
+"""
+ADC-Agents-Team - Event Replay
+Reprocessa webhooks do Linear arquivados (JSONL) pela lógica do webhook_handler,
+por exemplo para recuperar dispatches perdidos durante uma queda do GitHub
+
+O arquivo é lido em streaming (uma linha por vez, filas limitadas), então a
+memória não cresce com o tamanho do arquivo. Eventos do mesmo projeto vão
+sempre para o mesmo worker e mantêm a ordem do arquivo.
+
+Transições já aplicadas só são puladas se o replay enxergar o mesmo estado do
+pipeline que a função: PIPELINE_STATE_URL precisa apontar para o store
+compartilhado do deploy (firestore://...). Com um store local (SQLite, o padrão
+sem a variável) o estado começa vazio e tudo seria disparado de novo, então o
+replay se recusa a rodar sem `--force`.
+
+Cada linha é o corpo do webhook ou um envelope com o corpo em `body`/`payload`;
+arquivos `.gz` e `-` (stdin) são aceitos. O ambiente (GITHUB_*, PIPELINE_STATE_URL,
+GOOGLE_CREDENTIALS, PROJECTS_CONFIG...) é o mesmo da função.
+
+Uso:
+    python tools/replay_events.py events-2025-10-*.jsonl.gz --workers 8 --rate 5
+    python tools/replay_events.py archive.jsonl --dry-run --json
+    python tools/replay_events.py archive.jsonl --failed-output retry.jsonl
+    python tools/replay_events.py archive.jsonl --force   # store local, sabendo que redispara
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import queue
+import argparse
+import threading
+import importlib.util
+from types import ModuleType
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS_DIR)
+FUNCTIONS_DIR = os.path.join(ROOT, 'functions')
+WEBHOOK_DIR = os.path.join(FUNCTIONS_DIR, 'webhook_handler')
+
+sys.path.insert(0, FUNCTIONS_DIR)
+
+# Sentinela de fim de fila dos workers
+_DONE = object()
+
+# Respostas do handle_issue_update que aplicam uma transição de estágio
+TRANSITION_STATUSES = frozenset({'auto_proceeded', 'awaiting_approval', 'pipeline_completed'})
+
+OUTCOMES = ('replayed', 'already_applied', 'ignored', 'duplicate', 'deferred', 'failed')
+
+
+def load_webhook_module() -> ModuleType:
+    """
+    Importa functions/webhook_handler/main.py (constantes lidas do ambiente no import)
+    """
+    if WEBHOOK_DIR not in sys.path:
+        sys.path.insert(0, WEBHOOK_DIR)
+    spec = importlib.util.spec_from_file_location('webhook_handler_main', os.path.join(WEBHOOK_DIR, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def local_state_store(webhook: ModuleType) -> Optional[str]:
+    """
+    Descrição do store do pipeline se ele for local ao processo (SQLite);
+    None se for o store compartilhado do deploy
+    """
+    from shared.pipeline_state import SQLitePipelineStateBackend
+
+    if isinstance(webhook.get_pipeline_state().backend, SQLitePipelineStateBackend):
+        return os.environ.get('PIPELINE_STATE_URL') or 'default local SQLite'
+    return None
+
+
+def open_archive(path: str) -> BinaryIO:
+    if path == '-':
+        return sys.stdin.buffer
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_lines(paths: List[str]) -> Iterator[Tuple[str, int, bytes]]:
+    """
+    (arquivo, número da linha, linha) em streaming
+    """
+    for path in paths:
+        with open_archive(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    yield path, number, line
+
+
+def unwrap(record: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(record, dict):
+        return None
+    if 'type' in record:
+        return record
+    for key in ('body', 'payload'):
+        if isinstance(record.get(key), dict):
+            return record[key]
+    return None
+
+
+class Pacer:
+    """
+    Limite global de eventos/s (0 = sem limite), aplicado pelo leitor
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(self.next_at, now) + self.interval
+
+
+class Replayer:
+    def __init__(self, webhook: ModuleType, workers: int, queue_size: int, dry_run: bool,
+                 all_events: bool, dedup_window: int, failed_output: Optional[str]):
+        from shared.dedup import DedupCache
+        from shared.metrics import Histogram
+
+        self.webhook = webhook
+        self.dry_run = dry_run
+        self.all_events = all_events
+        # Reentregas do Linear aparecem várias vezes no arquivo: janela LRU limitada
+        self.seen = DedupCache(max_entries=dedup_window, ttl_seconds=float('inf'))
+        self.latency = Histogram()
+        self.counts = {'read': 0, 'invalid': 0, 'filtered': 0, **{outcome: 0 for outcome in OUTCOMES}}
+        self.lock = threading.Lock()
+        self.queues = [queue.Queue(queue_size) for _ in range(workers)]
+        self.threads = [threading.Thread(target=self._work, args=(q,), name=f"replay-{i}", daemon=True)
+                        for i, q in enumerate(self.queues)]
+        self.failed_file = open(failed_output, 'wb') if failed_output else None
+        self.started = time.monotonic()
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    def feed(self, lines: Iterator[Tuple[str, int, bytes]], pacer: Pacer, limit: int = 0) -> None:
+        for thread in self.threads:
+            thread.start()
+        router = self.webhook.EVENTS
+        for path, number, line in lines:
+            if limit and self.counts['read'] >= limit:
+                break
+            self.count('read')
+            # Mesmo pré-filtro do handler: eventos sem rota nem são decodificados
+            if router.is_unhandled(line):
+                self.count('filtered')
+                continue
+            try:
+                data = unwrap(self.webhook.json_loads(line))
+            except ValueError:
+                data = None
+            if data is None:
+                self.count('invalid')
+                continue
+            if not self.all_events and (data.get('type'), data.get('action')) != ('Issue', 'update'):
+                self.count('filtered')
+                continue
+            if self.seen.check_and_mark(self.webhook.get_dedup_keys(data)):
+                self.count('duplicate')
+                continue
+            pacer.wait()
+            # Fila bloqueante e limitada: o leitor nunca se adianta mais que `queue_size` eventos por worker
+            self.queues[hash(self.partition(data)) % len(self.queues)].put((line, data))
+        for q in self.queues:
+            q.put(_DONE)
+        for thread in self.threads:
+            thread.join()
+        if self.failed_file is not None:
+            self.failed_file.close()
+
+    def partition(self, data: Dict[str, Any]) -> str:
+        """
+        Chave de ordenação: o projeto do evento (transições L1 → L2 em sequência)
+        """
+        issue = data.get('data') or {}
+        project = self.webhook.get_project_registry().resolve(
+            issue.get('projectId') or (issue.get('project') or {}).get('id'),
+            issue.get('teamId') or (issue.get('team') or {}).get('id')
+        )
+        return project.name
+
+    def _work(self, q: 'queue.Queue') -> None:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            line, data = item
+            started = time.perf_counter()
+            outcome = self.replay(data)
+            self.latency.observe(time.perf_counter() - started)
+            self.count(outcome)
+            if outcome in ('deferred', 'failed') and self.failed_file is not None:
+                with self.lock:
+                    self.failed_file.write(line + b'\n')
+
+    def replay(self, data: Dict[str, Any]) -> str:
+        if self.dry_run:
+            return 'replayed'
+        try:
+            body, status = self.webhook.process_event(data)
+        except self.webhook.DispatchDeferred:
+            return 'deferred'
+        except Exception as e:
+            print(f"replay failed: {e}", file=sys.stderr)
+            return 'failed'
+        if status >= 500:
+            return 'failed'
+        if body.get('reason') == 'stage_already_completed':
+            return 'already_applied'
+        if body.get('status') == 'auto_proceeded' and not body.get('automation_triggered'):
+            # Estágio concluído sem o dispatch (recusado pelo GitHub): precisa de ação manual
+            return 'failed'
+        return 'replayed' if body.get('status') in TRANSITION_STATUSES else 'ignored'
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        with self.lock:
+            counts = dict(self.counts)
+        processed = sum(counts[outcome] for outcome in OUTCOMES if outcome != 'duplicate')
+        _, replays, total = self.latency.snapshot()
+        return {
+            **counts,
+            'elapsed_s': round(elapsed, 2),
+            'read_per_s': round(counts['read'] / elapsed, 1) if elapsed else 0.0,
+            'processed_per_s': round(processed / elapsed, 1) if elapsed else 0.0,
+            'mean_ms': round(total / replays * 1000, 2) if replays else 0.0,
+            'p95_ms': round((self.latency.quantile(0.95) or 0.0) * 1000, 2),
+        }
+
+
+def progress_loop(replayer: Replayer, interval: float, stop: threading.Event) -> None:
+    while not stop.wait(interval):
+        r = replayer.report()
+        print(f"[{r['elapsed_s']:8.1f}s] read {r['read']} ({r['read_per_s']}/s)  replayed {r['replayed']}  "
+              f"applied {r['already_applied']}  deferred {r['deferred']}  failed {r['failed']}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reprocessa webhooks do Linear arquivados (JSONL)')
+    parser.add_argument('archives', nargs='+', help="arquivos JSONL (.gz aceito; '-' lê do stdin)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0.0, help='eventos/s enviados aos workers (0 = sem limite)')
+    parser.add_argument('--queue-size', type=int, default=100, help='eventos em espera por worker')
+    parser.add_argument('--limit', type=int, default=0, help='para após ler N linhas')
+    parser.add_argument('--all-events', action='store_true', help='reprocessa todos os eventos roteados, não só Issue/update')
+    parser.add_argument('--dedup-window', type=int, default=100000, help='chaves lembradas para descartar reentregas')
+    parser.add_argument('--dry-run', action='store_true', help='só lê, filtra e conta')
+    parser.add_argument('--notify', action='store_true', help='mantém as notificações (Slack) durante o replay')
+    parser.add_argument('--failed-output', help='grava as linhas adiadas/com falha para um novo replay')
+    parser.add_argument('--force', action='store_true',
+                        help='roda mesmo com o estado do pipeline local (transições já aplicadas são redisparadas)')
+    parser.add_argument('--progress', type=float, default=10.0, help='intervalo (s) do progresso no stderr; 0 desativa')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_OUTPUT', 'text')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    if not args.notify:
+        os.environ['SLACK_WEBHOOK_URL'] = ''
+    # Comentários e pastas já foram criados na entrega original; o replay só reaplica transições
+    os.environ['APPROVAL_LINEAR_COMMENT'] = 'false'
+    os.environ['APPROVAL_DRIVE_SETUP'] = 'false'
+    # O replay já serializa por projeto: dispatch dentro do evento, sem janela de coalescência
+    os.environ['DISPATCH_COALESCE_SECONDS'] = '0'
+    webhook = load_webhook_module()
+
+    local_store = None if args.dry_run else local_state_store(webhook)
+    if local_store and not args.force:
+        parser.error(f"pipeline state store is local ({local_store}): already-applied transitions would be "
+                     f"dispatched again. Point PIPELINE_STATE_URL at the deployed store (firestore://...) "
+                     f"or pass --force")
+
+    replayer = Replayer(webhook, max(1, args.workers), max(1, args.queue_size), args.dry_run,
+                        args.all_events, args.dedup_window, args.failed_output)
+    stop = threading.Event()
+    if args.progress > 0:
+        threading.Thread(target=progress_loop, args=(replayer, args.progress, stop), daemon=True).start()
+
+    try:
+        replayer.feed(read_lines(args.archives), Pacer(args.rate), args.limit)
+    finally:
+        stop.set()
+        # Notificações em espera saem antes do relatório
+        webhook.get_notifier().flush()
+
+    result = replayer.report()
+    result['dispatch'] = webhook.get_dispatch_scheduler().snapshot()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"read {result['read']} lines in {result['elapsed_s']}s ({result['read_per_s']} lines/s, "
+              f"{result['processed_per_s']} events/s processed)")
+        print('  ' + '  '.join(f"{key} {result[key]}" for key in ('filtered', 'invalid', *OUTCOMES)))
+        print(f"  handler mean {result['mean_ms']} ms, p95 {result['p95_ms']} ms; dispatch {result['dispatch']}")
+    sys.exit(1 if result['failed'] or result['deferred'] else 0)
+
+
+if __name__ == '__main__':
+    main()